@@ -4,8 +4,12 @@ import openai
 import os
 from dotenv import load_dotenv
 import re
-from pathlib import Path
-import json
+from budgeter.store import open_store
+from budgeter.data import budget_data
+from budgeter.goal_eta import goal_eta, describe_eta
+from budgeter.recurring import materialize_due
+from culinary.chef_cache import ChefCache
+from culinary.normalize import dedupe, request_key
 
 load_dotenv()
 
@@ -16,44 +20,36 @@ openai.api_key = os.getenv('OPENAI_API_KEY')
 
 user_progress = {}
 
-DATA_FILE = Path("pages/budgeter_state.json")
-GOAL_FILE = Path("pages/budgeter_goal.json")
-SETTINGS_FILE = Path("pages/budgeter_settings.json")
-TRANSACTIONS_FILE = Path("pages/budgeter_transactions.jsonl")
+# Same engine as the Budgeter page (BUDGETER_BACKEND=files|sqlite).
+budget_store = open_store()
+budget_reader = budget_data(budget_store)
+
+# Pocket Chef answers by normalized ingredient set, so "Tomatoes, 2 eggs" and
+# "egg, tomato" share one model call, and so can sets that only differ by a
+# stand-in (mozzarella for cheese). In memory, least recently used out first.
+POCKET_CHEF_CACHE_SIZE = 256
+pocket_chef_cache = ChefCache(POCKET_CHEF_CACHE_SIZE)
 
 def load_budget_data():
-    if DATA_FILE.exists():
-        try:
-            d = json.loads(DATA_FILE.read_text())
-            account = d.get("account", 0.0)
-            savings = d.get("savings", 0.0)
-        except: pass
-
-    goal = {}
-    if GOAL_FILE.exists():
-        try:
-            goal = json.loads(GOAL_FILE.read_text())
-        except: pass
-
-    auto_save = 0.0
-    if SETTINGS_FILE.exists():
-        try:
-            d = json.loads(SETTINGS_FILE.read_text())
-            auto_save = d.get("auto_save_percent", 0.0)
-        except: pass
-
-    txns = []
-    if TRANSACTIONS_FILE.exists():
-        for line in TRANSACTIONS_FILE.read_text().splitlines():
-            try:
-                txns.append(json.loads(line))
-            except: continue
+    # Scheduled transactions are posted lazily by whoever reads the budget first.
+    materialize_due(budget_store)
+    # Cached between requests; only files the page (or anyone) changed are re-read.
+    account, savings = budget_reader.balances()
+    goal_name, goal_amount = budget_reader.goal()
+    goal = {"goal_name": goal_name, "goal_amount": goal_amount} if goal_amount else {}
+    try:
+        auto_save = float(budget_reader.settings().get("auto_save_percent", 0.0))
+    except Exception:
+        auto_save = 0.0
+    txns = budget_reader.recent_txns(10)
+    eta = goal_eta(savings, goal_amount, budget_reader.rate_state())
 
     return {
         "account": account,
         "savings": savings,
         "goal": goal,
         "auto_save_percent": auto_save,
+        "goal_eta": describe_eta(eta) if eta else "",
         "transactions": txns
     }
 
@@ -114,7 +110,9 @@ def pocket_chef():
     try:
         data = request.json
         user_id = data.get('user_id', 'default')
-        ingredients = data.get('ingredients', [])
+        # The model gets the items as typed; the cache compares their normalized key.
+        ingredients = dedupe(str(i) for i in data.get('ingredients', []))
+        key = request_key(ingredients)
         
         system_prompt = """You are a chef assistant for teenagers. 
         Create simple recipes using only 3-5 common ingredients.
@@ -126,19 +124,27 @@ def pocket_chef():
         STEPS: [Numbered steps]
         TIME: [X minutes]"""
         
-        user_message = f"Create a recipe using these ingredients: {', '.join(ingredients)}"
-        
-        response = openai.ChatCompletion.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ],
-            temperature=0.8,
-            max_tokens=300
-        )
-        
-        recipe = response.choices[0].message.content
+        # "fresh" asks for a new recipe: skip the cache, but remember the answer.
+        fresh = bool(data.get('fresh'))
+        hit = pocket_chef_cache.get(key) if key and not fresh else None
+        cached = hit is not None
+        recipe, swaps = hit if cached else (None, [])
+        if not cached:
+            user_message = f"Create a recipe using these ingredients: {', '.join(ingredients)}"
+
+            response = openai.ChatCompletion.create(
+                model="gpt-4o",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_message}
+                ],
+                temperature=0.8,
+                max_tokens=300
+            )
+
+            recipe = response.choices[0].message.content
+            if key:
+                pocket_chef_cache.put(key, recipe)
         
         if user_id not in user_progress:
             user_progress[user_id] = {
@@ -156,6 +162,8 @@ def pocket_chef():
         
         return jsonify({
             "recipe": recipe,
+            "cached": cached,
+            "substitutions": [{"needed": a, "use": b} for a, b in swaps],
             "xp_gained": xp_gained,
             "total_xp": user_progress[user_id]["total_xp"],
             "cooking_xp": user_progress[user_id]["cooking_xp"]
@@ -188,6 +196,7 @@ def budget_buddy():
         Savings balance: {budget_data['savings']}
         Auto-save: {budget_data['auto_save_percent']}%
         Goal: {budget_data['goal']}
+        Goal projection: {budget_data['goal_eta'] or 'no goal set'}
         Transactions: {budget_data['transactions'][-10:]}
 
         Latest command: {command}
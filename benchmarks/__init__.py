@@ -0,0 +1 @@
+"""Microbenchmarks for the Budgeter data layer (``python -m benchmarks.ledger_bench``)."""
@@ -0,0 +1,122 @@
+"""Time the Budgeter data functions against synthetic ledgers.
+
+    python -m benchmarks.ledger_bench                       # 10k, 100k, 1M on both backends
+    python -m benchmarks.ledger_bench --sizes 10000 --backend sqlite
+    python -m benchmarks.ledger_bench --save bench.json     # record a baseline
+    python -m benchmarks.ledger_bench --compare bench.json  # exit 1 on a regression
+
+Each operation reports the best of ``--repeat`` runs, in milliseconds.
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from benchmarks.synthetic import populate
+from budgeter import ledger
+from budgeter.store import FileStore, SqliteStore
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+BACKENDS = {"files": lambda d: FileStore(d), "sqlite": lambda d: SqliteStore(d / "bench.sqlite3")}
+
+
+def best_of(fn, repeat: int, number: int = 1) -> float:
+    """Fastest per-call time of ``fn`` in ms over ``repeat`` rounds of ``number`` calls."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1000
+
+
+def bench_store(store, n: int, repeat: int):
+    populate(store, n)
+    txns = ledger.load_txns(store)
+    since = datetime.now() - timedelta(days=30)
+    month = ledger.filter_txns(txns, since)
+
+    def log_and_undo():
+        ledger.log_txn(store, "spend", 1.25, "bench")
+        ledger.undo_last_txn(store)
+
+    results = {
+        "load_txns": best_of(lambda: ledger.load_txns(store), repeat),
+        "filter_txns (all)": best_of(lambda: ledger.filter_txns(txns), repeat),
+        "filter_txns (30 days)": best_of(lambda: ledger.filter_txns(txns, since), repeat),
+        "totals_from_txns (all)": best_of(lambda: ledger.totals_from_txns(txns), repeat),
+        "totals_from_txns (30 days)": best_of(lambda: ledger.totals_from_txns(month), repeat),
+        "log_txn": best_of(lambda: ledger.log_txn(store, "spend", 1.25, "bench"), repeat, number=20),
+        "log_txn + undo_last_txn": best_of(log_and_undo, repeat, number=20),
+        "replay": best_of(lambda: ledger.replay(store), repeat),
+        "rewrite_txns": best_of(lambda: ledger.rewrite_txns(store, txns), max(1, repeat // 2)),
+    }
+    return results
+
+
+def run(sizes, backends, repeat: int, keep: bool = False):
+    results = {}
+    for backend in backends:
+        for n in sizes:
+            root = Path(tempfile.mkdtemp(prefix=f"budgeter-bench-{backend}-"))
+            try:
+                print(f"[{backend}] {n:,} records…", file=sys.stderr, flush=True)
+                t0 = time.perf_counter()
+                store = BACKENDS[backend](root)
+                res = bench_store(store, n, repeat)
+                print(f"  done in {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+                for op, ms in res.items():
+                    results[f"{backend}/{n}/{op}"] = ms
+            finally:
+                if not keep:
+                    shutil.rmtree(root, ignore_errors=True)
+    return results
+
+
+def print_table(results, baseline=None):
+    width = max(len(k) for k in results)
+    for key, ms in results.items():
+        line = f"{key:<{width}}  {ms:12.3f} ms"
+        if baseline and key in baseline:
+            line += f"   ×{ms / baseline[key]:.2f} vs baseline" if baseline[key] else ""
+        print(line)
+
+
+def regressions(results, baseline, tolerance: float):
+    return [(k, baseline[k], ms) for k, ms in results.items()
+            if k in baseline and baseline[k] > 0 and ms > baseline[k] * tolerance]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES))
+    ap.add_argument("--backend", choices=[*BACKENDS, "all"], default="all")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--save", type=Path, help="write results as JSON")
+    ap.add_argument("--compare", type=Path, help="baseline JSON from --save")
+    ap.add_argument("--tolerance", type=float, default=1.5,
+                    help="fail when an operation is this many times slower than the baseline")
+    ap.add_argument("--keep", action="store_true", help="keep the generated ledgers")
+    args = ap.parse_args(argv)
+
+    backends = list(BACKENDS) if args.backend == "all" else [args.backend]
+    results = run(args.sizes, backends, args.repeat, args.keep)
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_table(results, baseline)
+    if args.save:
+        args.save.write_text(json.dumps(results, indent=2))
+    if baseline:
+        slow = regressions(results, baseline, args.tolerance)
+        for key, old, new in slow:
+            print(f"REGRESSION {key}: {old:.3f} ms -> {new:.3f} ms", file=sys.stderr)
+        return 1 if slow else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+"""Synthetic Budgeter histories that look like a real user's ledger.
+
+A simulated teen gets a weekly allowance (with auto-save), spends a few
+times a day on notes drawn from the default categories, moves money to and
+from savings now and then, and very occasionally deletes or reconciles.
+Balances are tracked so spends never overdraw, just like the page.
+"""
+import random
+from datetime import datetime, timedelta
+
+from budgeter.categories import DEFAULT_CATEGORIES
+
+SPEND_NOTES = [kw for kws in DEFAULT_CATEGORIES.values() for kw in kws] + ["", "", "misc", "stuff for mom"]
+
+
+def generate_ledger(n: int, seed: int = 7, days: int = 5 * 365, auto_save_percent: float = 10.0):
+    """Yield ``n`` ledger records spread over the last ``days`` days (deterministic for a seed)."""
+    rng = random.Random(seed)
+    ts = datetime.now() - timedelta(days=days)
+    mean_gap = days * 86400 / n * 1.1  # allowances emit two records per event
+    account = savings = 0.0
+    next_allowance = ts
+    emitted = 0
+    while emitted < n:
+        ts += timedelta(seconds=rng.expovariate(1 / mean_gap))
+        if ts >= next_allowance or account < 5:
+            amt = float(rng.choice((20, 25, 40, 50, 75)))
+            recs = [{"ts": ts.isoformat(), "type": "add", "amount": amt}]
+            auto = round(amt * auto_save_percent / 100, 2)
+            if auto:
+                recs.append({"ts": ts.isoformat(), "type": "auto_move_to_savings", "amount": auto})
+            account += amt - auto
+            savings += auto
+            next_allowance = ts + timedelta(days=7)
+        else:
+            roll = rng.random()
+            if roll < 0.80:
+                amt = round(min(rng.lognormvariate(1.6, 0.8), account), 2)
+                rec = {"ts": ts.isoformat(), "type": "spend", "amount": amt}
+                note = rng.choice(SPEND_NOTES)
+                if note:
+                    rec["note"] = note
+                account -= amt
+            elif roll < 0.92:
+                amt = round(account * rng.uniform(0.1, 0.5), 2)
+                rec = {"ts": ts.isoformat(), "type": "move_to_savings", "amount": amt}
+                account -= amt
+                savings += amt
+            elif roll < 0.995:
+                amt = round(savings * rng.uniform(0.05, 0.3), 2)
+                rec = {"ts": ts.isoformat(), "type": "move_to_account", "amount": amt}
+                account += amt
+                savings -= amt
+            else:
+                amt = round(min(rng.uniform(1, 10), account), 2)
+                rec = {"ts": ts.isoformat(), "type": "delete_from_account", "amount": amt}
+                account -= amt
+            if rec["amount"] <= 0:
+                continue
+            recs = [rec]
+        for rec in recs[:n - emitted]:
+            yield rec
+            emitted += 1
+
+
+def populate(store, n: int, seed: int = 7, chunk: int = 50000):
+    """Fill an empty store with ``n`` synthetic records and matching balances."""
+    from budgeter.ledger import apply_txn
+
+    account = savings = 0.0
+    batch = []
+    for rec in generate_ledger(n, seed):
+        account, savings = apply_txn(account, savings, rec)
+        batch.append(rec)
+        if len(batch) >= chunk:
+            store.append_txns(batch)
+            batch = []
+    if batch:
+        store.append_txns(batch)
+    store.save_balances(round(account, 2), round(savings, 2))
+    return round(account, 2), round(savings, 2)
@@ -0,0 +1 @@
+"""Shared, Streamlit-free helpers for the Budgeter page."""
@@ -0,0 +1,51 @@
+"""Background calls to the backend's /api/budget-buddy endpoint.
+
+The LLM round trip can take several seconds, so requests run on a small
+shared thread pool and the page polls the returned ``BuddyRequest`` instead
+of blocking the Streamlit script.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BUDDY_TIMEOUT = 15
+_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="budget-buddy")
+
+
+class BuddyRequest:
+    def __init__(self, backend: str, command: str, user_id: str = "demo"):
+        self.command = command
+        self.started = time.time()
+        self.cancelled = False
+        self.duration = None  # seconds the backend round trip took
+        self.future = _POOL.submit(self._call, backend, command, user_id)
+
+    def _call(self, backend: str, command: str, user_id: str):
+        start = time.perf_counter()
+        try:
+            resp = requests.post(f"{backend}/api/budget-buddy",
+                                 json={"user_id": user_id, "command": command}, timeout=BUDDY_TIMEOUT)
+            resp.raise_for_status()
+            return resp.json()
+        finally:
+            self.duration = time.perf_counter() - start
+
+    def cancel(self):
+        """Stop waiting; a call already on the wire finishes but its answer is dropped."""
+        self.cancelled = True
+        self.future.cancel()
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def elapsed(self) -> float:
+        return time.time() - self.started
+
+    def result(self):
+        """(advice, error) once done; exactly one of them is set."""
+        try:
+            data = self.future.result(timeout=0)
+        except Exception as e:
+            return None, e
+        return data.get("advice", "(no advice)"), None
@@ -0,0 +1,149 @@
+"""Spending categories for transaction notes.
+
+All keywords are compiled into one Aho-Corasick automaton, so categorizing a
+note is a single left-to-right pass regardless of how many keywords exist,
+and the whole history costs time linear in the total note length. Results
+are cached per record.
+"""
+from collections import deque
+
+UNCATEGORIZED = "Uncategorized"
+
+DEFAULT_CATEGORIES = {
+    "Food & Drink": ["coffee", "lunch", "dinner", "breakfast", "snack", "snacks", "pizza", "burger", "boba",
+                     "tea", "starbucks", "mcdonalds", "chipotle", "restaurant", "cafe", "groceries", "grocery",
+                     "food", "ice cream", "soda", "drink", "drinks"],
+    "Transport": ["bus", "train", "metro", "subway", "uber", "lyft", "taxi", "gas", "fuel", "parking", "bike",
+                  "ticket"],
+    "Entertainment": ["movie", "movies", "cinema", "concert", "game", "games", "steam", "arcade", "bowling",
+                      "netflix", "spotify", "music", "show"],
+    "Shopping": ["clothes", "shoes", "shirt", "hoodie", "amazon", "target", "mall", "makeup", "jewelry"],
+    "School": ["book", "books", "notebook", "pens", "supplies", "calculator", "tuition", "class", "course",
+               "school"],
+    "Phone & Tech": ["phone", "data plan", "headphones", "charger", "laptop", "app", "icloud"],
+    "Gifts": ["gift", "gifts", "birthday", "present", "donation", "charity"],
+    "Health": ["pharmacy", "medicine", "doctor", "gym", "vitamins"],
+}
+
+
+class KeywordAutomaton:
+    """Aho-Corasick matcher over lower-cased keywords, matching whole words only."""
+
+    def __init__(self, keywords):
+        # keywords: {keyword: category}
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [None]  # (keyword length, category) of the longest keyword ending here
+        for kw, cat in keywords.items():
+            kw = kw.strip().lower()
+            if kw:
+                self._add(kw, cat)
+        self._link()
+
+    def _add(self, kw: str, cat: str):
+        node = 0
+        for ch in kw:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append(None)
+            node = nxt
+        self.out[node] = (len(kw), cat)
+
+    def _link(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                cand = self.goto[f].get(ch, 0)
+                self.fail[nxt] = cand if cand != nxt else 0
+
+    def matches(self, text: str):
+        """Yield (start, length, category) for each whole-word keyword in ``text``."""
+        t = text.lower()
+        n = len(t)
+        node = 0
+        for i, ch in enumerate(t):
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            # Walk the suffix chain for shorter keywords ending at the same spot.
+            m = node
+            while m:
+                hit = self.out[m]
+                if hit:
+                    length, cat = hit
+                    start = i - length + 1
+                    if (start == 0 or not t[start - 1].isalnum()) and (i + 1 == n or not t[i + 1].isalnum()):
+                        yield start, length, cat
+                m = self.fail[m]
+
+    def best(self, text: str):
+        """Category of the longest (then earliest) keyword in ``text``, or None."""
+        best = None
+        for start, length, cat in self.matches(text):
+            if best is None or length > best[1] or (length == best[1] and start < best[0]):
+                best = (start, length, cat)
+        return best[2] if best else None
+
+
+def merge_categories(user_categories=None):
+    """Defaults plus the user's additions ({category: [keywords]})."""
+    merged = {cat: list(kws) for cat, kws in DEFAULT_CATEGORIES.items()}
+    for cat, kws in (user_categories or {}).items():
+        merged.setdefault(cat, [])
+        merged[cat].extend(k for k in kws if k not in merged[cat])
+    return merged
+
+
+class Categorizer:
+    def __init__(self, user_categories=None):
+        categories = merge_categories(user_categories)
+        # Later (user) entries win when the same keyword appears twice.
+        keywords = {kw.lower(): cat for cat, kws in categories.items() for kw in kws}
+        self.categories = list(categories)
+        self.automaton = KeywordAutomaton(keywords)
+        self._cache = {}
+
+    def categorize(self, rec) -> str:
+        if rec.get("category"):
+            return rec["category"]
+        note = rec.get("note") or ""
+        if not note:
+            return UNCATEGORIZED
+        key = (rec.get("ts"), note)
+        cat = self._cache.get(key)
+        if cat is None:
+            cat = self.automaton.best(note) or UNCATEGORIZED
+            self._cache[key] = cat
+        return cat
+
+    def breakdown(self, txns, types=("spend",)):
+        """{category: total amount} for records of ``types``, largest first."""
+        totals = {}
+        for r in txns:
+            if r.get("type") in types:
+                cat = self.categorize(r)
+                totals[cat] = totals.get(cat, 0.0) + float(r.get("amount", 0.0))
+        return dict(sorted(totals.items(), key=lambda kv: -kv[1]))
+
+
+_categorizers = {}
+
+
+def get_categorizer(user_categories=None) -> Categorizer:
+    """Shared categorizer (and its per-record cache) for a given set of user keywords."""
+    key = tuple(sorted((cat, tuple(kws)) for cat, kws in (user_categories or {}).items()))
+    cz = _categorizers.get(key)
+    if cz is None:
+        if len(_categorizers) > 8:
+            _categorizers.clear()
+        cz = _categorizers[key] = Categorizer(user_categories)
+    return cz
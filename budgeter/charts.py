@@ -0,0 +1,54 @@
+"""Chart rendering for the Budgeter page.
+
+matplotlib is imported on first use so the page paints before the plotting
+stack is loaded, and rendered images are memoized on their inputs so a rerun
+with unchanged balances does not draw anything.
+"""
+import io
+from functools import lru_cache
+
+PIE_COLORS = ("#2b6cb0", "#ed8936", "#38a169")  # blue, orange, green
+PIE_LABELS = ("In Account", "In Savings", "Spent")
+
+_mpl = None
+
+
+def _matplotlib():
+    global _mpl
+    if _mpl is None:
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        _mpl = (Figure, FigureCanvasAgg)
+    return _mpl
+
+
+@lru_cache(maxsize=64)
+def composition_pie_png(account_bal: float, savings_bal: float, spent_total: float, text_color: str, colors=PIE_COLORS) -> bytes:
+    """PNG bytes for the composition pie, cached on the full input tuple."""
+    Figure, FigureCanvasAgg = _matplotlib()
+    values = [account_bal, savings_bal, spent_total]
+    # An overdrawn balance has no wedge; its legend entry still shows the amount.
+    sizes = [max(v, 0.0) for v in values]
+    total = sum(sizes)
+
+    # A bare Figure is not tracked by pyplot, so it is released as soon as
+    # this function returns instead of piling up in the global figure manager.
+    fig = Figure(figsize=(4, 4))
+    FigureCanvasAgg(fig)
+    try:
+        ax = fig.subplots()
+        wedges, _ = ax.pie(sizes, colors=list(colors), startangle=90, wedgeprops=dict(linewidth=1, edgecolor="white"))
+        ax.axis("equal")
+
+        pct = [v / total * 100 for v in sizes]
+        legend_labels = [f"{PIE_LABELS[i]} — ${values[i]:,.0f} ({pct[i]:.0f}%)" for i in range(3)]
+        legend = ax.legend(wedges, legend_labels, loc="upper center", bbox_to_anchor=(0.5, -0.05), ncol=1, frameon=False)
+        for t in legend.get_texts():
+            t.set_color(text_color)
+        fig.tight_layout()
+
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png", transparent=True, bbox_inches="tight")
+        return buf.getvalue()
+    finally:
+        fig.clear()
@@ -0,0 +1,349 @@
+"""Table-driven command engine for the Budgeter command panel.
+
+Commands that change money, the goal or settings are registered in
+``REGISTRY`` and run against a ``Draft`` copy of the state. A script such as
+``add 200; spend 12 lunch; save 50`` (``;`` or newline separated) is parsed
+and checked in full, then executed on the draft; if any statement fails the
+draft is thrown away, otherwise the caller persists it with one balance write
+and one batched ledger append.
+"""
+import shlex
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+from budgeter.categories import DEFAULT_CATEGORIES
+from budgeter.goal_eta import describe_eta, goal_eta
+from budgeter.ledger import adjustment_txn, make_txn
+from budgeter.recurring import describe_rule, make_rule, parse_recurrence
+
+
+class CommandError(Exception):
+    """A statement that cannot run; ``level`` is the Streamlit message kind to show."""
+
+    def __init__(self, message: str, level: str = "error"):
+        super().__init__(message)
+        self.level = level
+
+
+@dataclass
+class Draft:
+    account: float
+    savings: float
+    auto_save_percent: float = 0.0
+    goal_name: str = "My Goal"
+    goal_amount: float = 0.0
+    categories: Dict[str, List[str]] = field(default_factory=dict)
+    rate_state: Optional[dict] = None  # savings-rate state for goal projections
+    recurring: List[dict] = field(default_factory=list)  # current recurring rules
+    recs: List[dict] = field(default_factory=list)
+    messages: List[Tuple[str, str]] = field(default_factory=list)
+    goal_changed: bool = False
+    settings_changed: bool = False
+    new_rules: List[dict] = field(default_factory=list)
+    dropped_rules: List[str] = field(default_factory=list)
+
+    def emit(self, kind: str, amount: float, note: str = ""):
+        rec = make_txn(kind, amount, note)
+        if rec:
+            self.recs.append(rec)
+
+    def say(self, level: str, text: str):
+        self.messages.append((level, text))
+
+
+@dataclass
+class Command:
+    names: Tuple[str, ...]
+    handler: Callable
+    usage: str
+    match: Optional[Callable] = None  # extra check on the parsed words
+
+    def accepts(self, parts) -> bool:
+        return self.match is None or self.match(parts)
+
+
+REGISTRY: Dict[str, Command] = {}
+
+
+def command(*names: str, usage: str = "", match: Callable = None):
+    """Register a handler ``fn(draft, parts)`` under one or more command words."""
+    def deco(fn):
+        cmd = Command(names, fn, usage, match)
+        for n in names:
+            REGISTRY[n] = cmd
+        return fn
+    return deco
+
+
+def split_script(text: str) -> List[str]:
+    """Split on ``;`` and newlines that are not inside quotes."""
+    out, buf, quote = [], [], None
+    for ch in text:
+        if quote:
+            if ch == quote:
+                quote = None
+        elif ch in ("'", '"'):
+            quote = ch
+        elif ch in ";\n\r":
+            out.append("".join(buf))
+            buf = []
+            continue
+        buf.append(ch)
+    out.append("".join(buf))
+    return [s.strip() for s in out if s.strip()]
+
+
+def parse_statement(stmt: str) -> List[str]:
+    try:
+        parts = shlex.split(stmt)
+    except ValueError:
+        raise CommandError("Couldn't parse command. Try quotes around names, e.g., goal 3000 \"New laptop\".")
+    if not parts:
+        raise CommandError("Please enter a command.", level="warning")
+    return parts
+
+
+def lookup(parts) -> Optional[Command]:
+    cmd = REGISTRY.get(parts[0].lower()) if parts else None
+    return cmd if cmd and cmd.accepts(parts) else None
+
+
+def is_engine_command(stmt: str) -> bool:
+    try:
+        parts = shlex.split(stmt)
+    except ValueError:
+        return False
+    return lookup(parts) is not None
+
+
+def amount_arg(parts, i: int = 1) -> float:
+    if len(parts) <= i:
+        raise CommandError("Missing amount.")
+    try:
+        return float(parts[i].rstrip("%"))
+    except ValueError:
+        raise CommandError("Amount must be a number.")
+
+
+def positive_amount(parts, i: int = 1) -> float:
+    amt = amount_arg(parts, i)
+    if amt <= 0:
+        raise CommandError("Amount must be greater than zero.")
+    return amt
+
+
+def note_arg(parts, start: int = 2) -> str:
+    return " ".join(parts[start:]) if len(parts) > start else ""
+
+
+def compile_script(text: str):
+    """Parse every statement up front; returns ``[(stmt, Command, parts), ...]``."""
+    statements = split_script(text)
+    if not statements:
+        raise CommandError("Please enter a command.", level="warning")
+    compiled = []
+    for n, stmt in enumerate(statements, 1):
+        where = f" (statement {n}: `{stmt}`)" if len(statements) > 1 else ""
+        try:
+            parts = parse_statement(stmt)
+        except CommandError as e:
+            raise CommandError(f"{e}{where}", e.level)
+        cmd = lookup(parts)
+        if cmd is None:
+            raise CommandError(f"Unknown command `{parts[0]}` — only money, goal and autosave commands can be batched{where}.")
+        compiled.append((stmt, cmd, parts))
+    return compiled
+
+
+def run_script(text: str, draft: Draft) -> Draft:
+    """Execute a whole script on ``draft``; raises CommandError and leaves nothing applied on failure."""
+    compiled = compile_script(text)
+    for n, (stmt, cmd, parts) in enumerate(compiled, 1):
+        try:
+            cmd.handler(draft, parts)
+        except CommandError as e:
+            where = f" (statement {n}: `{stmt}`) — nothing was applied." if len(compiled) > 1 else ""
+            raise CommandError(f"{e}{where}", e.level)
+    if len(compiled) > 1:
+        draft.say("success", f"Ran {len(compiled)} commands. Account: ${draft.account:,.2f} • Savings: ${draft.savings:,.2f}")
+    return draft
+
+
+# ---------- Operations (also used by the page's forms) ----------
+def op_add(d: Draft, amt: float):
+    d.account += amt
+    d.emit("add", amt)
+    pct = max(0.0, min(float(d.auto_save_percent or 0.0), 100.0))
+    auto_move = round(amt * (pct / 100.0), 2)
+    if auto_move > 0:
+        auto_move = min(auto_move, d.account)
+        d.account -= auto_move
+        d.savings += auto_move
+        d.emit("auto_move_to_savings", auto_move)
+        d.say("info", f"Auto-saved {pct:.0f}% (${auto_move:,.2f}) from this deposit.")
+    d.say("success", f"Added ${amt:,.2f}. Account: ${d.account:,.2f}")
+
+
+def op_save(d: Draft, amt: float, note: str = ""):
+    amt = min(amt, d.account)
+    if amt <= 0:
+        raise CommandError("No available balance to move.", level="warning")
+    d.account -= amt
+    d.savings += amt
+    d.emit("move_to_savings", amt, note)
+    d.say("success", f"Saved ${amt:,.2f}.")
+
+
+def op_spend(d: Draft, amt: float, note: str = ""):
+    amt = min(amt, d.account)
+    if amt <= 0:
+        raise CommandError("No available balance to spend.", level="warning")
+    d.account -= amt
+    d.emit("spend", amt, note)
+    d.say("success", f"Spent ${amt:,.2f}.")
+
+
+def op_back(d: Draft, amt: float, note: str = ""):
+    amt = min(amt, d.savings)
+    if amt <= 0:
+        raise CommandError("No savings available to move back.", level="warning")
+    d.account += amt
+    d.savings -= amt
+    d.emit("move_to_account", amt, note)
+    d.say("success", f"Moved back ${amt:,.2f} to account.")
+
+
+def schedule(d: Draft, kind: str, parts) -> bool:
+    """Turn ``add 20 every friday`` style statements into a recurring rule."""
+    freq, weekday, note = parse_recurrence(parts[2:])
+    if freq is None:
+        return False
+    rule = make_rule(kind, positive_amount(parts), freq, weekday, note)
+    d.new_rules.append(rule)
+    d.settings_changed = True
+    d.say("success", f"Scheduled: {describe_rule(rule)}")
+    return True
+
+
+# ---------- Registered commands ----------
+@command("add", "deposit", usage="add AMOUNT [every DAY|daily|weekly|monthly]")
+def _cmd_add(d: Draft, parts):
+    if not schedule(d, "add", parts):
+        op_add(d, positive_amount(parts))
+
+
+@command("save", "move", "mv", usage="save AMOUNT [note]")
+def _cmd_save(d: Draft, parts):
+    if not schedule(d, "save", parts):
+        op_save(d, positive_amount(parts), note_arg(parts))
+
+
+@command("spend", "pay", usage="spend AMOUNT [note] [every DAY|daily|weekly|monthly]")
+def _cmd_spend(d: Draft, parts):
+    if not schedule(d, "spend", parts):
+        op_spend(d, positive_amount(parts), note_arg(parts))
+
+
+@command("back", "return", "withdraw", usage="back AMOUNT [note]")
+def _cmd_back(d: Draft, parts):
+    op_back(d, positive_amount(parts), note_arg(parts))
+
+
+@command("goal", usage='goal AMOUNT ["NAME"]')
+def _cmd_goal(d: Draft, parts):
+    amt = amount_arg(parts)
+    if amt < 0:
+        raise CommandError("Goal amount can't be negative.")
+    name = note_arg(parts) or d.goal_name or "My Goal"
+    d.goal_amount = float(amt)
+    d.goal_name = name
+    d.goal_changed = True
+    d.say("success", f"Goal set: {name} — ${amt:,.2f}")
+    eta = describe_eta(goal_eta(d.savings, d.goal_amount, d.rate_state))
+    if eta:
+        d.say("info", eta)
+
+
+@command("autosave", usage="autosave PERCENT")
+def _cmd_autosave(d: Draft, parts):
+    pct = amount_arg(parts)
+    if pct < 0:
+        raise CommandError("Auto-save percent can't be negative.")
+    pct = max(0.0, min(pct, 100.0))
+    d.auto_save_percent = float(pct)
+    d.settings_changed = True
+    d.say("success", f"Auto-save set to {pct:.0f}% of each deposit.")
+
+
+DELETE_USAGE = "Usage:\n- delete money account AMOUNT\n- delete money savings AMOUNT\n- delete money all"
+
+
+@command("delete", "clear", "wipe", usage="delete money account|savings AMOUNT | delete money all",
+         match=lambda parts: len(parts) >= 2 and parts[1].lower() == "money")
+def _cmd_delete(d: Draft, parts):
+    target = parts[2].lower() if len(parts) >= 3 else ""
+    if target in ("account", "acc", "a"):
+        if len(parts) < 4:
+            raise CommandError("Usage: delete money account AMOUNT")
+        amt = min(positive_amount(parts, 3), d.account)
+        d.account -= amt
+        d.emit("delete_from_account", amt)
+        d.say("success", f"Deleted ${amt:,.2f} from Account balance.")
+    elif target in ("savings", "sav", "s"):
+        if len(parts) < 4:
+            raise CommandError("Usage: delete money savings AMOUNT")
+        amt = min(positive_amount(parts, 3), d.savings)
+        d.savings -= amt
+        d.emit("delete_from_savings", amt)
+        d.say("success", f"Deleted ${amt:,.2f} from Savings balance.")
+    elif target in ("all", "both"):
+        if d.account < 0 or d.savings < 0:
+            # Delete records only carry positive amounts; zeroing an overdrawn
+            # balance takes one signed adjustment.
+            d.recs.append(adjustment_txn(-d.account, -d.savings, note="delete money all"))
+        else:
+            d.emit("delete_from_account", d.account)
+            d.emit("delete_from_savings", d.savings)
+        d.account = 0.0
+        d.savings = 0.0
+        d.say("success", "Deleted all money from Account and Savings (history retained).")
+    else:
+        raise CommandError(DELETE_USAGE, level="info")
+
+
+@command("category", "cat", usage='category "NAME" KEYWORD [KEYWORD...]')
+def _cmd_category(d: Draft, parts):
+    if len(parts) < 3:
+        raise CommandError('Usage: category "NAME" KEYWORD [KEYWORD...]  (e.g., category "Food & Drink" boba "ice cream")')
+    want = parts[1].strip()
+    known = list(DEFAULT_CATEGORIES) + list(d.categories)
+    name = next((c for c in known if c.lower() == want.lower()), want)
+    keywords = [k.strip().lower() for k in parts[2:] if k.strip()]
+    current = list(d.categories.get(name, []))
+    current.extend(k for k in keywords if k not in current)
+    d.categories = {**d.categories, name: current}
+    d.settings_changed = True
+    d.say("success", f"Notes mentioning {', '.join(keywords)} now count as “{name}”.")
+
+
+@command("recurring", "repeats", usage="recurring | recurring stop NUMBER")
+def _cmd_recurring(d: Draft, parts):
+    rules = [r for r in d.recurring if r.get("id") not in d.dropped_rules]
+    if len(parts) == 1:
+        if not rules:
+            d.say("info", "No recurring transactions. Try: add 20 every friday")
+        else:
+            d.say("info", "\n".join(f"{i}. {describe_rule(r)}" for i, r in enumerate(rules, 1)))
+        return
+    if parts[1].lower() not in ("stop", "remove", "delete", "rm") or len(parts) < 3:
+        raise CommandError("Usage: recurring | recurring stop NUMBER", level="info")
+    try:
+        n = int(parts[2])
+        if n < 1:
+            raise IndexError(n)
+        rule = rules[n - 1]
+    except (ValueError, IndexError):
+        raise CommandError(f"No recurring transaction #{parts[2]} — type `recurring` to list them.")
+    d.dropped_rules.append(rule["id"])
+    d.settings_changed = True
+    d.say("success", f"Stopped: {describe_rule(rule)}")
@@ -0,0 +1,110 @@
+"""Cached, change-aware reads of the Budgeter data, shared by the page and the backend.
+
+Every part (balances, savings rate, goal, settings, theme, ledger) is
+re-read only when the store's ``change_token`` for it moves — a stat() of
+the JSON file, or SQLite's ``PRAGMA data_version`` — so a rerun that finds
+nothing new parses nothing. The ledger is read incrementally: only records
+appended since the last read are parsed, unless ``ledger_epoch`` says it
+was rewritten, truncated or wiped.
+
+``generation`` goes up whenever a change is seen, whichever process made
+it, so a Streamlit session can compare it with the value it last rendered.
+"""
+import threading
+
+from budgeter.store import store_key
+
+PARTS = ("balances", "rate", "goal", "settings", "theme", "ledger")
+_MISSING = object()
+
+
+class BudgetData:
+    def __init__(self, store):
+        self.store = store
+        self.generation = 0
+        self.lock = threading.RLock()
+        self._tokens = {}
+        self._values = {}
+        self._txns = []
+        self._end = 0
+        self._epoch = None
+
+    def _check(self, part: str):
+        """Current token for ``part``; drops its cached value if it moved."""
+        token = self.store.change_token(part)
+        with self.lock:
+            seen = self._tokens.get(part, _MISSING)
+            if seen is _MISSING:
+                self._tokens[part] = token
+            elif seen != token:
+                self._tokens[part] = token
+                self._values.pop(part, None)
+                self.generation += 1
+        return token
+
+    def _cached(self, part: str, loader):
+        token = self._check(part)
+        with self.lock:
+            value = self._values.get(part, _MISSING)
+        if value is not _MISSING:
+            return value
+        value = loader()
+        with self.lock:
+            # A write that landed while loading moves the token; cache under the old
+            # one and the next read will notice.
+            if self._tokens.get(part) == token:
+                self._values[part] = value
+        return value
+
+    def poll(self) -> int:
+        """Look for writes to any part (a handful of stat calls); returns ``generation``."""
+        for part in PARTS:
+            self._check(part)
+        return self.generation
+
+    def balances(self):
+        return self._cached("balances", self.store.load_balances)
+
+    def rate_state(self):
+        return self._cached("rate", self.store.load_rate_state)
+
+    def goal(self):
+        return self._cached("goal", self.store.load_goal)
+
+    def settings(self) -> dict:
+        return dict(self._cached("settings", self.store.load_settings))
+
+    def theme(self):
+        return self._cached("theme", self.store.load_theme)
+
+    def txns(self):
+        """The whole ledger; the returned list is shared, so treat it as read-only."""
+        token = self._check("ledger")
+        with self.lock:
+            if self._values.get("ledger", _MISSING) == token:
+                return self._txns
+            epoch = self.store.ledger_epoch()
+            if epoch != self._epoch or self.store.ledger_end() < self._end:
+                self._txns, self._end, self._epoch = [], 0, epoch
+            recs, self._end = self.store.read_txns_since(self._end)
+            self._txns.extend(recs)
+            if self._tokens.get("ledger") == token:
+                self._values["ledger"] = token
+            return self._txns
+
+    def recent_txns(self, n: int = 10):
+        return self.txns()[-n:]
+
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+
+def budget_data(store) -> BudgetData:
+    """Process-wide reader for the data behind ``store``."""
+    key = store_key(store)
+    with _instances_lock:
+        data = _instances.get(key)
+        if data is None:
+            data = _instances[key] = BudgetData(store)
+    return data
@@ -0,0 +1,97 @@
+"""Chunked export of the transaction history.
+
+Records are pulled from the store in fixed-size chunks and encoded chunk by
+chunk, so memory stays flat however long the history is. The bytes are
+written to a temporary file on disk; ``ExportFile.open()`` gives the plain
+binary reader ``st.download_button`` accepts, and the file is deleted when
+the export is closed or dropped.
+
+``st.download_button`` itself reads the reader into memory and keeps those
+bytes until the next rerun, so the page still holds one copy of the export
+for that long. The page therefore offers the button only on the run that
+prepared the export and deletes the file straight after.
+"""
+import csv
+import io
+import json
+import os
+import tempfile
+import weakref
+import zlib
+
+CHUNK_SIZE = 1000
+
+CSV_COLUMNS = ("ts", "type", "amount", "note")
+
+FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "jsonl.gz": ("application/gzip", "jsonl.gz"),
+}
+
+
+def csv_chunks(chunks):
+    """Encode record chunks as CSV bytes, header first."""
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(CSV_COLUMNS)
+    yield buf.getvalue().encode("utf-8")
+    for chunk in chunks:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows([r.get(c, "") for c in CSV_COLUMNS] for r in chunk)
+        yield buf.getvalue().encode("utf-8")
+
+
+def jsonl_gz_chunks(chunks):
+    """Encode record chunks as gzip-compressed JSON lines."""
+    comp = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 -> gzip container
+    for chunk in chunks:
+        data = comp.compress("".join(json.dumps(r) + "\n" for r in chunk).encode("utf-8"))
+        if data:
+            yield data
+    yield comp.flush()
+
+
+def export_chunks(store, fmt: str = "csv", since: str = None, until: str = None, types=None, chunk_size: int = CHUNK_SIZE):
+    """Generator of encoded byte chunks for the filtered history."""
+    chunks = store.iter_txns(since=since, until=until, types=types, chunk_size=chunk_size)
+    if fmt == "jsonl.gz":
+        return jsonl_gz_chunks(chunks)
+    return csv_chunks(chunks)
+
+
+def _unlink(path: str):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+class ExportFile:
+    """A finished export on disk; removed by ``close()`` or when garbage-collected."""
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        self._cleanup = weakref.finalize(self, _unlink, path)
+
+    def open(self):
+        return open(self.path, "rb")
+
+    def close(self):
+        self._cleanup()
+
+
+def spool_export(byte_chunks) -> ExportFile:
+    """Drain a chunk generator into a temporary file on disk."""
+    fd, path = tempfile.mkstemp(prefix="budgeter-export-")
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for data in byte_chunks:
+                out.write(data)
+                size += len(data)
+    except BaseException:
+        _unlink(path)
+        raise
+    return ExportFile(path, size)
@@ -0,0 +1,96 @@
+"""Projected savings-goal completion from an exponentially weighted savings rate.
+
+The rate state is three numbers: ``s``, the exponentially decayed sum of net
+money moved into savings, ``t``, the time it was last decayed to, and ``t0``,
+the first savings event. Each new ledger record updates it in O(1), so the
+estimate never needs a rescan of the history.
+"""
+import math
+from datetime import datetime, timedelta
+
+from budgeter.ledger import txn_deltas
+
+HALF_LIFE_DAYS = 30.0
+DAY = 86400.0
+LAMBDA = math.log(2) / HALF_LIFE_DAYS  # per day
+
+# Deletions and reconciliations change the balance but say nothing about habits.
+IGNORED_TYPES = ("delete_from_account", "delete_from_savings", "adjust")
+
+
+def _epoch(ts):
+    try:
+        return datetime.fromisoformat(ts).timestamp()
+    except Exception:
+        return None
+
+
+def update_rate(state, recs):
+    """Fold ``recs`` into the rate state (returns a new dict)."""
+    state = dict(state or {"s": 0.0, "t": None, "t0": None})
+    for rec in recs:
+        if not rec or rec.get("type") in IGNORED_TYPES:
+            continue
+        deltas = txn_deltas(rec)
+        if deltas is None or not deltas[1]:
+            continue
+        t = _epoch(rec.get("ts", ""))
+        if t is None:
+            continue
+        d_sav = deltas[1]
+        if state["t"] is None:
+            state["s"], state["t"] = d_sav, t
+        elif t >= state["t"]:
+            state["s"] = state["s"] * math.exp(-LAMBDA * (t - state["t"]) / DAY) + d_sav
+            state["t"] = t
+        else:
+            # Back-dated record (e.g. an imported statement): weight it by its age.
+            state["s"] += d_sav * math.exp(-LAMBDA * (state["t"] - t) / DAY)
+        state["t0"] = t if state["t0"] is None else min(state["t0"], t)
+    return state
+
+
+def rebuild_rate(txns):
+    """Rate state from a whole history; only needed after the ledger is rewritten."""
+    return update_rate(None, txns)
+
+
+def rate_per_day(state, now: datetime = None) -> float:
+    """Weighted net savings per day as of ``now``."""
+    if not state or state.get("t") is None:
+        return 0.0
+    now_ts = (now or datetime.now()).timestamp()
+    s = state["s"] * math.exp(-LAMBDA * max(now_ts - state["t"], 0.0) / DAY)
+    # Normalize by the kernel mass actually observed so a short history is not
+    # diluted by the empty time before it.
+    age_days = max((now_ts - state["t0"]) / DAY, 1.0)
+    weight = (1.0 - math.exp(-LAMBDA * age_days)) / LAMBDA
+    return s / weight
+
+
+def goal_eta(savings: float, goal_amount: float, state, now: datetime = None):
+    """{"rate_per_day", "days", "date"} for reaching the goal, or None if not projectable."""
+    if not goal_amount or goal_amount <= 0:
+        return None
+    now = now or datetime.now()
+    rate = rate_per_day(state, now)
+    remaining = goal_amount - savings
+    if remaining <= 0:
+        return {"rate_per_day": rate, "days": 0, "date": now.date()}
+    if rate <= 0.005:
+        return {"rate_per_day": rate, "days": None, "date": None}
+    days = remaining / rate
+    if days > 365 * 50:
+        return {"rate_per_day": rate, "days": None, "date": None}
+    return {"rate_per_day": rate, "days": days, "date": (now + timedelta(days=days)).date()}
+
+
+def describe_eta(eta) -> str:
+    if eta is None:
+        return ""
+    if eta["days"] == 0:
+        return "Goal reached!"
+    if eta["date"] is None:
+        return "No projected date yet — your savings haven't been growing recently."
+    weekly = eta["rate_per_day"] * 7
+    return f"At your recent pace (~${weekly:,.2f}/week) you'll reach it around {eta['date']:%b %d, %Y} ({eta['days']:.0f} days)."
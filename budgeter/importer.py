@@ -0,0 +1,205 @@
+"""Bulk import of bank-export CSV statements into the ledger.
+
+The file is streamed through ``csv`` in fixed-size chunks, each row is mapped
+to an "add" or "spend" record, rows already in the ledger are skipped by a
+(ts, amount, note) hash, and everything new is committed with one ledger
+append and one balance update.
+"""
+import csv
+import hashlib
+import io
+from dataclasses import dataclass
+from datetime import datetime
+from functools import lru_cache
+
+CHUNK_ROWS = 5000
+
+# Lower-cased header names we recognise for each field, best guess first.
+COLUMN_HINTS = {
+    "date": ("date", "transaction date", "posted date", "posting date", "booking date", "ts", "time", "timestamp"),
+    "amount": ("amount", "value", "transaction amount", "amt"),
+    "debit": ("debit", "withdrawal", "withdrawals", "money out", "paid out"),
+    "credit": ("credit", "deposit", "deposits", "money in", "paid in"),
+    "note": ("description", "memo", "note", "details", "payee", "merchant", "narrative", "name"),
+    "type": ("type", "transaction type"),
+}
+
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m/%d/%y", "%d/%m/%Y", "%Y/%m/%d", "%d.%m.%Y", "%b %d, %Y", "%d %b %Y")
+
+CREDIT_WORDS = {"add", "deposit", "credit", "cr", "in"}
+DEBIT_WORDS = {"spend", "debit", "dr", "withdrawal", "payment", "purchase", "out"}
+
+
+@dataclass
+class ImportSummary:
+    rows: int = 0
+    imported: int = 0
+    duplicates: int = 0
+    skipped: int = 0
+    added: float = 0.0
+    spent: float = 0.0
+
+
+def txn_key(ts: str, amount: float, note: str = "") -> str:
+    """Dedupe hash for a ledger record."""
+    raw = f"{ts}|{float(amount):.2f}|{(note or '').strip().lower()}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def guess_mapping(header):
+    """Map our field names to columns in ``header`` (None when absent)."""
+    lowered = {h.strip().lower(): h for h in header if h}
+    mapping = {}
+    for field, hints in COLUMN_HINTS.items():
+        mapping[field] = next((lowered[h] for h in hints if h in lowered), None)
+    return mapping
+
+
+# Statements repeat the same few hundred dates, so memoizing skips most of the
+# strptime fallbacks on large files.
+@lru_cache(maxsize=4096)
+def parse_date(raw: str):
+    raw = (raw or "").strip()
+    if not raw:
+        return None
+    try:
+        return datetime.fromisoformat(raw)
+    except ValueError:
+        pass
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(raw, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+def parse_amount(raw: str):
+    """Parse bank-style amounts such as "-12.50", "$1,200.00" or "(8.99)"."""
+    s = (raw or "").strip().replace(",", "").replace("$", "").replace("€", "").replace("£", "")
+    if not s:
+        return None
+    neg = s.startswith("(") and s.endswith(")")
+    s = s.strip("()")
+    if s.endswith("-"):
+        neg, s = True, s[:-1]
+    try:
+        val = float(s)
+    except ValueError:
+        return None
+    return -val if neg else val
+
+
+def row_to_txn(row, mapping):
+    """Ledger record for one CSV row, or None when it cannot be understood."""
+    dt = parse_date(row.get(mapping["date"]) if mapping.get("date") else "")
+    if dt is None:
+        return None
+
+    amount = None
+    if mapping.get("amount"):
+        amount = parse_amount(row.get(mapping["amount"]))
+    if amount is None and (mapping.get("debit") or mapping.get("credit")):
+        debit = parse_amount(row.get(mapping["debit"])) if mapping.get("debit") else None
+        credit = parse_amount(row.get(mapping["credit"])) if mapping.get("credit") else None
+        if debit:
+            amount = -abs(debit)
+        elif credit:
+            amount = abs(credit)
+    if not amount:
+        return None
+
+    kind = "add" if amount > 0 else "spend"
+    if mapping.get("type"):
+        word = (row.get(mapping["type"]) or "").strip().lower()
+        if word in CREDIT_WORDS:
+            kind = "add"
+        elif word in DEBIT_WORDS:
+            kind = "spend"
+
+    rec = {"ts": dt.isoformat(), "type": kind, "amount": round(abs(amount), 2), "source": "csv"}
+    note = (row.get(mapping["note"]) or "").strip() if mapping.get("note") else ""
+    if note:
+        rec["note"] = note
+    return rec
+
+
+def read_csv_chunks(stream, chunk_rows: int = CHUNK_ROWS):
+    """Yield lists of row dicts from a text stream, ``chunk_rows`` at a time."""
+    reader = csv.DictReader(stream)
+    chunk = []
+    for row in reader:
+        chunk.append(row)
+        if len(chunk) >= chunk_rows:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def text_stream(fileobj):
+    """Wrap an uploaded binary file for ``csv`` without reading it all into memory."""
+    if isinstance(fileobj, io.TextIOBase):
+        return fileobj
+    return io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline="")
+
+
+def read_header(fileobj):
+    """Column names of a binary CSV upload; rewinds the file afterwards."""
+    fileobj.seek(0)
+    first = fileobj.readline().decode("utf-8-sig", errors="replace")
+    fileobj.seek(0)
+    return next(csv.reader([first]), [])
+
+
+def import_csv(store, fileobj, mapping=None, account: float = 0.0, savings: float = 0.0,
+               progress=None, chunk_rows: int = CHUNK_ROWS, allow_overdraw: bool = False):
+    """Import a CSV statement into ``store``.
+
+    ``progress(rows_done, fraction)`` is called after every chunk. Returns the
+    ``ImportSummary`` and the new ``(account, savings)`` balances. A statement
+    whose net spending would leave the account negative is not written
+    (``store.OverdrawError``) unless ``allow_overdraw`` is set.
+    """
+    fileobj.seek(0, io.SEEK_END)
+    total_bytes = fileobj.tell() or 1
+    fileobj.seek(0)
+    mapping = mapping or guess_mapping(read_header(fileobj))
+
+    # Only rows already in the ledger count as duplicates: two identical rows
+    # in one statement (two coffees at the same minute) are both real.
+    seen = {txn_key(r.get("ts", ""), r.get("amount", 0.0), r.get("note", "")) for r in store.load_txns()}
+    summary = ImportSummary()
+    new_recs = []
+
+    stream = text_stream(fileobj)
+    for chunk in read_csv_chunks(stream, chunk_rows):
+        for row in chunk:
+            summary.rows += 1
+            rec = row_to_txn(row, mapping)
+            if rec is None:
+                summary.skipped += 1
+                continue
+            key = txn_key(rec["ts"], rec["amount"], rec.get("note", ""))
+            if key in seen:
+                summary.duplicates += 1
+                continue
+            new_recs.append(rec)
+            if rec["type"] == "add":
+                summary.added += rec["amount"]
+            else:
+                summary.spent += rec["amount"]
+        if progress:
+            try:
+                done = fileobj.tell() / total_bytes
+            except Exception:
+                done = 0.0
+            progress(summary.rows, min(done, 1.0))
+    if isinstance(stream, io.TextIOWrapper):
+        stream.detach()  # leave the caller's file open
+
+    summary.imported = len(new_recs)
+    if new_recs:
+        # Folded onto the stored balances under the store's lock.
+        account, savings = store.apply(new_recs, strict=not allow_overdraw)
+    return summary, (account, savings)
@@ -0,0 +1,207 @@
+"""Ledger records and replay: balances are derived from the transaction history.
+
+Every balance change is a ledger record, so the balances can be rebuilt by
+folding the records in order. Checkpoints store (offset, account, savings)
+so startup and verification only replay the records written since the last
+one.
+
+The history helpers the page and the benchmarks share (``load_txns``,
+``filter_txns``, ``totals_from_txns``, ``log_txn``, ``rewrite_txns`` and
+``undo_last_txn``) live here too and take the store explicitly, so none of
+them needs Streamlit.
+"""
+from datetime import datetime
+
+# Write a new checkpoint once this many records sit past the last one.
+CHECKPOINT_EVERY = 500
+
+# Tolerance for float noise when comparing replayed and stored balances.
+DRIFT_EPSILON = 0.005
+
+# type -> (account delta sign, savings delta sign) per unit of "amount"
+TXN_EFFECTS = {
+    "add": (1, 0),
+    "spend": (-1, 0),
+    "move_to_savings": (-1, 1),
+    "auto_move_to_savings": (-1, 1),
+    "move_to_account": (1, -1),
+    "delete_from_account": (-1, 0),
+    "delete_from_savings": (0, -1),
+}
+
+
+def make_txn(kind: str, amount: float, note: str = ""):
+    """Build a ledger record, or None for a non-positive amount (never logged)."""
+    if amount <= 0:
+        return None
+    rec = {"ts": datetime.now().isoformat(), "type": kind, "amount": float(amount)}
+    if note:
+        rec["note"] = str(note)
+    return rec
+
+
+def txn_deltas(rec):
+    """(account delta, savings delta) for a record, or None for an unknown type."""
+    kind = rec.get("type")
+    if kind == "adjust":
+        return float(rec.get("account_delta", 0.0)), float(rec.get("savings_delta", 0.0))
+    effect = TXN_EFFECTS.get(kind)
+    if effect is None:
+        return None
+    amt = float(rec.get("amount", 0.0))
+    return effect[0] * amt, effect[1] * amt
+
+
+def apply_txn(account: float, savings: float, rec, sign: int = 1):
+    """Balances after applying ``rec`` (or reverting it with ``sign=-1``)."""
+    deltas = txn_deltas(rec)
+    if deltas is None:
+        return account, savings
+    return account + sign * deltas[0], savings + sign * deltas[1]
+
+
+def reversal(rec):
+    """A copy of ``rec`` whose effect cancels it (same timestamp)."""
+    out = dict(rec)
+    if rec.get("type") == "adjust":
+        out["account_delta"] = -float(rec.get("account_delta", 0.0))
+        out["savings_delta"] = -float(rec.get("savings_delta", 0.0))
+    else:
+        out["amount"] = -float(rec.get("amount", 0.0))
+    return out
+
+
+def adjustment_txn(account_delta: float, savings_delta: float, note: str = ""):
+    """A record that moves the balances by arbitrary signed amounts."""
+    rec = {
+        "ts": datetime.now().isoformat(),
+        "type": "adjust",
+        "amount": round(abs(account_delta) + abs(savings_delta), 2),
+        "account_delta": round(account_delta, 2),
+        "savings_delta": round(savings_delta, 2),
+    }
+    if note:
+        rec["note"] = note
+    return rec
+
+
+def replay(store):
+    """Fold the ledger from the latest checkpoint.
+
+    Returns ``(account, savings, end_offset, replayed)`` where ``replayed`` is
+    the number of records read past the checkpoint.
+    """
+    cp = store.load_checkpoint()
+    if cp:
+        account, savings, offset = float(cp["account"]), float(cp["savings"]), cp["offset"]
+    else:
+        account, savings, offset = 0.0, 0.0, 0
+    recs, end = store.read_txns_since(offset)
+    for rec in recs:
+        account, savings = apply_txn(account, savings, rec)
+    return round(account, 2), round(savings, 2), end, len(recs)
+
+
+def bootstrap_balances(store):
+    """Balances for a new session, derived from the ledger.
+
+    The first time a store is seen without a checkpoint, any gap between the
+    stored balances and the ledger (older builds changed balances without
+    logging) is recorded as one "adjust" record, so existing users keep the
+    balances they had and the ledger stays the source of truth afterwards.
+    """
+    if store.load_checkpoint() is None:
+        # Locked, and re-checked inside, so two sessions opening the store at
+        # once post the reconciling record only once.
+        with store.lock:
+            account, savings, end, replayed = replay(store)
+            if store.load_checkpoint() is None:
+                stored_acc, stored_sav = store.load_balances()
+                d_acc, d_sav = stored_acc - account, stored_sav - savings
+                store.save_checkpoint(end, account, savings)
+                if abs(d_acc) > DRIFT_EPSILON or abs(d_sav) > DRIFT_EPSILON:
+                    store.commit(stored_acc, stored_sav, [adjustment_txn(d_acc, d_sav, note="reconcile balances with history")])
+                    account, savings, end, replayed = replay(store)
+        return account, savings
+
+    account, savings, end, replayed = replay(store)
+    if replayed >= CHECKPOINT_EVERY:
+        store.save_checkpoint(end, account, savings)
+    return account, savings
+
+
+def check_consistency(store):
+    """Compare the stored balances against a replay of the ledger."""
+    account, savings, end, replayed = replay(store)
+    stored_acc, stored_sav = store.load_balances()
+    d_acc = round(stored_acc - account, 2)
+    d_sav = round(stored_sav - savings, 2)
+    ok = abs(d_acc) <= DRIFT_EPSILON and abs(d_sav) <= DRIFT_EPSILON
+    if ok and replayed >= CHECKPOINT_EVERY:
+        store.save_checkpoint(end, account, savings)
+    return {
+        "ok": ok,
+        "ledger": (account, savings),
+        "stored": (stored_acc, stored_sav),
+        "drift": (d_acc, d_sav),
+        "replayed": replayed,
+    }
+
+
+# ---------- History helpers ----------
+TOTAL_LABELS = {
+    "add": "Added",
+    "spend": "Spent",
+    "move_to_savings": "Saved",
+    "auto_move_to_savings": "Saved",
+    "move_to_account": "Moved Back",
+}
+
+
+def load_txns(store):
+    return store.load_txns()
+
+
+def log_txn(store, kind: str, amount: float, note: str = ""):
+    rec = make_txn(kind, amount, note)
+    if rec:
+        store.append_txns([rec])
+    return rec
+
+
+def rewrite_txns(store, txns):
+    store.rewrite_txns(txns)
+
+
+def filter_txns(txns, since_dt=None):
+    """Records at or after ``since_dt``; records with an unreadable timestamp are dropped."""
+    out = []
+    parse = datetime.fromisoformat
+    for r in txns:
+        try:
+            dt = parse(r["ts"])
+        except Exception:
+            continue
+        if since_dt is None or dt >= since_dt:
+            out.append(r)
+    return out
+
+
+def totals_from_txns(txns):
+    totals = {"Added": 0.0, "Spent": 0.0, "Saved": 0.0, "Moved Back": 0.0}
+    labels = TOTAL_LABELS
+    for r in txns:
+        label = labels.get(r.get("type"))
+        if label is not None:
+            totals[label] += float(r.get("amount", 0.0))
+    return totals
+
+
+def undo_last_txn(store):
+    """Drop the newest record and revert its effect on the stored balances.
+
+    Returns ``(rec, (account, savings))``; ``rec`` is None when the ledger is
+    empty. Raises ValueError, leaving everything untouched, for a record type
+    that cannot be reverted.
+    """
+    return store.revert_last()
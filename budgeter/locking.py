@@ -0,0 +1,176 @@
+"""Cross-process locking and atomic writes for the Budgeter data files.
+
+Writers take one advisory lock per data directory; readers never lock,
+because every JSON document is replaced with an atomic rename and ledger
+lines are appended whole while the lock is held. Acquisition tries a
+non-blocking lock first (the common, uncontended case) and only then falls
+back to polling with a short backoff; both paths feed ``LOCK_STATS``.
+"""
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+LOCK_TIMEOUT = 10.0
+_BACKOFF_START = 0.001
+_BACKOFF_MAX = 0.05
+
+
+class LockStats:
+    """Process-wide counters for lock acquisitions and contention."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.acquired = 0
+        self.fast_path = 0
+        self.contended = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.total_held = 0.0
+
+    def record(self, wait: float, contended: bool):
+        with self._lock:
+            self.acquired += 1
+            if contended:
+                self.contended += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+            else:
+                self.fast_path += 1
+
+    def record_held(self, held: float):
+        with self._lock:
+            self.total_held += held
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "acquired": self.acquired,
+                "fast_path": self.fast_path,
+                "contended": self.contended,
+                "timeouts": self.timeouts,
+                "contention_rate": self.contended / self.acquired if self.acquired else 0.0,
+                "avg_wait_ms": self.total_wait / self.contended * 1000 if self.contended else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+                "avg_held_ms": self.total_held / self.acquired * 1000 if self.acquired else 0.0,
+            }
+
+
+LOCK_STATS = LockStats()
+
+
+def _try_lock(fd) -> bool:
+    try:
+        if fcntl:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fd):
+    if fcntl:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class FileLock:
+    """Exclusive inter-process lock on ``path``; re-entrant within a thread."""
+
+    def __init__(self, path: Path, timeout: float = LOCK_TIMEOUT, stats: LockStats = LOCK_STATS):
+        self.path = Path(path)
+        self.timeout = timeout
+        self.stats = stats
+        self._local = threading.local()
+
+    def acquire(self):
+        depth = getattr(self._local, "depth", 0)
+        if depth:
+            self._local.depth = depth + 1
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        start = time.perf_counter()
+        if _try_lock(fd):
+            self.stats.record(0.0, contended=False)
+        else:
+            delay = _BACKOFF_START
+            while not _try_lock(fd):
+                if time.perf_counter() - start > self.timeout:
+                    os.close(fd)
+                    self.stats.record_timeout()
+                    raise TimeoutError(f"Timed out waiting for {self.path}")
+                time.sleep(delay)
+                delay = min(delay * 2, _BACKOFF_MAX)
+            self.stats.record(time.perf_counter() - start, contended=True)
+        self._local.fd = fd
+        self._local.depth = 1
+        self._local.since = time.perf_counter()
+
+    def release(self):
+        self._local.depth -= 1
+        if self._local.depth:
+            return
+        self.stats.record_held(time.perf_counter() - self._local.since)
+        fd = self._local.fd
+        try:
+            _unlock(fd)
+        finally:
+            os.close(fd)
+            self._local.fd = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def atomic_write_text(path: Path, text: str):
+    """Write ``text`` to a temp file in the same directory and rename it over ``path``."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+@contextmanager
+def timed_section(stats: LockStats = LOCK_STATS):
+    """Record a lock taken by other means (e.g. SQLite's BEGIN IMMEDIATE)."""
+    start = time.perf_counter()
+    yield
+    wait = time.perf_counter() - start
+    stats.record(wait, contended=wait > 0.002)
@@ -0,0 +1,194 @@
+"""Recurring transactions ("add 20 every friday", "spend 9.99 monthly spotify").
+
+Rules live in the settings under "recurring". Each one remembers the date of
+its next occurrence; ``materialize_due`` runs on page load and on backend
+reads, emits every occurrence that has come due since (however many months
+were missed) and writes them with a single ledger append, then advances the
+rules in the same locked section so two readers never post an occurrence twice.
+"""
+import calendar
+import uuid
+from datetime import date, datetime, time, timedelta
+
+from budgeter.ledger import apply_txn
+
+WEEKDAYS = {}
+for _i, _name in enumerate(("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")):
+    WEEKDAYS[_name] = WEEKDAYS[_name[:3]] = _i
+
+FREQ_WORDS = {
+    "daily": "daily", "day": "daily",
+    "weekly": "weekly", "week": "weekly",
+    "biweekly": "biweekly", "fortnightly": "biweekly", "fortnight": "biweekly",
+    "monthly": "monthly", "month": "monthly",
+    "yearly": "yearly", "annually": "yearly", "year": "yearly",
+}
+
+RULE_KINDS = {"add": "add", "spend": "spend", "save": "move_to_savings"}
+
+# Posting time of day for materialized occurrences.
+POST_AT = time(9, 0)
+MAX_CATCH_UP = 5000  # per rule, guards against a corrupt "next" date
+
+
+def parse_recurrence(words):
+    """Split words after the amount into (freq, weekday, note); freq is None if absent."""
+    freq, weekday, note = None, None, []
+    i = 0
+    while i < len(words):
+        w = words[i].lower()
+        if w == "every" and i + 1 < len(words):
+            nxt = words[i + 1].lower().rstrip("s")
+            if nxt in WEEKDAYS:
+                freq, weekday = "weekly", WEEKDAYS[nxt]
+            elif nxt in FREQ_WORDS:
+                freq = FREQ_WORDS[nxt]
+            elif nxt in ("other", "2") and i + 2 < len(words) and words[i + 2].lower().startswith("week"):
+                freq = "biweekly"
+                i += 1
+            else:
+                note.append(words[i])
+                i += 1
+                continue
+            i += 2
+            continue
+        if w in FREQ_WORDS and w not in ("day", "week", "month", "year") and freq is None:
+            freq = FREQ_WORDS[w]
+        else:
+            note.append(words[i])
+        i += 1
+    return freq, weekday, " ".join(note)
+
+
+def make_rule(kind: str, amount: float, freq: str, weekday=None, note: str = "", today: date = None):
+    today = today or date.today()
+    rule = {
+        "id": uuid.uuid4().hex[:8],
+        "kind": kind,
+        "amount": round(float(amount), 2),
+        "freq": freq,
+        "note": note,
+        "day": today.day,
+        "weekday": weekday,
+        "created": today.isoformat(),
+    }
+    start = today
+    if weekday is not None:
+        start = today + timedelta(days=(weekday - today.weekday()) % 7)
+    rule["next"] = start.isoformat()
+    return rule
+
+
+def _add_months(d: date, months: int, day: int) -> date:
+    m = d.month - 1 + months
+    y, m = d.year + m // 12, m % 12 + 1
+    return date(y, m, min(day, calendar.monthrange(y, m)[1]))
+
+
+def advance(rule, d: date) -> date:
+    freq = rule["freq"]
+    if freq == "daily":
+        return d + timedelta(days=1)
+    if freq == "weekly":
+        return d + timedelta(days=7)
+    if freq == "biweekly":
+        return d + timedelta(days=14)
+    if freq == "yearly":
+        return _add_months(d, 12, rule.get("day") or d.day)
+    return _add_months(d, 1, rule.get("day") or d.day)
+
+
+def describe_rule(rule) -> str:
+    verb = {"add": "Add", "spend": "Spend", "save": "Save"}.get(rule["kind"], rule["kind"])
+    when = rule["freq"]
+    if rule["freq"] == "weekly" and rule.get("weekday") is not None:
+        when = f"every {calendar.day_name[rule['weekday']]}"
+    elif rule["freq"] == "monthly":
+        when = f"monthly on day {rule.get('day')}"
+    note = f" ({rule['note']})" if rule.get("note") else ""
+    return f"{verb} ${rule['amount']:,.2f} {when}{note} — next {rule['next']}"
+
+
+def due_records(rule, today: date, auto_save_percent: float = 0.0):
+    """Ledger records for every occurrence up to ``today``; returns (records, new next date)."""
+    recs = []
+    nxt = date.fromisoformat(rule["next"])
+    kind = RULE_KINDS.get(rule["kind"])
+    pct = max(0.0, min(float(auto_save_percent or 0.0), 100.0))
+    n = 0
+    while nxt <= today and n < MAX_CATCH_UP:
+        ts = datetime.combine(nxt, POST_AT).isoformat()
+        rec = {"ts": ts, "type": kind, "amount": rule["amount"], "recurring": rule["id"]}
+        if rule.get("note"):
+            rec["note"] = rule["note"]
+        recs.append(rec)
+        if kind == "add":
+            auto = round(rule["amount"] * pct / 100.0, 2)
+            if auto > 0:
+                recs.append({"ts": ts, "type": "auto_move_to_savings", "amount": auto, "recurring": rule["id"]})
+        nxt = advance(rule, nxt)
+        n += 1
+    return recs, nxt
+
+
+# Outflows are capped at what is there, the same as typing the command by hand.
+_LIMITED = ("spend", "move_to_savings", "auto_move_to_savings")
+
+
+def _clamp(balances, recs):
+    account, savings = balances
+    kept = []
+    for rec in recs:
+        if rec["type"] in _LIMITED:
+            rec["amount"] = round(min(rec["amount"], max(account, 0.0)), 2)
+            if rec["amount"] <= 0:
+                continue
+        account, savings = apply_txn(account, savings, rec)
+        kept.append(rec)
+    return kept
+
+
+def _rules(settings):
+    rules = settings.get("recurring", [])
+    return rules if isinstance(rules, list) else []
+
+
+def load_rules(store):
+    return _rules(store.load_settings())
+
+
+def edit_rules(settings, add=(), drop=()):
+    """Add rules to and drop rule ids from a settings dict in place; returns how many were dropped."""
+    rules = _rules(settings)
+    drop = set(drop)
+    kept = [r for r in rules if r.get("id") not in drop]
+    settings["recurring"] = kept + list(add)
+    return len(rules) - len(kept)
+
+
+def materialize_due(store, today: date = None):
+    """Post every due occurrence with one ledger append.
+
+    Returns ``(records, balances)``; ``balances`` is None when nothing was due.
+    """
+    today = today or date.today()
+    # Cheap unlocked check first: most page loads have nothing due.
+    if not any(date.fromisoformat(r["next"]) <= today for r in load_rules(store) if r.get("next")):
+        return [], None
+    with store.lock:
+        settings = store.load_settings()
+        rules = _rules(settings)
+        recs = []
+        for rule in rules:
+            if not rule.get("next"):
+                continue
+            rule_recs, nxt = due_records(rule, today, settings.get("auto_save_percent", 0.0))
+            recs.extend(rule_recs)
+            rule["next"] = nxt.isoformat()
+        if not recs:
+            return [], None
+        recs = _clamp(store.load_balances(), sorted(recs, key=lambda r: r["ts"]))
+        balances = store.apply(recs) if recs else store.load_balances()
+        settings["recurring"] = rules
+        store.save_settings(settings)
+    return recs, balances
@@ -0,0 +1,161 @@
+"""Running account/savings balances over time, downsampled for charting.
+
+The series is folded from the ledger once and then only extended with
+records appended since the last read. Charts get at most a fixed number of
+points per range, picked with Largest-Triangle-Three-Buckets so peaks and
+dips survive the downsampling.
+"""
+import threading
+from bisect import bisect_left
+from datetime import datetime
+
+from budgeter.ledger import txn_deltas
+from budgeter.store import store_key
+
+DEFAULT_POINTS = 400
+
+
+def lttb(xs, ys, threshold: int):
+    """Indices of ``threshold`` points chosen by Largest-Triangle-Three-Buckets."""
+    n = len(xs)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+    every = (n - 2) / (threshold - 2)
+    picked = [0]
+    a = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle corner.
+        nxt_start = int((i + 1) * every) + 1
+        nxt_end = min(int((i + 2) * every) + 1, n)
+        span = nxt_end - nxt_start
+        avg_x = sum(xs[nxt_start:nxt_end]) / span
+        avg_y = sum(ys[nxt_start:nxt_end]) / span
+
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        picked.append(best)
+        a = best
+    picked.append(n - 1)
+    return picked
+
+
+def _epoch(ts: str):
+    try:
+        return datetime.fromisoformat(ts).timestamp()
+    except Exception:
+        return None
+
+
+class BalanceSeries:
+    """Time-ordered running balances, extended incrementally from a store."""
+
+    def __init__(self):
+        self.times = []
+        self.account = []
+        self.savings = []
+        self.offset = 0
+        self.epoch = None  # store.ledger_epoch() the offset belongs to
+        self._pending = []  # (time, d_acc, d_sav) for every record, for rebuilds
+        self._windows = {}  # (since minute, points) -> downsampled columns
+        self.lock = threading.Lock()
+
+    def reset(self):
+        self.times, self.account, self.savings, self._pending = [], [], [], []
+        self._windows = {}
+        self.offset = 0
+
+    def _append(self, t, d_acc, d_sav):
+        acc = (self.account[-1] if self.account else 0.0) + d_acc
+        sav = (self.savings[-1] if self.savings else 0.0) + d_sav
+        self.times.append(t)
+        self.account.append(round(acc, 2))
+        self.savings.append(round(sav, 2))
+
+    def _rebuild(self):
+        self._pending.sort(key=lambda p: p[0])
+        self.times, self.account, self.savings = [], [], []
+        for t, d_acc, d_sav in self._pending:
+            self._append(t, d_acc, d_sav)
+
+    def refresh(self, store):
+        """Fold in records written since the last call; rebuild if the ledger was rewritten."""
+        with self.lock:
+            epoch = store.ledger_epoch()
+            if epoch != self.epoch or store.ledger_end() < self.offset:
+                self.reset()
+                self.epoch = epoch
+            recs, end = store.read_txns_since(self.offset)
+            out_of_order = False
+            for rec in recs:
+                deltas = txn_deltas(rec)
+                t = _epoch(rec.get("ts", ""))
+                if deltas is None or t is None:
+                    continue
+                self._pending.append((t, deltas[0], deltas[1]))
+                if self.times and t < self.times[-1]:
+                    out_of_order = True  # e.g. an imported statement from last year
+                elif not out_of_order:
+                    self._append(t, *deltas)
+            if out_of_order:
+                self._rebuild()
+            if recs:
+                self._windows = {}
+            self.offset = end
+        return self
+
+    def window(self, since_ts: float = None, points: int = DEFAULT_POINTS):
+        """Downsampled {"time", "Account", "Savings"} columns from ``since_ts`` onward.
+
+        Windows are memoized until new records arrive; ``since_ts`` is rounded to
+        the minute so a "last week" view rerun seconds later hits the cache.
+        """
+        key = (None if since_ts is None else int(since_ts // 60), points)
+        with self.lock:
+            cached = self._windows.get(key)
+            if cached is not None:
+                return cached
+            lo = bisect_left(self.times, key[0] * 60) if since_ts is not None else 0
+            xs = self.times[lo:]
+            acc = self.account[lo:]
+            sav = self.savings[lo:]
+        if not xs:
+            out = {"time": [], "Account": [], "Savings": []}
+        else:
+            half = max(points // 2, 3)
+            keep = sorted(set(lttb(xs, acc, half)) | set(lttb(xs, sav, half)))
+            out = {
+                "time": [datetime.fromtimestamp(xs[i]) for i in keep],
+                "Account": [acc[i] for i in keep],
+                "Savings": [sav[i] for i in keep],
+            }
+        with self.lock:
+            if len(self._windows) > 16:
+                self._windows.clear()
+            self._windows[key] = out
+        return out
+
+
+_series = {}
+_series_lock = threading.Lock()
+
+
+def balance_series(store) -> BalanceSeries:
+    """Process-wide series for ``store``, brought up to date with the ledger."""
+    key = store_key(store)
+    with _series_lock:
+        series = _series.get(key)
+        if series is None:
+            series = _series[key] = BalanceSeries()
+    return series.refresh(store)
+
+
+def invalidate_series(store):
+    """Drop the cached series, e.g. after the ledger is rewritten in place."""
+    with _series_lock:
+        _series.pop(store_key(store), None)
@@ -0,0 +1,758 @@
+"""Persistence backends for the Budgeter.
+
+Two interchangeable engines share one small API:
+
+* ``FileStore`` keeps the original layout (budgeter_state.json, budgeter_goal.json,
+  budgeter_settings.json, budgeter_theme.json and budgeter_transactions.jsonl).
+* ``SqliteStore`` keeps everything in one WAL-mode SQLite file and commits a
+  command's balance change together with its ledger rows in one transaction.
+
+FileStore writers hold an inter-process lock and replace JSON documents with
+atomic renames, so concurrent sessions neither lose updates nor see partial
+files; readers never take the lock. ``apply()`` folds new ledger records onto
+the *stored* balances inside the lock (SQLite: ``BEGIN IMMEDIATE``), which is
+what keeps two tabs adding money at once from overwriting each other.
+
+``change_token(part)`` is a cheap fingerprint of one part of the data (a
+stat() for files, ``PRAGMA data_version`` for SQLite) and ``ledger_epoch()``
+moves whenever the ledger changes other than by appending, which is what
+``budgeter.data`` uses to cache reads across processes.
+
+Pick one with the ``BUDGETER_BACKEND`` environment variable ("files" or
+"sqlite"); ``python -m budgeter.store migrate`` copies the JSON/JSONL files
+into the SQLite database once.
+"""
+import argparse
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+from pathlib import Path
+
+from budgeter.goal_eta import rebuild_rate, update_rate
+from budgeter.ledger import apply_txn, reversal, txn_deltas
+from budgeter.locking import FileLock, atomic_write_text, timed_section
+
+DATA_DIR = Path("pages")
+DB_FILE = DATA_DIR / "budgeter.sqlite3"
+BACKEND_ENV = "BUDGETER_BACKEND"
+
+_TXN_FIELDS = ("ts", "type", "amount", "note")
+
+
+def _txn_matches(rec, since, until, types) -> bool:
+    ts = str(rec.get("ts", ""))
+    if since and ts < since:
+        return False
+    if until and ts >= until:
+        return False
+    return types is None or rec.get("type") in types
+
+
+def _jsonl(recs) -> str:
+    return "".join(json.dumps(r) + "\n" for r in recs)
+
+
+class OverdrawError(ValueError):
+    """``apply(..., strict=True)`` would take a stored balance below zero."""
+
+    def __init__(self, account: float, savings: float):
+        super().__init__(f"Balances would become ${account:,.2f} / ${savings:,.2f}.")
+        self.account = account
+        self.savings = savings
+
+
+def _fold(account: float, savings: float, recs, strict: bool = False):
+    start = account, savings
+    for rec in recs:
+        account, savings = apply_txn(account, savings, rec)
+    account, savings = round(account, 2), round(savings, 2)
+    # A balance that is already negative may still move up; it may not drop further.
+    if strict and any(new < 0 and new < old for new, old in zip((account, savings), start)):
+        raise OverdrawError(account, savings)
+    return account, savings
+
+
+def store_key(store):
+    """Identity of the data behind a store, for process-wide caches."""
+    return (store.name, str(getattr(store, "path", None) or getattr(store, "root", "")))
+
+
+def _read_json(path: Path):
+    if path.exists():
+        try:
+            return json.loads(path.read_text())
+        except Exception:
+            pass
+    return None
+
+
+class FileStore:
+    """The original JSON/JSONL file layout."""
+
+    name = "files"
+
+    def __init__(self, root: Path = DATA_DIR):
+        self.root = Path(root)
+        self.data_file = self.root / "budgeter_state.json"
+        self.goal_file = self.root / "budgeter_goal.json"
+        self.settings_file = self.root / "budgeter_settings.json"
+        self.transactions_file = self.root / "budgeter_transactions.jsonl"
+        self.theme_file = self.root / "budgeter_theme.json"
+        self.checkpoint_file = self.root / "budgeter_checkpoint.json"
+        self.lock = FileLock(self.root / ".budgeter.lock")
+        self._parts = {
+            "balances": self.data_file, "rate": self.data_file, "goal": self.goal_file,
+            "settings": self.settings_file, "theme": self.theme_file, "ledger": self.transactions_file,
+        }
+
+    def _write(self, path: Path, obj):
+        text = json.dumps(obj, indent=2)
+        with self.lock:
+            atomic_write_text(path, text)
+
+    def _unlink(self, path: Path):
+        with self.lock:
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+
+    def change_token(self, part: str):
+        """(inode, mtime, size) of the file behind ``part``; None if it does not exist."""
+        path = self._parts[part]
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def ledger_epoch(self) -> int:
+        return int(self._load_state().get("ledger_epoch", 0))
+
+    # balances (budgeter_state.json also carries the savings-rate state and ledger epoch)
+    def _load_state(self) -> dict:
+        data = _read_json(self.data_file)
+        return data if isinstance(data, dict) else {}
+
+    def load_balances(self):
+        data = self._load_state()
+        try:
+            return float(data.get("account", 0.0)), float(data.get("savings", 0.0))
+        except Exception:
+            return 0.0, 0.0
+
+    def save_balances(self, account: float, savings: float):
+        with self.lock:
+            state = self._load_state()
+            state.update({"account": account, "savings": savings})
+            self._write(self.data_file, state)
+
+    def load_rate_state(self):
+        rate = self._load_state().get("savings_rate")
+        if rate is None and self.transactions_file.exists():
+            with self.lock:
+                state = self._load_state()
+                rate = state.get("savings_rate")
+                if rate is None:
+                    rate = state["savings_rate"] = rebuild_rate(self.load_txns())
+                    self._write(self.data_file, state)
+        return rate
+
+    def _next_rate(self, state: dict, recs):
+        if state.get("savings_rate") is None:
+            # First write since upgrading: seed from the whole (already appended) ledger.
+            return rebuild_rate(self.load_txns())
+        return update_rate(state["savings_rate"], recs)
+
+    # goal
+    def load_goal(self):
+        data = _read_json(self.goal_file)
+        if isinstance(data, dict):
+            try:
+                return str(data.get("goal_name", "My Goal")), float(data.get("goal_amount", 0.0))
+            except Exception:
+                pass
+        return "My Goal", 0.0
+
+    def save_goal(self, name: str, amount: float):
+        self._write(self.goal_file, {"goal_name": name, "goal_amount": amount})
+
+    def delete_goal(self):
+        self._unlink(self.goal_file)
+
+    # settings / theme
+    def load_settings(self) -> dict:
+        data = _read_json(self.settings_file)
+        return data if isinstance(data, dict) else {}
+
+    def save_settings(self, settings: dict):
+        self._write(self.settings_file, settings)
+
+    def load_theme(self):
+        data = _read_json(self.theme_file)
+        return data if isinstance(data, dict) else None
+
+    def save_theme(self, bg: str, text: str):
+        self._write(self.theme_file, {"bg": bg, "text": text})
+
+    # ledger
+    def load_txns(self):
+        txns = []
+        if self.transactions_file.exists():
+            for line in self.transactions_file.read_text().splitlines():
+                try:
+                    txns.append(json.loads(line))
+                except Exception:
+                    continue
+        return txns
+
+    def _append_text(self, payload: str):
+        # Callers hold the lock; one O_APPEND write keeps lines whole for lock-free readers.
+        self.transactions_file.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.transactions_file, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, payload.encode("utf-8"))
+        finally:
+            os.close(fd)
+
+    def append_txns(self, recs):
+        recs = [r for r in recs if r]
+        if not recs:
+            return
+        payload = _jsonl(recs)
+        with self.lock:
+            self._append_text(payload)
+            state = self._load_state()
+            state["savings_rate"] = self._next_rate(state, recs)
+            self._write(self.data_file, state)
+
+    def iter_txns(self, since: str = None, until: str = None, types=None, chunk_size: int = 1000):
+        """Yield lists of at most ``chunk_size`` records, streaming the JSONL file.
+
+        ``since``/``until`` are ISO timestamps (inclusive, exclusive) and ``types`` an
+        optional collection of record types.
+        """
+        if not self.transactions_file.exists():
+            return
+        types = set(types) if types else None
+        chunk = []
+        with self.transactions_file.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    rec = json.loads(line)
+                except Exception:
+                    continue
+                if not _txn_matches(rec, since, until, types):
+                    continue
+                chunk.append(rec)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+        if chunk:
+            yield chunk
+
+    def read_txns_since(self, offset: int = 0):
+        """Records after byte ``offset`` and the offset of the end of the ledger."""
+        if not self.transactions_file.exists():
+            return [], 0
+        txns = []
+        with self.transactions_file.open("rb") as f:
+            f.seek(offset)
+            data = f.read()
+        # Only count whole lines so a half-written append is picked up next time.
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                txns.append(json.loads(line))
+            except Exception:
+                continue
+        return txns, offset + end
+
+    def ledger_end(self) -> int:
+        """Offset just past the last record (the file size)."""
+        return self.transactions_file.stat().st_size if self.transactions_file.exists() else 0
+
+    def rewrite_txns(self, txns):
+        payload = _jsonl(txns)
+        with self.lock:
+            atomic_write_text(self.transactions_file, payload)
+            # Byte offsets into the old ledger no longer mean anything.
+            self.delete_checkpoint()
+            state = self._load_state()
+            state["savings_rate"] = rebuild_rate(txns)
+            state["ledger_epoch"] = int(state.get("ledger_epoch", 0)) + 1
+            self._write(self.data_file, state)
+
+    def _last_line(self, f):
+        """(start offset, record) of the last readable line, or (None, None)."""
+        end = f.seek(0, os.SEEK_END)
+        pos, buf = end, b""
+        while pos > 0:
+            step = min(8192, pos)
+            pos -= step
+            f.seek(pos)
+            buf = f.read(step) + buf
+            # Walk complete lines from the end; a line is complete once a newline precedes it.
+            while True:
+                body = buf.rstrip(b"\n")
+                nl = body.rfind(b"\n")
+                if nl < 0 and pos > 0:
+                    break
+                line = body[nl + 1:]
+                if not line:
+                    return None, None
+                try:
+                    return pos + nl + 1, json.loads(line)
+                except Exception:
+                    buf = body[:nl + 1]  # unreadable line: skip it, as load_txns does
+                    if nl < 0:
+                        return None, None
+        return None, None
+
+    def revert_last(self):
+        """Remove the newest record and revert it on the stored balances.
+
+        The file is truncated at the start of the last line instead of being
+        rewritten, so undo costs the same at any ledger size.
+        """
+        with self.lock:
+            state = self._load_state()
+            balances = float(state.get("account", 0.0)), float(state.get("savings", 0.0))
+            try:
+                f = self.transactions_file.open("r+b")
+            except FileNotFoundError:
+                return None, balances
+            with f:
+                start, rec = self._last_line(f)
+                if rec is None:
+                    return None, balances
+                if txn_deltas(rec) is None:
+                    raise ValueError(f"Cannot undo a {rec.get('type')!r} record.")
+                f.truncate(start)
+            cp = _read_json(self.checkpoint_file)
+            if isinstance(cp, dict) and cp.get("offset", 0) > start:
+                self.delete_checkpoint()
+            account, savings = apply_txn(*balances, rec, sign=-1)
+            account, savings = round(account, 2), round(savings, 2)
+            state.update({"account": account, "savings": savings})
+            if state.get("savings_rate") is not None:
+                state["savings_rate"] = update_rate(state["savings_rate"], [reversal(rec)])
+            state["ledger_epoch"] = int(state.get("ledger_epoch", 0)) + 1
+            self._write(self.data_file, state)
+        return rec, (account, savings)
+
+    # checkpoints
+    def load_checkpoint(self):
+        data = _read_json(self.checkpoint_file)
+        if isinstance(data, dict) and "offset" in data:
+            size = self.transactions_file.stat().st_size if self.transactions_file.exists() else 0
+            if data["offset"] <= size:
+                return data
+        return None
+
+    def save_checkpoint(self, offset: int, account: float, savings: float):
+        self._write(self.checkpoint_file, {"offset": offset, "account": account, "savings": savings, "ts": datetime.now().isoformat()})
+
+    def delete_checkpoint(self):
+        self._unlink(self.checkpoint_file)
+
+    def commit(self, account: float, savings: float, recs=()):
+        """Append ``recs`` and store the given balances under one lock."""
+        recs = [r for r in recs if r]
+        payload = _jsonl(recs)
+        with self.lock:
+            if recs:
+                self._append_text(payload)
+            state = self._load_state()
+            state.update({"account": account, "savings": savings})
+            if recs:
+                state["savings_rate"] = self._next_rate(state, recs)
+            self._write(self.data_file, state)
+
+    def apply(self, recs, strict: bool = False, goal=None, edit_settings=None):
+        """Append ``recs`` and fold them onto the stored balances; returns the new balances.
+
+        With ``strict`` nothing is written if a balance would go negative
+        (``OverdrawError``). ``goal`` (name, amount) and ``edit_settings``
+        (called with the stored settings dict to change in place) are written
+        under the same lock.
+        """
+        recs = [r for r in recs if r]
+        payload = _jsonl(recs)
+        with self.lock:
+            state = self._load_state()
+            account, savings = _fold(float(state.get("account", 0.0)), float(state.get("savings", 0.0)), recs, strict)
+            if recs:
+                self._append_text(payload)
+                state["savings_rate"] = self._next_rate(state, recs)
+            state.update({"account": account, "savings": savings})
+            self._write(self.data_file, state)
+            if goal is not None:
+                self.save_goal(*goal)
+            if edit_settings is not None:
+                settings = self.load_settings()
+                edit_settings(settings)
+                self.save_settings(settings)
+        return account, savings
+
+    def wipe(self, include_theme: bool = False):
+        files = [self.data_file, self.goal_file, self.settings_file, self.transactions_file, self.checkpoint_file]
+        if include_theme:
+            files.append(self.theme_file)
+        with self.lock:
+            epoch = self.ledger_epoch()
+            for f in files:
+                self._unlink(f)
+            # Keep the epoch moving so cached readers notice the ledger was wiped.
+            self._write(self.data_file, {"ledger_epoch": epoch + 1})
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS ledger (
+    id     INTEGER PRIMARY KEY AUTOINCREMENT,
+    ts     TEXT NOT NULL,
+    type   TEXT NOT NULL,
+    amount REAL NOT NULL,
+    note   TEXT,
+    extra  TEXT
+);
+CREATE INDEX IF NOT EXISTS ledger_ts ON ledger(ts);
+CREATE INDEX IF NOT EXISTS ledger_type ON ledger(type);
+CREATE TABLE IF NOT EXISTS checkpoints (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    offset  INTEGER NOT NULL,
+    account REAL NOT NULL,
+    savings REAL NOT NULL,
+    ts      TEXT NOT NULL
+);
+"""
+
+
+def _row_to_txn(row):
+    ts, kind, amount, note, extra = row
+    rec = json.loads(extra) if extra else {}
+    rec.update({"ts": ts, "type": kind, "amount": amount})
+    if note:
+        rec["note"] = note
+    return rec
+
+
+def _txn_to_row(rec):
+    extra = {k: v for k, v in rec.items() if k not in _TXN_FIELDS}
+    return (
+        str(rec.get("ts", "")),
+        str(rec.get("type", "")),
+        float(rec.get("amount", 0.0)),
+        rec.get("note") or None,
+        json.dumps(extra) if extra else None,
+    )
+
+
+class SqliteStore:
+    """Single-file SQLite engine; balances, settings and ledger share one transaction."""
+
+    name = "sqlite"
+
+    def __init__(self, path: Path = DB_FILE):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Single operations are atomic on their own; this lock is for callers that
+        # need several of them to happen as one step (e.g. recurring transactions).
+        self.lock = FileLock(self.path.with_name(self.path.name + ".lock"))
+        self._watch = None
+        self._watch_lock = threading.Lock()
+        with self._connect() as con:
+            con.execute("PRAGMA journal_mode=WAL")
+            con.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self, immediate: bool = False):
+        # One short-lived connection per operation keeps this safe to use from
+        # Streamlit's script threads; WAL lets readers run alongside a writer.
+        con = sqlite3.connect(self.path, timeout=10)
+        try:
+            con.execute("PRAGMA synchronous=NORMAL")
+            with con:
+                if immediate:
+                    # Take the write lock before reading so read-modify-write is atomic.
+                    with timed_section():
+                        con.execute("BEGIN IMMEDIATE")
+                yield con
+        finally:
+            con.close()
+
+    def change_token(self, part: str = None):
+        """``PRAGMA data_version`` of a long-lived connection: it moves whenever
+        any other connection commits, so one token covers every part."""
+        with self._watch_lock:
+            if self._watch is None:
+                self._watch = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+            return self._watch.execute("PRAGMA data_version").fetchone()[0]
+
+    def ledger_epoch(self) -> int:
+        return int(self._load("ledger_epoch") or 0)
+
+    def _bump_epoch(self, con):
+        self._put(con, "ledger_epoch", int(self._get(con, "ledger_epoch") or 0) + 1)
+
+    def _get(self, con, key: str):
+        row = con.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        try:
+            return json.loads(row[0])
+        except Exception:
+            return None
+
+    def _put(self, con, key: str, value):
+        con.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def _load(self, key: str):
+        with self._connect() as con:
+            return self._get(con, key)
+
+    def _save(self, key: str, value):
+        with self._connect() as con:
+            self._put(con, key, value)
+
+    # balances
+    def load_balances(self):
+        data = self._load("balances")
+        if isinstance(data, dict):
+            return float(data.get("account", 0.0)), float(data.get("savings", 0.0))
+        return 0.0, 0.0
+
+    def save_balances(self, account: float, savings: float):
+        self._save("balances", {"account": account, "savings": savings})
+
+    # goal
+    def load_goal(self):
+        data = self._load("goal")
+        if isinstance(data, dict):
+            return str(data.get("goal_name", "My Goal")), float(data.get("goal_amount", 0.0))
+        return "My Goal", 0.0
+
+    def save_goal(self, name: str, amount: float):
+        self._save("goal", {"goal_name": name, "goal_amount": amount})
+
+    def delete_goal(self):
+        with self._connect() as con:
+            con.execute("DELETE FROM meta WHERE key = 'goal'")
+
+    # settings / theme
+    def load_settings(self) -> dict:
+        data = self._load("settings")
+        return data if isinstance(data, dict) else {}
+
+    def save_settings(self, settings: dict):
+        self._save("settings", settings)
+
+    def load_theme(self):
+        data = self._load("theme")
+        return data if isinstance(data, dict) else None
+
+    def save_theme(self, bg: str, text: str):
+        self._save("theme", {"bg": bg, "text": text})
+
+    # ledger
+    def load_txns(self):
+        with self._connect() as con:
+            rows = con.execute("SELECT ts, type, amount, note, extra FROM ledger ORDER BY id").fetchall()
+        return [_row_to_txn(r) for r in rows]
+
+    def load_rate_state(self):
+        with self._connect() as con:
+            rate = self._get(con, "savings_rate")
+            if rate is None and con.execute("SELECT 1 FROM ledger LIMIT 1").fetchone():
+                rate = rebuild_rate(self._all_txns(con))
+                self._put(con, "savings_rate", rate)
+        return rate
+
+    def _all_txns(self, con):
+        return [_row_to_txn(r) for r in con.execute("SELECT ts, type, amount, note, extra FROM ledger ORDER BY id")]
+
+    def _insert(self, con, recs):
+        recs = [r for r in recs if r]
+        if not recs:
+            return
+        con.executemany(
+            "INSERT INTO ledger (ts, type, amount, note, extra) VALUES (?, ?, ?, ?, ?)",
+            [_txn_to_row(r) for r in recs],
+        )
+        # The savings rate moves with the ledger, inside the same transaction.
+        rate = self._get(con, "savings_rate")
+        rate = rebuild_rate(self._all_txns(con)) if rate is None else update_rate(rate, recs)
+        self._put(con, "savings_rate", rate)
+
+    def append_txns(self, recs):
+        with self._connect() as con:
+            self._insert(con, recs)
+
+    def iter_txns(self, since: str = None, until: str = None, types=None, chunk_size: int = 1000):
+        """Yield lists of at most ``chunk_size`` records using the ts/type indexes."""
+        where, args = [], []
+        if since:
+            where.append("ts >= ?"); args.append(since)
+        if until:
+            where.append("ts < ?"); args.append(until)
+        if types:
+            types = list(types)
+            where.append(f"type IN ({', '.join('?' * len(types))})"); args.extend(types)
+        sql = "SELECT ts, type, amount, note, extra FROM ledger"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id"
+        with self._connect() as con:
+            cur = con.execute(sql, args)
+            while True:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield [_row_to_txn(r) for r in rows]
+
+    def read_txns_since(self, offset: int = 0):
+        """Records with a row id above ``offset`` and the highest id seen."""
+        with self._connect() as con:
+            rows = con.execute("SELECT id, ts, type, amount, note, extra FROM ledger WHERE id > ? ORDER BY id", (offset,)).fetchall()
+        if not rows:
+            return [], offset
+        return [_row_to_txn(r[1:]) for r in rows], rows[-1][0]
+
+    def ledger_end(self) -> int:
+        """Highest ledger row id."""
+        with self._connect() as con:
+            return con.execute("SELECT COALESCE(MAX(id), 0) FROM ledger").fetchone()[0]
+
+    def rewrite_txns(self, txns):
+        with self._connect() as con:
+            con.execute("DELETE FROM ledger")
+            con.execute("DELETE FROM checkpoints")
+            con.execute("DELETE FROM meta WHERE key = 'savings_rate'")
+            self._insert(con, txns)
+            self._bump_epoch(con)
+
+    def revert_last(self):
+        """Delete the newest record and revert it on the stored balances in one transaction."""
+        with self._connect(immediate=True) as con:
+            data = self._get(con, "balances") or {}
+            balances = float(data.get("account", 0.0)), float(data.get("savings", 0.0))
+            row = con.execute("SELECT id, ts, type, amount, note, extra FROM ledger ORDER BY id DESC LIMIT 1").fetchone()
+            if row is None:
+                return None, balances
+            rec = _row_to_txn(row[1:])
+            if txn_deltas(rec) is None:
+                raise ValueError(f"Cannot undo a {rec.get('type')!r} record.")
+            con.execute("DELETE FROM ledger WHERE id = ?", (row[0],))
+            # Checkpoints at or past the removed row include its effect.
+            con.execute("DELETE FROM checkpoints WHERE offset >= ?", (row[0],))
+            account, savings = apply_txn(*balances, rec, sign=-1)
+            account, savings = round(account, 2), round(savings, 2)
+            self._put(con, "balances", {"account": account, "savings": savings})
+            rate = self._get(con, "savings_rate")
+            if rate is not None:
+                self._put(con, "savings_rate", update_rate(rate, [reversal(rec)]))
+            self._bump_epoch(con)
+        return rec, (account, savings)
+
+    # checkpoints
+    def load_checkpoint(self):
+        with self._connect() as con:
+            row = con.execute("SELECT offset, account, savings, ts FROM checkpoints ORDER BY id DESC LIMIT 1").fetchone()
+        if row is None:
+            return None
+        return {"offset": row[0], "account": row[1], "savings": row[2], "ts": row[3]}
+
+    def save_checkpoint(self, offset: int, account: float, savings: float):
+        with self._connect() as con:
+            con.execute(
+                "INSERT INTO checkpoints (offset, account, savings, ts) VALUES (?, ?, ?, ?)",
+                (offset, account, savings, datetime.now().isoformat()),
+            )
+
+    def delete_checkpoint(self):
+        with self._connect() as con:
+            con.execute("DELETE FROM checkpoints")
+
+    def commit(self, account: float, savings: float, recs=()):
+        """Store the new balances and append ``recs`` atomically."""
+        with self._connect(immediate=True) as con:
+            self._insert(con, recs)
+            self._put(con, "balances", {"account": account, "savings": savings})
+
+    def apply(self, recs, strict: bool = False, goal=None, edit_settings=None):
+        """Append ``recs`` and fold them onto the stored balances in one transaction
+        (the goal and settings too, when given)."""
+        recs = [r for r in recs if r]
+        # Settings are also rewritten by materialize_due under ``self.lock``
+        # (outside any transaction), so a settings edit has to take it too.
+        with (self.lock if edit_settings is not None else nullcontext()), self._connect(immediate=True) as con:
+            data = self._get(con, "balances") or {}
+            account, savings = _fold(float(data.get("account", 0.0)), float(data.get("savings", 0.0)), recs, strict)
+            self._insert(con, recs)
+            self._put(con, "balances", {"account": account, "savings": savings})
+            if goal is not None:
+                self._put(con, "goal", {"goal_name": goal[0], "goal_amount": goal[1]})
+            if edit_settings is not None:
+                settings = self._get(con, "settings")
+                settings = settings if isinstance(settings, dict) else {}
+                edit_settings(settings)
+                self._put(con, "settings", settings)
+        return account, savings
+
+    def wipe(self, include_theme: bool = False):
+        with self._connect() as con:
+            con.execute("DELETE FROM ledger")
+            con.execute("DELETE FROM checkpoints")
+            keys = ["balances", "savings_rate", "goal", "settings"] + (["theme"] if include_theme else [])
+            con.executemany("DELETE FROM meta WHERE key = ?", [(k,) for k in keys])
+            self._bump_epoch(con)
+
+
+def open_store(backend: str = None):
+    """Return the configured store; defaults to the JSON/JSONL files."""
+    backend = (backend or os.getenv(BACKEND_ENV) or "files").strip().lower()
+    if backend == "sqlite":
+        return SqliteStore()
+    return FileStore()
+
+
+def migrate(src, dst, force: bool = False) -> int:
+    """Copy everything from ``src`` into ``dst`` in one pass; returns the ledger size."""
+    if dst.load_txns() and not force:
+        raise RuntimeError("Destination already has transactions; pass force=True to overwrite.")
+    txns = src.load_txns()
+    dst.rewrite_txns(txns)
+    dst.save_balances(*src.load_balances())
+    gname, gamount = src.load_goal()
+    if gamount or gname != "My Goal":
+        dst.save_goal(gname, gamount)
+    dst.save_settings(src.load_settings())
+    theme = src.load_theme()
+    if theme:
+        dst.save_theme(theme.get("bg"), theme.get("text"))
+    return len(txns)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Budgeter storage tools")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    mig = sub.add_parser("migrate", help="copy the JSON/JSONL files into the SQLite database")
+    mig.add_argument("--data-dir", default=str(DATA_DIR))
+    mig.add_argument("--db", default=str(DB_FILE))
+    mig.add_argument("--force", action="store_true", help="replace an existing SQLite ledger")
+    args = parser.parse_args(argv)
+
+    if args.cmd == "migrate":
+        n = migrate(FileStore(Path(args.data_dir)), SqliteStore(Path(args.db)), force=args.force)
+        print(f"Migrated {n} transactions into {args.db}. Set {BACKEND_ENV}=sqlite to use it.")
+
+
+if __name__ == "__main__":
+    main()
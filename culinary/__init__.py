@@ -0,0 +1 @@
+"""Shared, Streamlit-free helpers for the Culinary Quest page."""
@@ -0,0 +1,426 @@
+"""Recipe catalog: the built-in recipes plus every JSON recipe pack on disk.
+
+Packs are the five fixed files in ``SOURCE_FILES`` and ``recipes/*.json``,
+plus the saved AI recipes in ``LIBRARY_FILE`` (see ``culinary.library``),
+which win over any pack on a name clash.
+Big community packs can instead be compiled with ``python -m culinary.ingest``
+into ``PREBUILT_FILE``, which is read in one go and turned into Recipe
+objects only as they are looked up (see ``PrebuiltRecipes``).
+``RecipeCatalog`` keeps each source parsed in memory together with its
+(mtime, size) and re-parses a file only when that changes; the merged
+name -> Recipe dict is rebuilt only when some source did, so lookups are
+plain dict hits. Files are re-checked at most every ``CHECK_INTERVAL``
+seconds, which keeps the several catalog calls of one rerun free even with
+thousands of packs.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from culinary.ingredients import INGREDIENTS
+
+SOURCE_FILES = (
+    Path("recipes.json"),
+    Path("data/recipes.json"),
+    Path("assets/recipes.json"),
+    Path("original_recipes.json"),
+    Path("originals.json"),
+)
+RECIPE_DIR = Path("recipes")
+LIBRARY_FILE = Path("data/ai_recipes.jsonl")
+PREBUILT_FILE = Path("data/recipes.prebuilt.json")
+PREBUILT_FORMAT = ("culinary-prebuilt", 1)
+CHECK_INTERVAL = 1.0
+
+
+class RecipeMeta(NamedTuple):
+    """What the orderings need, available without building a prebuilt Recipe."""
+    name: str
+    time_min: int
+    n_steps: int
+
+
+# Orderings offered by the home grid, over RecipeMeta; names break ties so pages are stable.
+SORT_KEYS = {
+    "Name": lambda m: (m.name.lower(), m.name),
+    "Quickest": lambda m: (m.time_min, m.name.lower()),
+    "Fewest steps": lambda m: (m.n_steps, m.name.lower()),
+    "Most steps": lambda m: (-m.n_steps, m.name.lower()),
+}
+
+
+@dataclass
+class Recipe:
+    name: str
+    steps: List[str]
+    time_min: int
+    # Filled in for prebuilt recipes so nothing has to re-derive them.
+    ingredients: Optional[tuple] = field(default=None, repr=False, compare=False)
+    kinds: Optional[tuple] = field(default=None, repr=False, compare=False)
+
+
+BUILTIN: Dict[str, Recipe] = {
+    "Sandwich": Recipe("Sandwich", [
+        "Lay out two slices of bread.",
+        "Add fillings (cheese/meat/veg).",
+        "Add sauce or spread.",
+        "Close and press gently.",
+        "Cut and serve.",
+    ], 6),
+    "Oatmeal": Recipe("Oatmeal", [
+        "Bring milk or water to a simmer.",
+        "Stir in oats.",
+        "Cook 3–5 minutes, stirring occasionally.",
+        "Sweeten and add toppings.",
+        "Serve warm.",
+    ], 7),
+    "Omelete": Recipe("Omelete", [
+        "Whisk eggs with a pinch of salt.",
+        "Pour into a buttered pan on medium-low.",
+        "When almost set, add fillings.",
+        "Fold over and cook 30–60 sec.",
+        "Slide onto a plate and serve.",
+    ], 8),
+    "Grilled Cheese Sandwich": Recipe("Grilled Cheese Sandwich", [
+        "Butter the outside of two bread slices.",
+        "Place cheese between the unbuttered sides.",
+        "Heat pan on medium and add sandwich.",
+        "Cook 2–3 min each side until golden and melty.",
+        "Rest 1 minute, slice diagonally, serve.",
+    ], 8),
+    "Fruit Salad": Recipe("Fruit Salad", [
+        "Rinse and dry all fruit.",
+        "Chop fruit into bite-size pieces.",
+        "Add a squeeze of lemon and a teaspoon of honey.",
+        "Gently toss to coat evenly.",
+        "Chill 5 minutes and serve.",
+    ], 10),
+    "Cheese Quesadilla": Recipe("Cheese Quesadilla", [
+        "Place tortilla in a pan over medium heat.",
+        "Sprinkle cheese evenly over tortilla.",
+        "Fold tortilla in half.",
+        "Cook 2–3 min per side until cheese melts.",
+        "Cut into wedges and serve.",
+    ], 7),
+    "Pasta Marinara": Recipe("Pasta Marinara", [
+        "Boil salted water and cook pasta al dente.",
+        "Warm marinara in a pan; add a splash of pasta water.",
+        "Drain pasta and toss with sauce.",
+        "Finish with olive oil and basil.",
+        "Plate and sprinkle with parmesan.",
+    ], 18),
+}
+
+
+def normalize(key, v) -> Optional[Recipe]:
+    """A Recipe from one pack entry, or None if it isn't usable."""
+    try:
+        name = v.get("name", key)
+        steps = [str(s) for s in v.get("steps", [])]
+        if not steps:
+            return None
+        time_min = int(v.get("time_min", max(5, len(steps) * 2)))
+        return Recipe(name, steps, time_min)
+    except Exception:
+        return None
+
+
+def _from_obj(obj: Dict[str, Any]) -> Dict[str, Recipe]:
+    out: Dict[str, Recipe] = {}
+    for k, v in obj.items():
+        r = normalize(k, v)
+        if r is not None:
+            out[r.name] = r
+    return out
+
+
+def load_jsonl_recipes(path: Path) -> Dict[str, Recipe]:
+    """One recipe object per line; bad lines are skipped and later lines win."""
+    out: Dict[str, Recipe] = {}
+    with open(path, encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            try:
+                v = json.loads(line)
+            except ValueError:
+                continue
+            r = normalize(f"Recipe {i+1}", v) if isinstance(v, dict) else None
+            if r is not None:
+                out[r.name] = r
+    return out
+
+
+def load_user_recipes_file(path: Path) -> Dict[str, Recipe]:
+    try:
+        if not path.exists() or not path.is_file():
+            return {}
+        if path.suffix.lower() == ".jsonl":
+            return load_jsonl_recipes(path)
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if isinstance(data, dict):
+            return _from_obj(data)
+        if isinstance(data, list):
+            obj = {r.get("name", f"Recipe {i+1}"): r for i, r in enumerate(data) if isinstance(r, dict)}
+            return _from_obj(obj)
+    except Exception:
+        pass
+    return {}
+
+
+class PrebuiltRecipes(Mapping):
+    """name -> Recipe over a prebuilt catalog; Recipes are built on first access.
+
+    Records are ``[name id, time_min, [step ids], [kind ids], [ingredient ids]]``
+    into the file's string, kind and ingredient tables, so repeated step text
+    is stored once. Precomputed ingredients are dropped if the file was built
+    against a different vocabulary. Whole-catalog passes (sorting, indexing)
+    use ``meta``, ``stamp`` and ``peek``, which leave the Recipe cache alone.
+    """
+
+    def __init__(self, data: Dict[str, Any]):
+        self._strings = data["strings"]
+        self._records = data["recipes"]
+        self._kinds = data.get("kinds", [])
+        vocab = data.get("ingredients", [])
+        self._vocab = vocab if tuple(vocab) == INGREDIENTS else None
+        self._index = {sys.intern(self._strings[rec[0]]): i for i, rec in enumerate(self._records)}
+        self._made: Dict[str, Recipe] = {}
+        self._stamp = object()
+
+    def peek(self, name: str) -> Recipe:
+        """The Recipe for ``name``, built without caching it."""
+        r = self._made.get(name)
+        if r is not None:
+            return r
+        name_id, time_min, step_ids, kind_ids, ing_ids = self._records[self._index[name]]
+        strings = self._strings
+        return Recipe(
+            strings[name_id],
+            [strings[i] for i in step_ids],
+            time_min,
+            ingredients=tuple(self._vocab[i] for i in ing_ids) if self._vocab is not None else None,
+            kinds=tuple(self._kinds[i] for i in kind_ids) if kind_ids else None,
+        )
+
+    def meta(self, name: str) -> RecipeMeta:
+        rec = self._records[self._index[name]]
+        return RecipeMeta(self._strings[rec[0]], rec[1], len(rec[2]))
+
+    def stamp(self, name: str):
+        """Identity of ``name``'s recipe: records only change with the whole file."""
+        if name not in self._index:
+            raise KeyError(name)
+        return self._stamp
+
+    def __getitem__(self, name: str) -> Recipe:
+        r = self._made.get(name)
+        if r is None:
+            r = self._made[name] = self.peek(name)
+        return r
+
+    def __contains__(self, name) -> bool:
+        return name in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+
+def peek_recipe(recipes: Mapping, name: str) -> Recipe:
+    """``recipes[name]``, without caching it if ``recipes`` builds Recipes lazily."""
+    peek = getattr(recipes, "peek", None)
+    return peek(name) if peek is not None else recipes[name]
+
+
+def recipe_meta(recipes: Mapping, name: str) -> RecipeMeta:
+    meta = getattr(recipes, "meta", None)
+    if meta is not None:
+        return meta(name)
+    r = recipes[name]
+    return RecipeMeta(r.name, r.time_min, len(r.steps))
+
+
+def recipe_stamp(recipes: Mapping, name: str):
+    """Object that stays the same (``is``) for as long as ``name``'s recipe does."""
+    stamp = getattr(recipes, "stamp", None)
+    return stamp(name) if stamp is not None else recipes[name]
+
+
+def load_prebuilt(path: Path) -> Mapping:
+    try:
+        data = json.loads(Path(path).read_bytes())
+        if (data.get("format"), data.get("version")) == PREBUILT_FORMAT:
+            return PrebuiltRecipes(data)
+    except Exception:
+        pass
+    return {}
+
+
+class RecipeLayers(Mapping):
+    """Read-only merge of a few mappings; later layers win, order is first-seen."""
+
+    def __init__(self, layers):
+        self.layers = [layer for layer in layers if layer]
+        self._names = frozenset().union(*self.layers)
+
+    def _layer(self, name: str):
+        for layer in reversed(self.layers):
+            if name in layer:
+                return layer
+        raise KeyError(name)
+
+    def __getitem__(self, name: str) -> Recipe:
+        return self._layer(name)[name]
+
+    def peek(self, name: str) -> Recipe:
+        return peek_recipe(self._layer(name), name)
+
+    def meta(self, name: str) -> RecipeMeta:
+        return recipe_meta(self._layer(name), name)
+
+    def stamp(self, name: str):
+        return recipe_stamp(self._layer(name), name)
+
+    def __contains__(self, name) -> bool:
+        return name in self._names
+
+    def __iter__(self):
+        seen = set()
+        for layer in self.layers:
+            for name in layer:
+                if name not in seen:
+                    seen.add(name)
+                    yield name
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+
+def _token(path: Path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class RecipeCatalog:
+    """Process-wide, incrementally refreshed view of every recipe source."""
+
+    def __init__(self, files=SOURCE_FILES, directory: Path = RECIPE_DIR,
+                 check_interval: float = CHECK_INTERVAL, prebuilt: Path = PREBUILT_FILE,
+                 library: Path = LIBRARY_FILE):
+        self.files = tuple(Path(p) for p in files)
+        self.library = Path(library) if library else None
+        self.directory = Path(directory)
+        self.prebuilt = Path(prebuilt)
+        self.check_interval = check_interval
+        self.version = 0
+        self.lock = threading.Lock()
+        self._parsed = {}        # path -> (token, {name: Recipe})
+        self._prebuilt = (None, {})
+        self._dir_token = None
+        self._dir_files = ()
+        self._recipes = dict(BUILTIN)
+        self._names = frozenset(self._recipes)
+        self._orders = {}        # sort name -> tuple of recipe names, for this version
+        self._checked = None
+
+    def _sources(self):
+        token = _token(self.directory)
+        if token != self._dir_token:
+            # Adding or removing a pack changes the directory's mtime; edits in
+            # place are caught by the per-file tokens below.
+            self._dir_token = token
+            self._dir_files = tuple(sorted(self.directory.glob("*.json"))) if token else ()
+        # The AI library goes last so a saved recipe is never hidden by a pack
+        # that later adds the same name.
+        return self.files + self._dir_files + ((self.library,) if self.library else ())
+
+    def refresh(self, force: bool = False):
+        """Re-parse changed sources; a no-op within ``check_interval`` of the last check."""
+        now = time.monotonic()
+        with self.lock:
+            if not force and self._checked is not None and now - self._checked < self.check_interval:
+                return self
+            self._checked = now
+            sources = self._sources()
+            changed = set(self._parsed) - set(sources)
+            for path in changed:
+                del self._parsed[path]
+            for path in sources:
+                token = _token(path)
+                seen = self._parsed.get(path)
+                if seen is not None and seen[0] == token:
+                    continue
+                self._parsed[path] = (token, load_user_recipes_file(path) if token else {})
+                changed.add(path)
+            token = _token(self.prebuilt)
+            if token != self._prebuilt[0]:
+                self._prebuilt = (token, load_prebuilt(self.prebuilt) if token else {})
+                changed.add(self.prebuilt)
+            if changed:
+                recipes = dict(BUILTIN)
+                # Later sources win on a name clash, in the same order as always.
+                for path in sources:
+                    recipes.update(self._parsed[path][1])
+                if self._prebuilt[1]:
+                    # The prebuilt catalog ranks above the built-ins and below the packs.
+                    files = {n: r for n, r in recipes.items() if BUILTIN.get(n) is not r}
+                    recipes = RecipeLayers([BUILTIN, self._prebuilt[1], files])
+                self._recipes = recipes
+                self._names = frozenset(recipes)
+                self._orders = {}
+                self.version += 1
+        return self
+
+    def recipes(self) -> Mapping:
+        """name -> Recipe for everything on disk; shared, so treat it as read-only."""
+        return self.refresh()._recipes
+
+    def get(self, name: str, default=None):
+        return self.refresh()._recipes.get(name, default)
+
+    def names(self) -> frozenset:
+        return self.refresh()._names
+
+    def ordered(self, sort: str = "Name"):
+        """Recipe names in ``SORT_KEYS[sort]`` order; sorted once per catalog version."""
+        self.refresh()
+        with self.lock:
+            recipes, orders = self._recipes, self._orders
+        order = orders.get(sort)
+        if order is None:
+            order = orders[sort] = tuple(sorted(recipes, key=self.sort_key(sort, recipes)))
+        return order
+
+    def sort_key(self, sort: str, recipes: Mapping = None):
+        """name -> ``SORT_KEYS[sort]`` key, read from prebuilt records without building Recipes."""
+        recipes = self.recipes() if recipes is None else recipes
+        key = SORT_KEYS[sort]
+        return lambda name: key(recipe_meta(recipes, name))
+
+    def __contains__(self, name) -> bool:
+        return name in self.refresh()._recipes
+
+    def __len__(self) -> int:
+        return len(self.refresh()._recipes)
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog() -> RecipeCatalog:
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = RecipeCatalog()
+    return _catalog
@@ -0,0 +1,65 @@
+"""In-memory cache of Pocket Chef answers, keyed by normalized ingredient set.
+
+Keys come from ``normalize.request_key``, so order and spelling don't
+matter. A request that misses exactly can still reuse an answer whose
+ingredients it covers through stand-ins ("bread, mozzarella" gets the
+cached "bread, cheese" recipe): each side has to cover the other, and the
+unrecognised items have to be identical. Coverage is the precomputed
+substitution table, so a lookup is a scan of int masks.
+"""
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from culinary.ingredients import INGREDIENT_ID
+from culinary.substitutes import covers, substitutions
+
+DEFAULT_SIZE = 256
+
+
+def split_key(key) -> Tuple[int, Tuple[str, ...]]:
+    """(vocabulary mask, unrecognised items) of a request key."""
+    mask, other = 0, []
+    for name in key:
+        i = INGREDIENT_ID.get(name)
+        if i is None:
+            other.append(name)
+        else:
+            mask |= 1 << i
+    return mask, tuple(other)
+
+
+class ChefCache:
+    def __init__(self, size: int = DEFAULT_SIZE):
+        self.size = size
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()   # key -> (recipe, mask, unrecognised)
+
+    def get(self, key) -> Optional[Tuple[str, List[Tuple[str, str]]]]:
+        """(recipe, [(needed, used instead)]) for ``key``, or None."""
+        with self.lock:
+            hit = self.entries.get(key)
+            if hit is not None:
+                self.entries.move_to_end(key)
+                return hit[0], []
+            mask, other = split_key(key)
+            best = None
+            for k, (recipe, m, o) in self.entries.items():
+                if o != other or not covers(mask, m) or not covers(m, mask):
+                    continue
+                n_subs = (m & ~mask).bit_count()
+                if best is None or n_subs < best[0]:
+                    best = (n_subs, k, recipe, m)
+            if best is None:
+                return None
+            _, k, recipe, m = best
+            self.entries.move_to_end(k)
+        return recipe, substitutions(m & ~mask, mask)
+
+    def put(self, key, recipe: str):
+        mask, other = split_key(key)
+        with self.lock:
+            self.entries[key] = (recipe, mask, other)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
@@ -0,0 +1,230 @@
+"""Compile recipe packs into the prebuilt catalog Culinary Quest loads at startup.
+
+    python -m culinary.ingest big_pack.json more.jsonl          # -> data/recipes.prebuilt.json
+    python -m culinary.ingest packs/*.json -o /tmp/cat.json --workers 4
+
+Packs are read as a stream: a JSON array or object is decoded one entry at
+a time and JSONL one line at a time, so a multi-gigabyte pack never sits in
+memory as a whole. Entries are validated and normalized in a process pool,
+the same way the page treats pack files (later packs win on a name clash).
+The output keeps every distinct string once and stores step kinds and
+ingredient ids, so the page has nothing left to derive.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from culinary.catalog import PREBUILT_FILE, PREBUILT_FORMAT, normalize
+from culinary.ingredients import INGREDIENT_ID, INGREDIENTS, recipe_ingredients
+from culinary.scenes import STEP_KINDS, kind_from_text
+
+CHUNK_CHARS = 1 << 20
+BATCH = 2000
+IN_FLIGHT_PER_WORKER = 2  # batches submitted but not yet collected, per worker
+KINDS = [k for k, _ in STEP_KINDS] + ["prep"]
+_KIND_ID = {k: i for i, k in enumerate(KINDS)}
+
+_decoder = json.JSONDecoder()
+
+
+class _Reader:
+    """Incremental JSON decoding over a text file, one value at a time."""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _more(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(CHUNK_CHARS)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it ("" at the end)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos].isspace():
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._more():
+                return ""
+
+    def take(self, ch: str):
+        if self.peek() != ch:
+            raise ValueError(f"expected {ch!r} at offset {self.pos}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._more():
+                    continue
+                raise
+            # A number that ends the buffer may continue in the next chunk.
+            if end == len(self.buf) and not self.eof and self._more():
+                continue
+            self.pos = end
+            return obj
+
+
+def iter_pack(path: Path):
+    """(key, entry) for every entry of a JSON array/object pack or a JSONL file."""
+    with open(path, encoding="utf-8") as f:
+        if path.suffix.lower() == ".jsonl":
+            for i, line in enumerate(f):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    obj = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(obj, dict):
+                    yield obj.get("name", f"Recipe {i+1}"), obj
+            return
+        r = _Reader(f)
+        first = r.peek()
+        if first == "[":
+            r.take("[")
+            i = 0
+            while r.peek() not in ("]", ""):
+                obj = r.value()
+                if isinstance(obj, dict):
+                    yield obj.get("name", f"Recipe {i+1}"), obj
+                i += 1
+                if r.peek() == ",":
+                    r.take(",")
+        elif first == "{":
+            r.take("{")
+            while r.peek() not in ("}", ""):
+                key = r.value()
+                r.take(":")
+                yield key, r.value()
+                if r.peek() == ",":
+                    r.take(",")
+
+
+def compile_batch(entries):
+    """Worker side: [(key, entry)] -> [(name, steps, time_min, kind ids, ingredient ids)]."""
+    out = []
+    for key, entry in entries:
+        r = normalize(key, entry)
+        if r is None or not isinstance(r.name, str):
+            continue
+        kinds = [_KIND_ID[kind_from_text(s)] for s in r.steps]
+        ings = sorted(INGREDIENT_ID[i] for i in recipe_ingredients(r))
+        out.append((r.name, r.steps, r.time_min, kinds, ings))
+    return out
+
+
+def _batches(paths, stats):
+    batch = []
+    for path in paths:
+        for entry in iter_pack(path):
+            stats["read"] += 1
+            batch.append(entry)
+            if len(batch) >= BATCH:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def build(paths, out: Path, workers: int = None):
+    """Ingest ``paths`` in order into ``out``; returns counts."""
+    stats = {"read": 0, "kept": 0, "replaced": 0}
+    recipes = {}
+    strings, string_ids = [], {}
+
+    def sid(s: str) -> int:
+        i = string_ids.get(s)
+        if i is None:
+            i = string_ids[s] = len(strings)
+            strings.append(s)
+        return i
+
+    def collect(results):
+        for name, steps, time_min, kinds, ings in results:
+            if name in recipes:
+                stats["replaced"] += 1
+            recipes[name] = [sid(name), time_min, [sid(s) for s in steps], kinds, ings]
+
+    batches = _batches([Path(p) for p in paths], stats)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 1:
+        for b in batches:
+            collect(compile_batch(b))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # A bounded window of batches in flight keeps reading in step with the
+            # workers (pool.map would queue the whole pack). Results are collected
+            # in submission order, so name clashes resolve like the page does.
+            pending = deque()
+            for b in batches:
+                pending.append(pool.submit(compile_batch, b))
+                if len(pending) >= IN_FLIGHT_PER_WORKER * workers:
+                    collect(pending.popleft().result())
+            while pending:
+                collect(pending.popleft().result())
+
+    stats["kept"] = len(recipes)
+    fmt, version = PREBUILT_FORMAT
+    doc = {
+        "format": fmt,
+        "version": version,
+        "kinds": KINDS,
+        "ingredients": list(INGREDIENTS),
+        "strings": strings,
+        "recipes": list(recipes.values()),
+    }
+    out = Path(out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    tmp = out.with_name(out.name + ".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(doc, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp, out)
+    return stats
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("packs", nargs="+", type=Path, help="JSON or JSONL recipe packs, lowest priority first")
+    ap.add_argument("-o", "--out", type=Path, default=PREBUILT_FILE)
+    ap.add_argument("--workers", type=int, default=None,
+                    help="worker processes (default: one per CPU; 0 or 1 = no pool)")
+    args = ap.parse_args(argv)
+
+    missing = [p for p in args.packs if not p.is_file()]
+    if missing:
+        ap.error("no such file: " + ", ".join(map(str, missing)))
+    t0 = time.perf_counter()
+    try:
+        stats = build(args.packs, args.out, args.workers)
+    except ValueError as e:  # includes json.JSONDecodeError
+        print(f"ingest failed: {e}", file=sys.stderr)
+        return 1
+    print(f"{stats['read']:,} entries read, {stats['kept']:,} recipes written to {args.out} "
+          f"({stats['replaced']:,} replaced by later packs) in {time.perf_counter() - t0:.1f}s",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+"""Ingredient vocabulary and extraction of ingredients from recipe text.
+
+Recipe packs only carry a name and steps, so ingredients are derived by
+matching the step text against a vocabulary of canonical (singular) names
+and a few aliases ("spaghetti" is pasta). Matching is greedy longest-first
+over word n-grams, so "peanut butter" wins over "butter" and "olive oil"
+over "oil".
+"""
+import re
+from functools import lru_cache
+
+INGREDIENTS = (
+    "almond", "apple", "avocado", "bacon", "banana", "basil", "bean", "beef", "bell pepper", "berry",
+    "blueberry", "bread", "broccoli", "brown sugar", "butter", "carrot", "cereal", "cheese", "chicken",
+    "chili", "chocolate", "cilantro", "cinnamon", "corn", "cream", "cream cheese", "cucumber", "cumin",
+    "egg", "flour", "fruit", "garlic", "granola", "ham", "herb", "honey", "jam", "ketchup", "lemon",
+    "lentil", "lettuce", "lime", "marinara", "mayonnaise", "milk", "mozzarella", "mushroom", "mustard",
+    "noodle", "nut", "oat", "oil", "olive oil", "onion", "orange", "oregano", "paprika", "parmesan",
+    "parsley", "pasta", "pea", "peanut butter", "pepper", "pork", "potato", "ramen", "rice", "salmon",
+    "salsa", "salt", "sausage", "shrimp", "soy sauce", "spinach", "strawberry", "sugar", "tofu",
+    "tomato", "tomato sauce", "tortilla", "tuna", "turkey", "vanilla", "vinegar", "water", "yogurt",
+)
+INGREDIENT_SET = frozenset(INGREDIENTS)
+INGREDIENT_ID = {name: i for i, name in enumerate(INGREDIENTS)}
+# Singular alias -> canonical name, for words people (and packs) use instead.
+ALIASES = {
+    "cheddar": "cheese", "swiss": "cheese", "feta": "cheese", "mozz": "mozzarella",
+    "parm": "parmesan", "parmigiano": "parmesan",
+    "spaghetti": "pasta", "penne": "pasta", "macaroni": "pasta", "fusilli": "pasta", "linguine": "pasta",
+    "scallion": "onion", "shallot": "onion",
+    "mayo": "mayonnaise", "evoo": "olive oil", "oatmeal": "oat", "yoghurt": "yogurt",
+    "capsicum": "bell pepper", "prawn": "shrimp", "chickpea": "bean", "garbanzo": "bean",
+    "coriander": "cilantro", "catsup": "ketchup", "jelly": "jam",
+    "chilli": "chili", "chile": "chili", "tomatoe": "tomato", "potatoe": "potato",
+    "parmesan cheese": "parmesan", "mozzarella cheese": "mozzarella", "cheddar cheese": "cheese",
+    "feta cheese": "cheese", "swiss cheese": "cheese",
+}
+PHRASES = {**{name: name for name in INGREDIENTS}, **ALIASES}
+MAX_WORDS = max(len(p.split()) for p in PHRASES)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+@lru_cache(maxsize=8192)
+def singular(word: str) -> str:
+    """Cheap English plural folding: berries -> berry, tomatoes -> tomato, oats -> oat."""
+    if len(word) <= 3 or word.endswith(("ss", "us", "is")):
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("oes") or word.endswith(("ches", "shes", "xes", "sses")):
+        return word[:-2]
+    if word.endswith("s"):
+        return word[:-1]
+    return word
+
+
+def tokens(text: str):
+    """Lower-cased words of ``text`` as typed."""
+    return _WORD.findall(text.lower())
+
+
+def words(text: str):
+    """Lower-cased, singular words of ``text``."""
+    return [singular(w) for w in _WORD.findall(text.lower())]
+
+
+def extract_ingredients(text: str):
+    """Canonical ingredients mentioned in ``text``, in order of first mention."""
+    ws = words(text)
+    found = []
+    i = 0
+    while i < len(ws):
+        for n in range(min(MAX_WORDS, len(ws) - i), 0, -1):
+            phrase = PHRASES.get(" ".join(ws[i:i + n]))
+            if phrase is not None:
+                if phrase not in found:
+                    found.append(phrase)
+                i += n
+                break
+        else:
+            i += 1
+    return found
+
+
+def recipe_ingredients(recipe):
+    """Ingredients derived from a recipe's name and steps (precomputed for prebuilt ones)."""
+    pre = getattr(recipe, "ingredients", None)
+    if pre is not None:
+        return list(pre)
+    return extract_ingredients(" ".join([recipe.name, *recipe.steps]))
@@ -0,0 +1,137 @@
+"""Saved AI recipes, reused instead of asking Pocket Chef again.
+
+Every recipe the backend returns is appended to ``LIBRARY_FILE`` (JSONL)
+with the normalized ingredient set it was made from. The library indexes
+the lines by a hash of that set, so a later request with the same
+ingredients, in any order or spelling, finds it without a model call.
+Failing that, a saved set the request covers through stand-ins is used.
+The catalog reads the same file, so saved recipes show up on the home
+screen and in search like any pack.
+
+The file is only ever appended to (one ``write`` per line), so other
+sessions and processes see new recipes on their next refresh, which reads
+just the new bytes.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+from pathlib import Path
+
+from culinary.catalog import LIBRARY_FILE, Recipe, normalize
+from culinary.chef_cache import split_key
+from culinary.substitutes import covers, substitutions
+
+
+def ingredient_hash(key) -> str:
+    """Stable id of a normalized ingredient set (``normalize.request_key``)."""
+    return hashlib.sha256("\x1f".join(sorted(key)).encode("utf-8")).hexdigest()[:16]
+
+
+class AIRecipeLibrary:
+    def __init__(self, path: Path = LIBRARY_FILE):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._ino = None
+        self._offset = 0
+        self.by_hash = {}      # hash -> [Recipe, ...], oldest first
+        self.sets = {}         # hash -> (vocabulary mask, unrecognised items)
+        self.names = set()
+
+    def refresh(self):
+        """Index lines appended since the last call (all of them if the file was replaced)."""
+        with self.lock:
+            try:
+                st = os.stat(self.path)
+            except OSError:
+                self._reset()
+                return self
+            if st.st_ino != self._ino or st.st_size < self._offset:
+                self._reset()
+                self._ino = st.st_ino
+            if st.st_size == self._offset:
+                return self
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                data = f.read()
+            end = data.rfind(b"\n") + 1   # a line still being written waits for next time
+            for line in data[:end].splitlines():
+                self._index_line(line)
+            self._offset += end
+        return self
+
+    def _index_line(self, line: bytes):
+        try:
+            obj = json.loads(line)
+        except ValueError:
+            return
+        if not isinstance(obj, dict):
+            return
+        r = normalize(None, obj)
+        key = obj.get("ingredients")
+        if r is None or not isinstance(key, list):
+            return
+        h = obj.get("hash") or ingredient_hash(key)
+        self.by_hash.setdefault(h, []).append(r)
+        self.sets.setdefault(h, split_key(key))
+        self.names.add(r.name)
+
+    def find(self, key, steps=None):
+        """Newest saved recipe made from exactly ``key`` (and with ``steps``, if given)."""
+        self.refresh()
+        with self.lock:
+            for r in reversed(self.by_hash.get(ingredient_hash(key), ())):
+                if steps is None or r.steps == list(steps):
+                    return r
+        return None
+
+    def find_similar(self, key):
+        """(recipe, [(needed, used instead)]) for a saved set ``key`` covers via stand-ins, or None."""
+        mask, other = split_key(key)
+        self.refresh()
+        with self.lock:
+            best = None
+            for h, (m, o) in self.sets.items():
+                if o != other or not covers(mask, m) or not covers(m, mask):
+                    continue
+                n_subs = (m & ~mask).bit_count()
+                if best is None or n_subs < best[0]:
+                    best = (n_subs, h, m)
+            if best is None:
+                return None
+            _, h, m = best
+            recipe = self.by_hash[h][-1]
+        return recipe, substitutions(m & ~mask, mask)
+
+    def add(self, name: str, steps, time_min: int, key) -> Recipe:
+        """Save a recipe made from ``key``; returns the stored Recipe."""
+        steps = [str(s) for s in steps]
+        line = json.dumps({
+            "name": name,
+            "steps": steps,
+            "time_min": int(time_min),
+            "ingredients": list(key),
+            "hash": ingredient_hash(key),
+            "created": datetime.now().isoformat(timespec="seconds"),
+        }, ensure_ascii=False) + "\n"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line)
+        self.refresh()
+        return Recipe(name, steps, int(time_min))
+
+
+_library = None
+_library_lock = threading.Lock()
+
+
+def get_library() -> AIRecipeLibrary:
+    global _library
+    with _library_lock:
+        if _library is None:
+            _library = AIRecipeLibrary()
+    return _library
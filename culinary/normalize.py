@@ -0,0 +1,166 @@
+"""Turn typed pantry items into canonical ingredients.
+
+"Tomatoes", "tomato", "2 tomatoes" and "tomatoe" all resolve to ``tomato``.
+An item is first split at commas and "and"/"&"/"or"/"with" ("ham and
+cheese" is two), then each part is cleaned (quantities, units and filler
+dropped, plurals folded) and resolved as a whole:
+
+1. the cleaned words name one vocabulary entry or alias exactly
+   ("parmesan cheese" is parmesan);
+2. a single word the vocabulary doesn't know is looked up in a
+   character-trigram index over the vocabulary and aliases, which catches
+   typos ("brocoli", "chese"); a candidate one edit away also counts for
+   longer words ("avacado");
+3. anything else keeps its cleaned text, modifiers included, so "coconut
+   milk", "sweet potato" and "cottage cheese" stay themselves instead of
+   collapsing into milk, potato and cheese.
+
+Canonical names are only used to compare items (dedup, pantry matching, the
+backend's pocket-chef cache key); what is shown and sent to the model is the
+user's own text. Lookups are memoized per typed string.
+"""
+import re
+from functools import lru_cache
+from typing import List, Tuple
+
+from culinary.ingredients import INGREDIENT_SET, PHRASES, singular
+
+FUZZY_MIN_LEN = 4
+FUZZY_THRESHOLD = 0.7  # Dice similarity of padded trigrams
+EDIT_MIN_LEN = 6       # words this long also match anything one edit away
+
+FILLER = frozenset("""
+    a an and of some fresh frozen chopped diced sliced minced grated large small medium big little
+    cup cups tbsp tsp tablespoon tablespoons teaspoon teaspoons g kg gram grams oz ounce ounces lb lbs
+    pound pounds ml l liter litre pinch can cans jar slice slices clove cloves handful pack packs
+    bunch piece pieces stick sticks dozen bag box bottle
+    ripe raw whole organic boneless skinless peeled leaf leaves
+""".split())
+_QUANTITY = re.compile(r"^\d+([./]\d+)?$|^\d+(g|kg|ml|l|oz|lb)$")
+_WORD = re.compile(r"[a-z0-9./]+")
+_SEPARATOR = re.compile(r"[,;&+]|\b(?:and|or|with|plus)\b")
+
+
+def _one_edit(a: str, b: str) -> bool:
+    """True if ``a`` and ``b`` differ by at most one insert, delete or substitution."""
+    if abs(len(a) - len(b)) > 1:
+        return False
+    i = 0
+    while i < min(len(a), len(b)) and a[i] == b[i]:
+        i += 1
+    if len(a) == len(b):
+        return a[i + 1:] == b[i + 1:]
+    return a[i + 1:] == b[i:] if len(a) > len(b) else a[i:] == b[i + 1:]
+
+
+def _trigrams(word: str):
+    w = f"^{word}$"
+    return {w[i:i + 3] for i in range(len(w) - 2)}
+
+
+class TrigramIndex:
+    """Fuzzy single-word lookup over the vocabulary and alias words."""
+
+    def __init__(self, phrases):
+        self.target = {}   # word -> canonical
+        self.grams = {}    # trigram -> set(words)
+        for phrase, canonical in phrases.items():
+            if " " in phrase or len(phrase) < FUZZY_MIN_LEN:
+                continue
+            self.target[phrase] = canonical
+            for g in _trigrams(phrase):
+                self.grams.setdefault(g, set()).add(phrase)
+        self.sizes = {w: len(_trigrams(w)) for w in self.target}
+
+    def lookup(self, word: str):
+        """Canonical name of the closest known word, or None if nothing is close enough."""
+        if len(word) < FUZZY_MIN_LEN:
+            return None
+        grams = _trigrams(word)
+        shared = {}
+        for g in grams:
+            for w in self.grams.get(g, ()):
+                shared[w] = shared.get(w, 0) + 1
+        best, best_score = None, 0.0
+        for w, n in shared.items():
+            score = 2 * n / (len(grams) + self.sizes[w])
+            if score < FUZZY_THRESHOLD and not (len(word) >= EDIT_MIN_LEN and _one_edit(word, w)):
+                continue
+            if score > best_score or (score == best_score and w < best):
+                best, best_score = w, score
+        return self.target[best] if best else None
+
+
+_fuzzy = TrigramIndex(PHRASES)
+
+
+def clean_words(item: str) -> List[str]:
+    """Singular words of ``item`` without quantities, units and filler."""
+    out = []
+    for w in _WORD.findall(str(item).lower()):
+        if _QUANTITY.match(w) or w in FILLER:
+            continue
+        w = w.strip("./")
+        if w:
+            out.append(singular(w))
+    return out
+
+
+def clean_text(item) -> str:
+    """The item as typed, trimmed and with runs of whitespace collapsed (for display)."""
+    return " ".join(str(item).split())
+
+
+def _parts(item: str) -> List[str]:
+    return [p for p in _SEPARATOR.split(str(item).lower()) if p.strip()]
+
+
+def _resolve_part(words: List[str]):
+    """Canonical name for one part's cleaned words, or None unless they name it whole."""
+    canonical = PHRASES.get(" ".join(words))
+    if canonical is None and len(words) == 1:
+        canonical = _fuzzy.lookup(words[0])
+    return canonical
+
+
+@lru_cache(maxsize=4096)
+def normalize_item(item: str) -> Tuple[str, ...]:
+    """Names to compare one typed item by: a canonical ingredient for each part
+    that resolves whole, the part's cleaned text otherwise."""
+    out = []
+    for part in _parts(item):
+        words = clean_words(part)
+        if not words:
+            continue
+        name = _resolve_part(words) or " ".join(words)
+        if name not in out:
+            out.append(name)
+    return tuple(out)
+
+
+@lru_cache(maxsize=4096)
+def resolve(item: str) -> Tuple[str, ...]:
+    """Canonical ingredients named by one typed item; () if none are recognised."""
+    return tuple(n for n in normalize_item(item) if n in INGREDIENT_SET)
+
+
+def dedupe(items) -> List[str]:
+    """The items as typed (``clean_text``), first-seen order, dropping any whose
+    names were all listed already ("tomatoes" after "Tomato")."""
+    out, seen = [], set()
+    for item in items:
+        names = normalize_item(item)
+        if not names or seen.issuperset(names):
+            continue
+        seen.update(names)
+        out.append(clean_text(item))
+    return out
+
+
+def request_key(items) -> Tuple[str, ...]:
+    """Order- and spelling-insensitive key for a list of typed items.
+
+    "Tomatoes, 2 eggs" and "egg, tomato" share a key; parts that don't
+    resolve whole take part by their cleaned text.
+    """
+    return tuple(sorted({name for item in items for name in normalize_item(item)}))
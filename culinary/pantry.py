@@ -0,0 +1,135 @@
+"""Offline "what can I cook?" matching of the pantry list against the catalog.
+
+Every ingredient in the vocabulary owns one bit, so a recipe's ingredients
+and the session pantry are plain ints. Ranking the catalog is then one pass
+of ``&``/``bit_count`` over the distinct recipe masks (recipes sharing a
+mask are scored together), which stays in the tens of milliseconds for
+100k recipes and needs no backend call. Ingredients the pantry can stand
+in for (``culinary.substitutes``) count as covered, ranked just behind
+exact matches.
+"""
+import threading
+from dataclasses import dataclass, field
+from typing import List
+
+from culinary.catalog import peek_recipe
+from culinary.ingredients import INGREDIENTS, recipe_ingredients
+from culinary.normalize import resolve
+from culinary.substitutes import expand, substitutions
+
+BIT = {name: 1 << i for i, name in enumerate(INGREDIENTS)}
+# Assumed to be in every kitchen: a recipe never counts these as missing.
+STAPLES = ("water", "salt", "pepper", "oil", "olive oil")
+STAPLE_MASK = sum(BIT[s] for s in STAPLES)
+MAX_MISSING = 2
+
+
+def mask_of(ingredients) -> int:
+    m = 0
+    for ing in ingredients:
+        m |= BIT.get(ing, 0)
+    return m
+
+
+def names_of(mask: int) -> List[str]:
+    return [INGREDIENTS[i] for i in range(mask.bit_length()) if mask >> i & 1]
+
+
+def pantry_mask(items) -> int:
+    """Bitset for free-text pantry entries ("2 eggs", "cheddar cheese", "brocoli", ...)."""
+    m = 0
+    for item in items:
+        m |= mask_of(resolve(str(item)))
+    return m
+
+
+@dataclass
+class Match:
+    name: str
+    have: int       # recipe ingredients already in the pantry (staples included)
+    need: int       # recipe ingredients in total
+    missing_mask: int = field(repr=False)
+    sub_mask: int = field(default=0, repr=False)   # lacking, but the pantry has a stand-in
+    pantry: int = field(default=0, repr=False)
+
+    @property
+    def missing(self) -> List[str]:
+        return names_of(self.missing_mask)
+
+    @property
+    def substitutions(self):
+        """[(needed, use instead)] for the ingredients covered by a stand-in."""
+        return substitutions(self.sub_mask, self.pantry)
+
+    @property
+    def coverage(self) -> float:
+        return self.have / self.need if self.need else 0.0
+
+
+class PantryIndex:
+    """Recipe ingredient masks for one catalog version, grouped by mask."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = None
+        self.groups = {}    # mask -> [recipe name, ...]
+
+    def sync(self, recipes, version=None):
+        groups = {}
+        for name in recipes:
+            m = mask_of(recipe_ingredients(peek_recipe(recipes, name)))
+            if m:
+                groups.setdefault(m, []).append(name)
+        for names in groups.values():
+            names.sort()
+        with self.lock:
+            self.groups, self.version = groups, version
+        return self
+
+    def rank(self, pantry: int, limit: int = 10, max_missing: int = MAX_MISSING) -> List[Match]:
+        """Best recipes for ``pantry``: fewest missing items, then fewest stand-ins,
+        then highest coverage.
+
+        A recipe has to use at least one pantry item (or a stand-in for one)
+        that isn't a staple.
+        """
+        have_mask = pantry | STAPLE_MASK
+        # Stand-ins come from what the user listed, not from the assumed staples.
+        can_sub = expand(pantry) & ~have_mask
+        wanted = expand(pantry & ~STAPLE_MASK)
+        with self.lock:
+            groups = self.groups
+        scored = []
+        for m, names in groups.items():
+            if not m & wanted:
+                continue
+            lacking = m & ~have_mask
+            missing = lacking & ~can_sub
+            n_missing = missing.bit_count()
+            if n_missing > max_missing:
+                continue
+            n_subs = (lacking & can_sub).bit_count()
+            need = m.bit_count()
+            have = need - n_missing - n_subs
+            scored.append(((n_missing, n_subs, -have / need, -need), m, missing, lacking & can_sub, names))
+        scored.sort(key=lambda s: s[0])
+        out = []
+        for _, m, missing, subbed, names in scored:
+            need = m.bit_count()
+            for name in names:
+                out.append(Match(name, need - missing.bit_count() - subbed.bit_count(), need,
+                                 missing, subbed, pantry))
+                if len(out) >= limit:
+                    return out
+        return out
+
+
+_index = PantryIndex()
+
+
+def pantry_index(catalog) -> PantryIndex:
+    """Process-wide index, rebuilt only when the catalog version changes."""
+    recipes = catalog.recipes()
+    if _index.version != catalog.version:
+        _index.sync(recipes, catalog.version)
+    return _index
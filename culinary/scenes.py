@@ -0,0 +1,276 @@
+"""Offline SVG illustrations for recipe steps.
+
+Which picture a step gets depends on the recipe's family (sandwich, pasta…)
+and the kind of step (chop, boil, pan…). Both are found with one precompiled
+regex pass each instead of a chain of substring tests, and a whole step
+card is memoized, so going back to a step already seen costs a dict hit.
+``prepare`` classifies every step when a recipe is opened.
+"""
+import re
+import textwrap
+from functools import lru_cache
+from html import escape
+from typing import List
+
+# Checked in this order, like the original if-chain: the first group with any
+# keyword inside the text wins. Matching is by substring, so "pan" also hits
+# "pancakes".
+STEP_KINDS = (
+    ("chop", ("chop", "slice", "cut", "dice")),
+    ("boil", ("boil", "simmer", "water", "al dente")),
+    ("pan", ("pan", "toast", "sear", "fry", "griddle", "butter", "golden")),
+    ("mix", ("mix", "toss", "combine", "bowl", "stir")),
+    ("serve", ("serve", "plate", "cut")),
+)
+RECIPE_FAMILIES = (
+    ("sandwich", ("sandwich",)),
+    ("quesadilla", ("quesadilla",)),
+    ("oat", ("oat",)),
+    ("omelet", ("omelet",)),  # also covers "omelete" and "omelette"
+    ("pasta", ("pasta", "marinara")),
+    ("fruit", ("fruit",)),
+)
+SVG_CACHE_SIZE = 512
+
+
+class KeywordClassifier:
+    """First label (in priority order) with a keyword occurring in the text, in one scan."""
+
+    def __init__(self, groups, default: str):
+        self.default = default
+        self.rank = {}
+        for rank, (label, keywords) in enumerate(groups):
+            for kw in keywords:
+                self.rank.setdefault(kw, (rank, label))
+        # A lookahead finds a match at every position, so a keyword overlapping
+        # another one is still seen; at one position the alternation order
+        # (best rank first) decides.
+        ordered = sorted(self.rank, key=lambda kw: (self.rank[kw][0], -len(kw)))
+        self.pattern = re.compile("(?=(" + "|".join(re.escape(kw) for kw in ordered) + "))")
+
+    def __call__(self, text: str) -> str:
+        best = None
+        for m in self.pattern.finditer(text.lower()):
+            hit = self.rank[m.group(1)]
+            if best is None or hit[0] < best[0]:
+                best = hit
+                if hit[0] == 0:
+                    break
+        return best[1] if best else self.default
+
+
+_step_kind = KeywordClassifier(STEP_KINDS, "prep")
+_recipe_family = KeywordClassifier(RECIPE_FAMILIES, None)
+
+
+_kinds = {}  # step text -> kind; seeded from prebuilt catalogs by prepare()
+KIND_CACHE_SIZE = 8192
+
+
+def kind_from_text(text: str) -> str:
+    k = _kinds.get(text)
+    if k is None:
+        k = _step_kind(text)
+        if len(_kinds) >= KIND_CACHE_SIZE:
+            _kinds.clear()
+        _kinds[text] = k
+    return k
+
+
+@lru_cache(maxsize=1024)
+def recipe_family(recipe: str):
+    return _recipe_family(recipe)
+
+
+def prepare(recipe: str, steps, kinds=None) -> tuple:
+    """Classify the recipe and all of its steps up front; returns the step kinds.
+
+    ``kinds`` are precomputed ones (from a prebuilt catalog) to use as they are.
+    """
+    recipe_family(recipe)
+    if kinds is not None and len(kinds) == len(steps):
+        _kinds.update(zip(steps, kinds))
+        return tuple(kinds)
+    return tuple(kind_from_text(s) for s in steps)
+
+
+def wrap_lines(text: str, width: int = 44) -> List[str]:
+    return textwrap.wrap(text, width=width)[:3]
+
+
+def scene(recipe: str, text: str, kind: str = None) -> str:
+    """Return a detailed SVG <g> that includes FOOD + tools based on recipe + step text."""
+    r = recipe.lower()
+    t = text.lower()
+    family = recipe_family(recipe)
+    k = kind if kind is not None else kind_from_text(text)
+
+    # shared shapes
+    plate = "<ellipse cx='500' cy='220' rx='200' ry='26' fill='#e2e8f0'/>"
+    steam = (
+        "<g opacity='.8' fill='none' stroke='#94a3b8' stroke-width='3'>"
+        "<path d='M420 110 q20 -20 0 -40'/>"
+        "<path d='M455 110 q20 -20 0 -40'/>"
+        "<path d='M490 110 q20 -20 0 -40'/>"
+        "</g>"
+    )
+
+    if family == "sandwich":
+        bread_bottom = "<rect x='390' y='170' width='220' height='40' rx='10' fill='#fef3c7' stroke='#f59e0b'/>"
+        bread_top    = "<rect x='390' y='140' width='220' height='38' rx='10' fill='#fde68a' stroke='#f59e0b'/>"
+        cheese       = "<rect x='410' y='160' width='180' height='16' rx='4' fill='#facc15'/>"
+        lettuce      = "<path d='M410 182 q20 -12 40 0 t40 0 t40 0 t40 0' fill='#22c55e'/>"
+        tomato1      = "<circle cx='445' cy='172' r='8' fill='#ef4444'/>"
+        tomato2      = "<circle cx='505' cy='172' r='8' fill='#ef4444'/>"
+        sauce        = "<path d='M430 150 q30 10 60 0 q30 -10 60 0' fill='#f43f5e' opacity='.7'/>"
+
+        if "add fillings" in r or "fillings" in t:
+            return plate + bread_bottom + cheese + lettuce + tomato1 + tomato2
+        if "sauce" in t or "spread" in t:
+            return plate + bread_bottom + sauce
+        if "close" in t or "press" in t:
+            arrow = "<polygon points='610,150 640,165 610,180' fill='#334155'/>"
+            return plate + bread_bottom + cheese + lettuce + tomato1 + tomato2 + arrow + bread_top
+        if "cut" in t or "serve" in t:
+            tri1 = "<polygon points='470,160 610,160 540,220' fill='#fde68a' stroke='#f59e0b'/>"
+            tri2 = "<polygon points='470,160 400,220 540,220' fill='#f59e0b' opacity='.35'/>"
+            return plate + tri1 + tri2
+        # lay out bread
+        return plate + bread_top + bread_bottom
+
+    if family == "quesadilla":
+        tortilla   = "<circle cx='500' cy='180' r='90' fill='#fde68a' stroke='#eab308'/>"
+        cheese     = "<path d='M500 100 l70 80 l-140 0 z' fill='#facc15' opacity='.9'/>"
+        pan        = "<rect x='360' y='200' width='280' height='34' rx='18' fill='#475569'/><rect x='620' y='208' width='80' height='10' rx='5' fill='#475569'/>"
+        if "fold" in t:
+            fold = "<path d='M500 90 q90 90 0 180 q-90 -90 0 -180' fill='#fef08a' opacity='.9'/>"
+            return pan + tortilla + cheese + fold
+        if "cut" in t or "serve" in t:
+            wedge = "<path d='M500 90 A90 90 0 0 1 590 180 L500 180 Z' fill='#facc15'/>"
+            return plate + tortilla + wedge
+        return pan + tortilla + cheese + steam
+
+    if family == "oat":
+        bowl = "<ellipse cx='500' cy='210' rx='160' ry='24' fill='#cbd5e1'/><path d='M360 180 q140 80 280 0 v30 q-140 80 -280 0 z' fill='#e2e8f0'/>"
+        oats = "<ellipse cx='500' cy='175' rx='140' ry='26' fill='#fde68a' stroke='#f59e0b'/>"
+        berries = "<circle cx='460' cy='170' r='8' fill='#ef4444'/><circle cx='515' cy='178' r='7' fill='#a855f7'/><circle cx='550' cy='170' r='6' fill='#ef4444'/>"
+        spoon = "<rect x='580' y='120' width='14' height='70' rx='7' fill='#9ca3af'/><circle cx='587' cy='118' r='12' fill='#9ca3af'/>"
+        pot = "<rect x='420' y='140' width='160' height='60' rx='8' fill='#64748b'/><rect x='450' y='120' width='100' height='18' rx='8' fill='#64748b'/>"
+        if "simmer" in t:
+            return pot + steam
+        if "stir" in t:
+            return bowl + oats + spoon
+        if "sweeten" in t or "toppings" in t:
+            honey = "<path d='M400 120 q30 20 60 0 q30 -20 60 0' stroke='#f59e0b' stroke-width='6' fill='none'/>"
+            return bowl + oats + berries + honey
+        return bowl + oats + berries
+
+    if family == "omelet":
+        pan = "<rect x='360' y='200' width='280' height='36' rx='18' fill='#475569'/><rect x='620' y='208' width='80' height='10' rx='5' fill='#475569'/>"
+        eggs = "<ellipse cx='460' cy='150' rx='26' ry='20' fill='#fef3c7' stroke='#f59e0b'/><ellipse cx='510' cy='150' rx='26' ry='20' fill='#fef3c7' stroke='#f59e0b'/>"
+        whisk = "<rect x='560' y='120' width='8' height='70' rx='4' fill='#9ca3af'/><path d='M564 120 q-18 12 -18 40 q0 28 18 40 q18 -12 18 -40 q0 -28 -18 -40' fill='none' stroke='#9ca3af' stroke-width='4'/>"
+        fold = "<path d='M420 180 q80 -60 160 0 q-80 60 -160 0' fill='#fde68a' stroke='#f59e0b'/>"
+        fill = "<circle cx='500' cy='170' r='8' fill='#10b981'/><rect x='520' y='166' width='26' height='10' rx='5' fill='#facc15'/>"
+        if "whisk" in t:
+            return eggs + whisk + plate
+        if "add fillings" in t or "fillings" in t:
+            return pan + fold + fill
+        if "fold" in t:
+            return pan + fold + steam
+        if "slide" in t or "serve" in t:
+            half = "<path d='M440 170 q60 -40 120 0 q-60 40 -120 0' fill='#fde68a' stroke='#f59e0b'/>"
+            return plate + half + fill
+        return pan + fold
+
+    if family == "pasta":
+        pot = "<rect x='400' y='140' width='200' height='70' rx='10' fill='#475569'/><rect x='430' y='120' width='140' height='20' rx='8' fill='#475569'/>"
+        noodles = "".join(f"<rect x='{420+i*16}' y='146' width='10' height='60' rx='5' fill='#fde68a'/>" for i in range(10))
+        sauce = "<rect x='430' y='150' width='140' height='20' rx='8' fill='#ef4444' opacity='.9'/>"
+        ladle = "<rect x='580' y='120' width='10' height='60' rx='5' fill='#9ca3af'/><circle cx='585' cy='185' r='12' fill='#9ca3af'/>"
+        if "boil" in t or "al dente" in t:
+            return pot + noodles + steam
+        if "toss" in t or "sauce" in t or "marinara" in t:
+            return pot + noodles + sauce + ladle
+        if "finish" in t:
+            basil = "<path d='M470 150 q10 -10 20 0 q-10 10 -20 0' fill='#22c55e'/>"
+            return pot + noodles + sauce + basil
+        if "plate" in t or "serve" in t:
+            nest = "<circle cx='500' cy='180' r='70' fill='#fde68a' opacity='.9'/><path d='M440 180 q60 30 120 0' stroke='#f59e0b' stroke-width='6' fill='none'/>"
+            return plate + nest + "<circle cx='500' cy='180' r='18' fill='#ef4444'/>"
+        return pot + noodles
+
+    if family == "fruit":
+        board = "<rect x='370' y='150' width='260' height='70' rx='12' fill='#fcd34d' stroke='#f59e0b'/>"
+        kiwi  = "<circle cx='410' cy='185' r='16' fill='#22c55e'/><circle cx='410' cy='185' r='6' fill='#065f46'/>"
+        berry = "<circle cx='450' cy='178' r='10' fill='#ef4444'/>"
+        banana= "<ellipse cx='520' cy='188' rx='26' ry='12' fill='#fde68a' stroke='#f59e0b'/>"
+        bowl  = "<ellipse cx='500' cy='230' rx='170' ry='22' fill='#cbd5e1'/><path d='M330 200 q170 80 340 0 v30 q-170 80 -340 0 z' fill='#e2e8f0'/>"
+        if "chop" in t or "slice" in t:
+            knife = "<rect x='575' y='160' width='12' height='60' rx='6' fill='#94a3b8'/><rect x='560' y='180' width='30' height='12' rx='6' fill='#374151'/>"
+            return board + kiwi + berry + banana + knife
+        if "toss" in t or "mix" in t:
+            spoon = "<rect x='590' y='160' width='12' height='60' rx='6' fill='#94a3b8'/><circle cx='596' cy='156' r='10' fill='#94a3b8'/>"
+            fruit = "<circle cx='480' cy='205' r='10' fill='#ef4444'/><circle cx='520' cy='210' r='10' fill='#22c55e'/>"
+            return bowl + fruit + spoon
+        return board + kiwi + berry + banana
+
+    # generic prep/mix/pan scenes
+    if k == "chop":
+        board = "<rect x='380' y='150' width='240' height='70' rx='12' fill='#fcd34d' stroke='#f59e0b'/>"
+        knife = "<rect x='585' y='160' width='12' height='60' rx='6' fill='#94a3b8'/><rect x='568' y='178' width='32' height='12' rx='6' fill='#374151'/>"
+        veg1  = "<rect x='410' y='175' width='16' height='16' rx='4' fill='#22c55e'/>"
+        veg2  = "<rect x='440' y='175' width='16' height='16' rx='4' fill='#ef4444'/>"
+        return board + veg1 + veg2 + knife
+    if k == "pan":
+        pan = "<rect x='360' y='200' width='280' height='36' rx='18' fill='#475569'/><rect x='620' y='208' width='80' height='10' rx='5' fill='#475569'/>"
+        food= "<rect x='450' y='188' width='100' height='10' rx='5' fill='#facc15'/>"
+        return pan + food + steam
+    if k == "boil":
+        pot = "<rect x='400' y='140' width='200' height='70' rx='10' fill='#475569'/><rect x='430' y='120' width='140' height='20' rx='8' fill='#475569'/>"
+        bubbles = "".join(f"<circle cx='{440+i*24}' cy='168' r='5' fill='#e2e8f0'/>" for i in range(8))
+        return pot + bubbles + steam
+    if k == "mix":
+        bowl = "<ellipse cx='500' cy='210' rx='160' ry='24' fill='#cbd5e1'/><path d='M360 180 q140 80 280 0 v30 q-140 80 -280 0 z' fill='#e2e8f0'/>"
+        spoon= "<rect x='580' y='120' width='14' height='70' rx='7' fill='#9ca3af'/><circle cx='587' cy='118' r='12' fill='#9ca3af'/>"
+        dots = "<circle cx='480' cy='180' r='6' fill='#f59e0b'/><circle cx='520' cy='186' r='6' fill='#ef4444'/>"
+        return bowl + dots + spoon
+    # prep
+    plate = "<ellipse cx='500' cy='220' rx='200' ry='26' fill='#e2e8f0'/>"
+    knife = "<rect x='590' y='160' width='12' height='60' rx='6' fill='#94a3b8'/><rect x='572' y='178' width='32' height='12' rx='6' fill='#374151'/>"
+    return plate + knife
+
+
+@lru_cache(maxsize=SVG_CACHE_SIZE)
+def step_svg_doc(recipe: str, step_idx: int, total: int, text: str) -> str:
+    """The step card as a standalone <svg> document (also what the static bundle writes)."""
+    lines = wrap_lines(text, 44)
+    lines_svg = "".join(
+        f"<text x='500' y='{250 + i*24}' text-anchor='middle' font-family='Inter, system-ui' font-size='18' fill='#0f172a'>{escape(line, quote=False)}</text>"
+        for i, line in enumerate(lines)
+    )
+    safe_title = escape(recipe)
+    return f"""<svg viewBox='0 0 1000 360' xmlns='http://www.w3.org/2000/svg' role='img' aria-label='{safe_title} step'>
+      <defs>
+        <linearGradient id='bg' x1='0' y1='0' x2='1' y2='1'>
+          <stop offset='0%' stop-color='#f8fafc'/>
+          <stop offset='100%' stop-color='#eef2ff'/>
+        </linearGradient>
+        <filter id='d' x='-10%' y='-10%' width='120%' height='120%'>
+          <feDropShadow dx='0' dy='2' stdDeviation='10' flood-color='#000' flood-opacity='0.12'/>
+        </filter>
+      </defs>
+      <rect x='16' y='16' width='968' height='308' rx='20' fill='url(#bg)' filter='url(#d)'/>
+      <text x='40' y='58' font-family='Inter, system-ui' font-size='18' fill='#334155'>Step {step_idx} of {total} — {safe_title}</text>
+      {scene(recipe, text, kind_from_text(text))}
+      {lines_svg}
+    </svg>"""
+
+
+@lru_cache(maxsize=SVG_CACHE_SIZE)
+def step_svg(recipe: str, step_idx: int, total: int, text: str) -> str:
+    """The full step card for inline embedding; memoized on its arguments (the text by its cached str hash)."""
+    return f"""
+    <div style='display:flex;justify-content:center'>
+    {step_svg_doc(recipe, step_idx, total, text)}
+    </div>
+    """
@@ -0,0 +1,209 @@
+"""In-memory inverted index over the recipe catalog.
+
+Each recipe contributes weighted terms: words of its name, its derived
+ingredients and the words of its steps. Postings map term -> {recipe: weight}
+and a sorted term list gives prefix ranges for autocomplete. The index
+follows the catalog by diffing recipe stamps (the Recipe object itself, or
+one per prebuilt file; the catalog only creates new ones for sources that
+changed), so an edited pack re-indexes just its recipes.
+
+Queries are AND-ed over their words; the last word is treated as a prefix,
+so results update as you type. Scores are term weight x idf, summed.
+"""
+import heapq
+import math
+import threading
+from bisect import bisect_left, insort
+
+from culinary.catalog import peek_recipe, recipe_stamp
+from culinary.ingredients import recipe_ingredients, singular, tokens, words
+
+NAME_WEIGHT = 5.0
+INGREDIENT_WEIGHT = 3.0
+STEP_WEIGHT = 1.0
+MAX_PREFIX_TERMS = 64  # expansions of a prefix word considered per query
+BULK_SYNC = 200        # past this many changes, re-sort the term list once instead of per term
+
+STOP_WORDS = frozenset(
+    "a an and are as at be by for from in into is it of on or the then to until with your you".split()
+)
+
+
+def recipe_terms(recipe):
+    """{term: weight} for one recipe; ingredient phrases are indexed whole and per word."""
+    terms = {}
+
+    def add(term, weight):
+        if term and term not in STOP_WORDS:
+            terms[term] = max(terms.get(term, 0.0), weight)
+
+    for step in recipe.steps:
+        for w in words(step):
+            add(w, STEP_WEIGHT)
+    for ing in recipe_ingredients(recipe):
+        add(ing, INGREDIENT_WEIGHT)
+        for w in ing.split():
+            add(w, INGREDIENT_WEIGHT)
+    for w in words(recipe.name):
+        add(w, NAME_WEIGHT)
+    return terms
+
+
+class RecipeIndex:
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.postings = {}      # term -> {name: weight}
+        self.terms = []         # sorted distinct terms, for prefix ranges
+        self.docs = {}          # name -> stamp of the recipe indexed (see catalog.recipe_stamp)
+        self.doc_terms = {}     # name -> {term: weight}
+        self.version = None     # catalog version last synced
+
+    # ---------- maintenance ----------
+    def add(self, name, recipe, _sorted_terms: bool = True):
+        terms = recipe_terms(recipe)
+        with self.lock:
+            if name in self.docs:
+                self.remove(name, _sorted_terms)
+            self.docs[name] = recipe
+            self.doc_terms[name] = terms
+            for term, weight in terms.items():
+                posting = self.postings.get(term)
+                if posting is None:
+                    posting = self.postings[term] = {}
+                    if _sorted_terms:
+                        insort(self.terms, term)
+                posting[name] = weight
+
+    def remove(self, name, _sorted_terms: bool = True):
+        with self.lock:
+            self.docs.pop(name, None)
+            for term in self.doc_terms.pop(name, {}):
+                posting = self.postings.get(term)
+                if posting is None:
+                    continue
+                posting.pop(name, None)
+                if not posting:
+                    del self.postings[term]
+                    if _sorted_terms:
+                        i = bisect_left(self.terms, term)
+                        if i < len(self.terms) and self.terms[i] == term:
+                            del self.terms[i]
+
+    def sync(self, recipes, version=None):
+        """Bring the index in line with ``recipes`` ({name: Recipe}); returns the number re-indexed.
+
+        Recipes are compared by ``recipe_stamp`` and read with ``peek_recipe``,
+        so a prebuilt catalog is indexed without keeping a Recipe per entry.
+        """
+        with self.lock:
+            if version is not None and version == self.version:
+                return 0
+            gone = [n for n in self.docs if n not in recipes]
+            new = [(n, stamp) for n in recipes
+                   for stamp in (recipe_stamp(recipes, n),) if self.docs.get(n) is not stamp]
+            incremental = len(gone) + len(new) <= BULK_SYNC
+            for name in gone:
+                self.remove(name, incremental)
+            for name, stamp in new:
+                self.add(name, peek_recipe(recipes, name), incremental)
+                self.docs[name] = stamp
+            if not incremental:
+                self.terms = sorted(self.postings)
+            self.version = version
+            return len(gone) + len(new)
+
+    # ---------- queries ----------
+    def _prefix_terms(self, prefix: str):
+        lo = bisect_left(self.terms, prefix)
+        hi = bisect_left(self.terms, prefix + "\uffff")
+        span = self.terms[lo:hi]
+        if len(span) > MAX_PREFIX_TERMS:
+            span = heapq.nlargest(MAX_PREFIX_TERMS, span, key=lambda t: len(self.postings[t]))
+        return span
+
+    def _idf(self, term: str) -> float:
+        return math.log(1 + len(self.docs) / (1 + len(self.postings.get(term, ()))))
+
+    def _matches(self, word: str, prefix: bool):
+        """{name: score} for one query word (exact term, or any term it prefixes)."""
+        terms = self._prefix_terms(word) if prefix else ([word] if word in self.postings else [])
+        if len(terms) == 1:
+            idf = self._idf(terms[0])
+            return {n: w * idf for n, w in self.postings[terms[0]].items()}
+        scores = {}
+        for term in terms:
+            idf = self._idf(term)
+            # An exact hit outranks words that merely start with the prefix.
+            boost = 1.0 if term == word else 0.8
+            for n, w in self.postings[term].items():
+                s = w * idf * boost
+                if s > scores.get(n, 0.0):
+                    scores[n] = s
+        return scores
+
+    def _word_matches(self, raw: str, prefix: bool):
+        if not prefix:
+            return self._matches(singular(raw), False)
+        # A half-typed word must not be singularized ("chees" is not "chee"),
+        # but a finished plural should still find its singular term.
+        scores = self._matches(raw, True)
+        if singular(raw) != raw:
+            for n, s in self._matches(singular(raw), True).items():
+                if s > scores.get(n, 0.0):
+                    scores[n] = s
+        return scores
+
+    def search(self, query: str, limit: int = 50):
+        """[(name, score), ...] best first; every query word must match.
+
+        ``limit=None`` returns every match.
+        """
+        qwords = [w for w in tokens(query) if w not in STOP_WORDS]
+        if not qwords:
+            return []
+        ends_with_space = query[-1:].isspace()
+        with self.lock:
+            per_word = [self._word_matches(w, prefix=(i == len(qwords) - 1 and not ends_with_space))
+                        for i, w in enumerate(qwords)]
+            per_word.sort(key=len)
+            if not per_word[0]:
+                return []
+            scores = dict(per_word[0])
+            for other in per_word[1:]:
+                scores = {n: s + other[n] for n, s in scores.items() if n in other}
+                if not scores:
+                    return []
+        if limit is None:
+            return sorted(scores.items(), key=lambda kv: (-kv[1], kv[0]))
+        return heapq.nsmallest(limit, scores.items(), key=lambda kv: (-kv[1], kv[0]))
+
+    def suggest(self, prefix: str, limit: int = 8):
+        """Completions for the word being typed: recipe names first, then common terms."""
+        qwords = tokens(prefix)
+        if not qwords or prefix[-1:].isspace():
+            return []
+        head, last = qwords[:-1], qwords[-1]
+        with self.lock:
+            terms = self._prefix_terms(last)
+            ranked = sorted(terms, key=lambda t: (-len(self.postings[t]), t))
+            lead = " ".join(head)
+            names = [n for n, _ in self.search(prefix, limit=limit)]
+        out = names[: limit // 2]
+        for t in ranked:
+            if len(out) >= limit:
+                break
+            completion = f"{lead} {t}".strip()
+            if completion not in out:
+                out.append(completion)
+        return out
+
+
+_index = RecipeIndex()
+
+
+def search_index(catalog) -> RecipeIndex:
+    """Process-wide index, synced with ``catalog`` (cheap when nothing changed)."""
+    recipes = catalog.recipes()
+    if _index.version != catalog.version:
+        _index.sync(recipes, catalog.version)
+    return _index
@@ -0,0 +1,128 @@
+"""Prebuilt step illustrations served as static files.
+
+    python -m culinary.static_bundle              # built-in recipes -> static/steps/
+    python -m culinary.static_bundle --catalog    # every recipe the catalog can see
+
+Each step card is written once as ``static/steps/<content hash>.svg``, and
+``manifest.json`` maps a step (recipe, step number, step count, text) to
+its file. With ``server.enableStaticServing`` on, the page shows a step
+as an <img> pointing at ``app/static/steps/...``. A rerun then sends a
+short URL instead of a new iframe of SVG, and because a file's name
+changes whenever its content does, browsers can cache it for good.
+Steps missing from the manifest (AI recipes, packs added after the build)
+still render inline, and so does every step when the Streamlit server's
+static allowlist doesn't include ``.svg`` (some versions serve it as
+text/plain, which browsers won't show as an image).
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from pathlib import Path
+
+from culinary.catalog import BUILTIN, get_catalog
+from culinary.scenes import step_svg_doc
+
+STATIC_DIR = Path("static/steps")
+URL_PREFIX = "app/static/steps/"
+MANIFEST_NAME = "manifest.json"
+CHECK_INTERVAL = 5.0
+
+
+def step_key(recipe: str, step_idx: int, total: int, text: str) -> str:
+    raw = "\x1f".join((recipe, str(step_idx), str(total), text))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:24]
+
+
+def build(recipes, out_dir: Path = STATIC_DIR):
+    """Write every step of ``recipes`` ({name: Recipe}); returns (written, total files)."""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    manifest, written = {}, 0
+    for name, r in recipes.items():
+        total = len(r.steps)
+        for i, text in enumerate(r.steps, start=1):
+            svg = step_svg_doc(r.name, i, total, text).encode("utf-8")
+            fname = hashlib.sha256(svg).hexdigest()[:16] + ".svg"
+            path = out_dir / fname
+            if not path.exists():
+                tmp = path.with_name(fname + ".tmp")
+                tmp.write_bytes(svg)
+                os.replace(tmp, path)
+                written += 1
+            manifest[step_key(r.name, i, total, text)] = fname
+    tmp = out_dir / (MANIFEST_NAME + ".tmp")
+    tmp.write_text(json.dumps(manifest, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, out_dir / MANIFEST_NAME)
+    # Old files are dropped only after the new manifest is in place.
+    keep = set(manifest.values())
+    for old in out_dir.glob("*.svg"):
+        if old.name not in keep:
+            old.unlink(missing_ok=True)
+    return written, len(keep)
+
+
+class StaticBundle:
+    """The manifest, re-read at most every ``CHECK_INTERVAL`` seconds when it changes."""
+
+    def __init__(self, directory: Path = STATIC_DIR, check_interval: float = CHECK_INTERVAL):
+        self.path = Path(directory) / MANIFEST_NAME
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self._token = None
+        self._manifest = {}
+        self._checked = None
+
+    def _refresh(self):
+        now = time.monotonic()
+        with self.lock:
+            if self._checked is not None and now - self._checked < self.check_interval:
+                return self._manifest
+            self._checked = now
+            try:
+                st = os.stat(self.path)
+                token = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                token = None
+            if token != self._token:
+                self._token = token
+                try:
+                    self._manifest = json.loads(self.path.read_text(encoding="utf-8")) if token else {}
+                except (OSError, ValueError):
+                    self._manifest = {}
+            return self._manifest
+
+    def url(self, recipe: str, step_idx: int, total: int, text: str):
+        """``app/static/...`` URL of a prebuilt step card, or None."""
+        fname = self._refresh().get(step_key(recipe, step_idx, total, text))
+        return URL_PREFIX + fname if fname else None
+
+
+_bundle = None
+_bundle_lock = threading.Lock()
+
+
+def get_bundle() -> StaticBundle:
+    global _bundle
+    with _bundle_lock:
+        if _bundle is None:
+            _bundle = StaticBundle()
+    return _bundle
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--catalog", action="store_true", help="include every catalog recipe, not just the built-ins")
+    ap.add_argument("--out", type=Path, default=STATIC_DIR)
+    args = ap.parse_args(argv)
+    recipes = get_catalog().recipes() if args.catalog else BUILTIN
+    written, total = build(recipes, args.out)
+    print(f"{total:,} step illustrations in {args.out} ({written:,} new)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
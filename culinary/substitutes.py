@@ -0,0 +1,123 @@
+"""Which pantry ingredients can stand in for which recipe ingredients.
+
+``EDGES`` is a small weighted graph: ``(needed, stand_in, weight)`` says a
+recipe that needs ``needed`` still works with ``stand_in``, about
+``weight`` as well. At import the graph is closed transitively (best
+product of weights over any path, kept when it is at least
+``MIN_WEIGHT``) and flattened into bitmask tables over the ingredient
+vocabulary. Matching a pantry then costs one table lookup per pantry
+ingredient, with no graph walk per query.
+"""
+from typing import Dict, List, Optional, Tuple
+
+from culinary.ingredients import INGREDIENT_ID, INGREDIENTS
+
+MIN_WEIGHT = 0.5
+
+
+def _both(a: str, b: str, weight: float):
+    return [(a, b, weight), (b, a, weight)]
+
+
+EDGES = [
+    *_both("cheese", "mozzarella", 0.9),
+    *_both("cheese", "parmesan", 0.7),
+    ("cream cheese", "cheese", 0.5),
+    ("cream", "milk", 0.6), ("milk", "cream", 0.8),
+    *_both("cream", "yogurt", 0.6),
+    ("mayonnaise", "yogurt", 0.6),
+    ("butter", "oil", 0.7), ("butter", "olive oil", 0.7),
+    *_both("oil", "olive oil", 0.9),
+    *_both("lemon", "lime", 0.9),
+    ("vinegar", "lemon", 0.6),
+    *_both("sugar", "honey", 0.8),
+    *_both("sugar", "brown sugar", 0.9),
+    *_both("marinara", "tomato sauce", 0.9),
+    ("tomato sauce", "tomato", 0.7), ("marinara", "tomato", 0.6), ("salsa", "tomato", 0.6),
+    *_both("pasta", "noodle", 0.9),
+    *_both("noodle", "ramen", 0.9),
+    ("tortilla", "bread", 0.6), ("bread", "tortilla", 0.5),
+    *_both("chicken", "turkey", 0.9),
+    *_both("beef", "pork", 0.7),
+    *_both("ham", "turkey", 0.7),
+    *_both("ham", "bacon", 0.7),
+    *_both("bacon", "sausage", 0.6),
+    *_both("tuna", "salmon", 0.7),
+    *_both("bean", "lentil", 0.8),
+    *_both("basil", "oregano", 0.6),
+    *_both("parsley", "cilantro", 0.8),
+    ("herb", "basil", 0.9), ("herb", "oregano", 0.9), ("herb", "parsley", 0.9), ("herb", "cilantro", 0.9),
+    ("berry", "blueberry", 0.9), ("berry", "strawberry", 0.9),
+    *_both("blueberry", "strawberry", 0.7),
+    ("fruit", "apple", 0.9), ("fruit", "banana", 0.9), ("fruit", "berry", 0.9), ("fruit", "orange", 0.9),
+    ("nut", "almond", 0.9),
+    *_both("oat", "granola", 0.6),
+    *_both("cereal", "granola", 0.7),
+    *_both("lettuce", "spinach", 0.7),
+]
+
+
+def _closure(edges) -> Dict[int, Dict[int, float]]:
+    """need id -> {stand-in id: best path weight}, via max-product Floyd-Warshall."""
+    n = len(INGREDIENTS)
+    w = [[0.0] * n for _ in range(n)]
+    for need, have, weight in edges:
+        i, j = INGREDIENT_ID[need], INGREDIENT_ID[have]
+        w[i][j] = max(w[i][j], weight)
+    for k in range(n):
+        wk = w[k]
+        for i in range(n):
+            wik = w[i][k]
+            if wik < MIN_WEIGHT:
+                continue
+            wi = w[i]
+            for j in range(n):
+                via = wik * wk[j]
+                if via > wi[j]:
+                    wi[j] = via
+    return {
+        i: {j: round(x, 3) for j, x in enumerate(row) if j != i and x >= MIN_WEIGHT}
+        for i, row in enumerate(w)
+        if any(x >= MIN_WEIGHT for j, x in enumerate(row) if j != i)
+    }
+
+
+CLOSURE = _closure(EDGES)
+# FILLS[j]: bitmask of the ingredients that ingredient j can stand in for.
+FILLS = [0] * len(INGREDIENTS)
+for _need, _row in CLOSURE.items():
+    for _have in _row:
+        FILLS[_have] |= 1 << _need
+
+
+def expand(mask: int) -> int:
+    """``mask`` plus everything its ingredients can stand in for."""
+    out = mask
+    while mask:
+        low = mask & -mask
+        out |= FILLS[low.bit_length() - 1]
+        mask ^= low
+    return out
+
+
+def covers(have: int, need: int) -> bool:
+    """True if every ingredient in ``need`` is in ``have`` or has a stand-in there."""
+    return not need & ~expand(have)
+
+
+def best_substitute(need: str, have: int) -> Optional[Tuple[str, float]]:
+    """(stand-in, weight) for ``need`` from the ingredients in ``have``, or None."""
+    row = CLOSURE.get(INGREDIENT_ID.get(need, -1), {})
+    best = max(((w, j) for j, w in row.items() if have >> j & 1), default=None)
+    return (INGREDIENTS[best[1]], best[0]) if best else None
+
+
+def substitutions(need: int, have: int) -> List[Tuple[str, str]]:
+    """[(needed, stand-in)] for the ingredients of ``need`` that ``have`` lacks but can replace."""
+    out = []
+    for i in range(need.bit_length()):
+        if need >> i & 1 and not have >> i & 1:
+            sub = best_substitute(INGREDIENTS[i], have)
+            if sub:
+                out.append((INGREDIENTS[i], sub[0]))
+    return out
@@ -1,21 +1,40 @@
 import streamlit as st
-import json
 from pathlib import Path
 from datetime import datetime, timedelta
-import matplotlib.pyplot as plt
 import shlex
 import random
-import os
-import requests
+import sys
+
+# Pages can be launched on their own (streamlit run pages/...), so make the
+# repo root importable for the shared budgeter package.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+from budgeter.charts import composition_pie_png
+from budgeter.store import OverdrawError, open_store
+from budgeter import ledger
+from budgeter.ledger import bootstrap_balances, check_consistency
+from budgeter.importer import import_csv, guess_mapping, read_header
+from budgeter.export import FORMATS, export_chunks, spool_export
+from budgeter.ledger import TXN_EFFECTS
+from budgeter.categories import get_categorizer
+from budgeter.series import balance_series, invalidate_series
+from budgeter.data import budget_data
+from budgeter.goal_eta import goal_eta, describe_eta
+from budgeter.locking import LOCK_STATS
+from budgeter.buddy import BuddyRequest
+from budgeter.recurring import edit_rules, load_rules, materialize_due
+import rerun_profiler as profiler
+from budgeter.commands import CommandError, Draft, run_script, split_script, is_engine_command, op_add, op_save, op_spend, op_back
 
 st.set_page_config(page_title="Budgeter", layout="wide")
+profiler.begin("budgeter")
 BACKEND = "http://127.0.0.1:5000"
 
-DATA_FILE = Path("pages/budgeter_state.json")
-GOAL_FILE = Path("pages/budgeter_goal.json")
-SETTINGS_FILE = Path("pages/budgeter_settings.json")
-TRANSACTIONS_FILE = Path("pages/budgeter_transactions.jsonl")
-THEME_FILE = Path("pages/budgeter_theme.json")
+# JSON/JSONL files by default; set BUDGETER_BACKEND=sqlite for the single-file ledger.
+STORE = open_store()
+# Cached reads shared by every session in this process; re-parses only what changed.
+DATA = budget_data(STORE)
 
 PRESET_THEMES = {"Light": {"bg": "#ffffff", "text": "#0f172a"}, "Soft Gray": {"bg": "#f3f4f6", "text": "#111827"}, "Dark": {"bg": "#0f172a", "text": "#f8fafc"}, "Midnight": {"bg": "#0b1220", "text": "#e2e8f0"}, "Ocean": {"bg": "#06283D", "text": "#E3F6FF"}, "Forest": {"bg": "#0f2d1d", "text": "#e6ffed"}, "Plum": {"bg": "#2d1436", "text": "#f5e9ff"}, "Sepia": {"bg": "#f9f1e7", "text": "#4a3428"}, "Solarized Light": {"bg": "#fdf6e3", "text": "#073642"}, "Solarized Dark": {"bg": "#002b36", "text": "#eee8d5"}, "High Contrast": {"bg": "#000000", "text": "#ffffff"}, "Night Owl": {"bg": "#011627", "text": "#d6deeb"}, "Sand": {"bg": "#f7f3e9", "text": "#2d2a26"},}
 DEFAULT_THEME = PRESET_THEMES["Light"]
@@ -31,19 +50,15 @@ def _match_preset(name: str):
     return None
 
 def load_theme():
-    if THEME_FILE.exists():
-        try:
-            data = json.loads(THEME_FILE.read_text())
-            bg = str(data.get("bg", DEFAULT_THEME["bg"]))
-            text = str(data.get("text", DEFAULT_THEME["text"]))
-            return bg, text
-        except Exception:
-            pass
+    data = DATA.theme()
+    if data:
+        bg = str(data.get("bg", DEFAULT_THEME["bg"]))
+        text = str(data.get("text", DEFAULT_THEME["text"]))
+        return bg, text
     return DEFAULT_THEME["bg"], DEFAULT_THEME["text"]
 
 def save_theme(bg: str, text: str):
-    THEME_FILE.parent.mkdir(parents=True, exist_ok=True)
-    THEME_FILE.write_text(json.dumps({"bg": bg, "text": text}, indent=2))
+    STORE.save_theme(bg, text)
 
 def _hex_to_rgb(hex_str: str):
     s = hex_str.lstrip("#")
@@ -55,6 +70,7 @@ def _is_dark(hex_str: str) -> bool:
     r, g, b = _hex_to_rgb(hex_str)
     return (0.299*r + 0.587*g + 0.114*b) < 140
 
+@profiler.timed()
 def apply_theme_css(bg: str, text: str):
     dark_ui = _is_dark(bg)
 
@@ -146,150 +162,91 @@ def apply_theme_css(bg: str, text: str):
         unsafe_allow_html=True,
     )
 
-    plt.rcParams.update({"text.color": text, "axes.labelcolor": text, "xtick.color": text, "ytick.color": text,})
-
 def load_goal():
-    if GOAL_FILE.exists():
-        try:
-            data = json.loads(GOAL_FILE.read_text())
-            return str(data.get("goal_name", "My Goal")), float(data.get("goal_amount", 0.0))
-        except Exception:
-            pass
-    return "My Goal", 0.0
+    return DATA.goal()
 
 def save_goal():
-    GOAL_FILE.parent.mkdir(parents=True, exist_ok=True)
-    GOAL_FILE.write_text(json.dumps({"goal_name": st.session_state.savingsGoalName, "goal_amount": st.session_state.savingsGoalAmount}, indent=2))
+    STORE.save_goal(st.session_state.savingsGoalName, st.session_state.savingsGoalAmount)
 
 def delete_goal():
-    try:
-        GOAL_FILE.unlink()
-    except FileNotFoundError:
-        pass
+    STORE.delete_goal()
 
 def load_persisted():
-    if DATA_FILE.exists():
-        try:
-            data = json.loads(DATA_FILE.read_text())
-            return float(data.get("account", 0.0)), float(data.get("savings", 0.0))
-        except Exception:
-            pass
-    return 0.0, 0.0
+    return DATA.balances()
 
 def save_persisted():
-    DATA_FILE.parent.mkdir(parents=True, exist_ok=True)
-    DATA_FILE.write_text(json.dumps({"account": st.session_state.amountInAccount, "savings": st.session_state.amountInSavings}, indent=2))
+    STORE.save_balances(st.session_state.amountInAccount, st.session_state.amountInSavings)
 
 def load_settings():
-    if SETTINGS_FILE.exists():
-        try:
-            data = json.loads(SETTINGS_FILE.read_text())
-            return float(data.get("auto_save_percent", 0.0))
-        except Exception:
-            pass
-    return 0.0
+    try:
+        return float(DATA.settings().get("auto_save_percent", 0.0))
+    except Exception:
+        return 0.0
+
+def load_user_categories():
+    cats = DATA.settings().get("categories", {})
+    return cats if isinstance(cats, dict) else {}
 
 def save_settings():
-    SETTINGS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    SETTINGS_FILE.write_text(json.dumps({"auto_save_percent": st.session_state.autoSavePercent}, indent=2))
+    # Locked so recurring rules advanced by another session are not written back stale.
+    with STORE.lock:
+        settings = STORE.load_settings()
+        settings["auto_save_percent"] = st.session_state.autoSavePercent
+        settings["categories"] = st.session_state.userCategories
+        STORE.save_settings(settings)
+
+@profiler.timed()
+def sync_recurring():
+    """Post any recurring transactions that have come due since the last visit.
+
+    Skipped until the store changes or the day rolls over: nothing else can
+    make a rule come due.
+    """
+    seen = (DATA.poll(), datetime.now().date())
+    if st.session_state.get("recurring_checked") == seen:
+        return
+    recs, balances = materialize_due(STORE)
+    # Posting moves the generation; remember the one that includes it.
+    st.session_state.recurring_checked = (DATA.poll(), seen[1])
+    if balances:
+        st.session_state.amountInAccount, st.session_state.amountInSavings = balances
+        st.toast(f"Posted {len(recs)} scheduled transaction(s).")
 
 def log_txn(kind: str, amount: float, note: str = ""):
-    if amount <= 0:
-        return
-    TRANSACTIONS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    rec = {"ts": datetime.now().isoformat(), "type": kind, "amount": float(amount)}
-    if note:
-        rec["note"] = str(note)
-    with TRANSACTIONS_FILE.open("a", encoding="utf-8") as f:
-        f.write(json.dumps(rec) + "\n")
+    ledger.log_txn(STORE, kind, amount, note)
 
+@profiler.timed()
 def load_txns():
-    txns = []
-    if TRANSACTIONS_FILE.exists():
-        for line in TRANSACTIONS_FILE.read_text().splitlines():
-            try:
-                txns.append(json.loads(line))
-            except Exception:
-                continue
-    return txns
+    return DATA.txns()
+
+filter_txns = profiler.timed()(ledger.filter_txns)
+totals_from_txns = profiler.timed()(ledger.totals_from_txns)
 
 def rewrite_txns(txns):
-    TRANSACTIONS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with TRANSACTIONS_FILE.open("w", encoding="utf-8") as f:
-        for r in txns:
-            f.write(json.dumps(r) + "\n")
-
-def filter_txns(txns, since_dt=None):
-    out = []
-    for r in txns:
-        try:
-            dt = datetime.fromisoformat(r["ts"])
-        except Exception:
-            continue
-        if since_dt is None or dt >= since_dt:
-            out.append(r)
-    return out
-
-def totals_from_txns(txns):
-    totals = {"Added": 0.0, "Spent": 0.0, "Saved": 0.0, "Moved Back": 0.0}
-    for r in txns:
-        t = r.get("type")
-        a = float(r.get("amount", 0.0))
-        if t == "add":
-            totals["Added"] += a
-        elif t == "spend":
-            totals["Spent"] += a
-        elif t in ("move_to_savings", "auto_move_to_savings"):
-            totals["Saved"] += a
-        elif t == "move_to_account":
-            totals["Moved Back"] += a
-    return totals
+    ledger.rewrite_txns(STORE, txns)
+    invalidate_series(STORE)
 
 def undo_last_txn():
-    txns = load_txns()
-    if not txns:
-        st.warning("No transactions to undo.")
-        return False
-    last = txns.pop()
-    t = last.get("type")
-    amt = float(last.get("amount", 0.0))
-    if t == "add":
-        st.session_state.amountInAccount -= amt
-    elif t == "spend":
-        st.session_state.amountInAccount += amt
-    elif t in ("move_to_savings", "auto_move_to_savings"):
-        st.session_state.amountInSavings -= amt
-        st.session_state.amountInAccount += amt
-    elif t == "move_to_account":
-        st.session_state.amountInAccount -= amt
-        st.session_state.amountInSavings += amt
-    else:
-        txns.append(last)
+    try:
+        last, balances = ledger.undo_last_txn(STORE)
+    except ValueError:
         st.error("Cannot undo this transaction type.")
         return False
-    save_persisted()
-    rewrite_txns(txns)
-    st.success(f"Undid last transaction: {t} ${amt:,.2f}")
+    if last is None:
+        st.warning("No transactions to undo.")
+        return False
+    st.session_state.amountInAccount, st.session_state.amountInSavings = balances
+    st.success(f"Undid last transaction: {last.get('type')} ${float(last.get('amount', 0.0)):,.2f}")
     return True
 
+@profiler.timed("composition_pie")
 def composition_pie_small(account_bal, savings_bal, spent_total, title="Composition"):
-    total = account_bal + savings_bal + spent_total
+    total = max(account_bal, 0.0) + max(savings_bal, 0.0) + max(spent_total, 0.0)
     if total <= 0:
         st.info("No funds or transactions yet.")
         return
-    labels = ["In Account", "In Savings", "Spent"]
-    values = [account_bal, savings_bal, spent_total]
-    colors = ["#2b6cb0", "#ed8936", "#38a169"]  # blue, orange, green
-
-    fig, ax = plt.subplots(figsize=(4, 4))
-    wedges, _ = ax.pie(values, colors=colors, startangle=90, wedgeprops=dict(linewidth=1, edgecolor="white"))
-    ax.axis("equal")
-
-    pct = [v / total * 100 for v in values]
-    legend_labels = [f"{labels[i]} — ${values[i]:,.0f} ({pct[i]:.0f}%)" for i in range(3)]
-    ax.legend(wedges, legend_labels, loc="upper center", bbox_to_anchor=(0.5, -0.05), ncol=1, frameon=False)
-    fig.tight_layout()
-    st.pyplot(fig)
+    png = composition_pie_png(round(account_bal, 2), round(savings_bal, 2), round(spent_total, 2), st.session_state.theme_text)
+    st.image(png, width=400)
 
 def _range_from_token(tok: str):
     tok = tok.lower()
@@ -301,185 +258,220 @@ def _range_from_token(tok: str):
     if tok in ("life", "lifetime", "all"): return None
     return None
 
-def handle_command(cmd_str: str):
+def new_draft() -> Draft:
+    return Draft(
+        account=st.session_state.amountInAccount,
+        savings=st.session_state.amountInSavings,
+        auto_save_percent=float(st.session_state.autoSavePercent or 0.0),
+        goal_name=st.session_state.savingsGoalName,
+        goal_amount=float(st.session_state.savingsGoalAmount or 0.0),
+        categories=dict(st.session_state.userCategories),
+        rate_state=DATA.rate_state(),
+        recurring=load_rules(STORE),
+    )
+
+def apply_draft(draft: Draft):
+    """Persist a finished draft: ledger rows, balances, goal and settings in one store write."""
+    goal = (draft.goal_name, draft.goal_amount) if draft.goal_changed else None
+    edit_settings = None
+    if draft.settings_changed:
+        def edit_settings(settings):
+            settings["auto_save_percent"] = draft.auto_save_percent
+            settings["categories"] = draft.categories
+            edit_rules(settings, add=draft.new_rules, drop=draft.dropped_rules)
+    # The draft's clamps used this session's balances; strict re-checks them
+    # against the stored ones under the store's lock.
     try:
-        parts = shlex.split(cmd_str)
-    except Exception:
-        st.error("Couldn't parse command. Try quotes around names, e.g., goal 3000 \"New laptop\".")
+        balances = STORE.apply(draft.recs, strict=True, goal=goal, edit_settings=edit_settings)
+    except OverdrawError:
+        st.session_state.amountInAccount, st.session_state.amountInSavings = STORE.load_balances()
+        st.warning("Your balances were changed in another tab, so there isn't enough money for this any more. "
+                   f"Nothing was saved. Account: ${st.session_state.amountInAccount:,.2f} • Savings: ${st.session_state.amountInSavings:,.2f}")
         return
-    if not parts:
-        st.warning("Please enter a command.")
+    st.session_state.amountInAccount, st.session_state.amountInSavings = balances
+    if draft.goal_changed:
+        st.session_state.savingsGoalName = draft.goal_name
+        st.session_state.savingsGoalAmount = draft.goal_amount
+    if draft.settings_changed:
+        st.session_state.autoSavePercent = draft.auto_save_percent
+        st.session_state.userCategories = draft.categories
+    if draft.new_rules:
+        sync_recurring()
+    for level, text in draft.messages:
+        getattr(st, level)(text)
+
+def run_draft(fn, *args):
+    """Run one engine operation (used by the forms) and persist it."""
+    draft = new_draft()
+    try:
+        fn(draft, *args)
+    except CommandError as e:
+        getattr(st, e.level)(str(e))
         return
-    cmd = parts[0].lower()
+    apply_draft(draft)
 
-    def _to_amount(i=1):
-        if len(parts) <= i:
-            st.error("Missing amount.")
-            return None
+def _cmd_theme(parts, cmd_str):
+    if len(parts) < 2:
+        st.error("Usage: theme THEME_NAME")
+        return
+    want = " ".join(parts[1:])
+    preset = _match_preset(want)
+    if not preset:
+        st.error("Unknown theme. Available: " + ", ".join(PRESET_THEMES.keys()))
+        return
+    sel = PRESET_THEMES[preset]
+    st.session_state.theme_bg = sel["bg"]
+    st.session_state.theme_text = sel["text"]
+    save_theme(sel["bg"], sel["text"])
+    apply_theme_css(sel["bg"], sel["text"])
+    st.success(f"Theme set to “{preset}”.")
+    return True
+
+@profiler.timed()
+def category_breakdown_ui(txns):
+    breakdown = get_categorizer(st.session_state.userCategories).breakdown(txns)
+    total = sum(breakdown.values())
+    if total <= 0:
+        st.caption("No spending in this range to categorize.")
+        return
+    for cat, amt in breakdown.items():
+        st.progress(amt / total, text=f"{cat} — ${amt:,.2f} ({amt / total * 100:.0f}%)")
+
+def _cmd_report(parts, cmd_str):
+    rng = parts[1].lower() if len(parts) > 1 else "month"
+    td = _range_from_token(rng)
+    since_dt = None if td is None else datetime.now() - td
+    txns = filter_txns(load_txns(), since_dt)
+    totals = totals_from_txns(txns)
+    st.write(f"**Report ({rng})**")
+    c1, c2, c3, c4 = st.columns(4)
+    c1.metric("Added", f"${totals['Added']:,.2f}")
+    c2.metric("Spent", f"${totals['Spent']:,.2f}")
+    c3.metric("Saved", f"${totals['Saved']:,.2f}")
+    c4.metric("Moved Back", f"${totals['Moved Back']:,.2f}")
+    category_breakdown_ui(txns)
+    if st.session_state.savingsGoalAmount:
+        eta = describe_eta(goal_eta(st.session_state.amountInSavings, st.session_state.savingsGoalAmount, STORE.load_rate_state()))
+        st.caption(f"Goal “{st.session_state.savingsGoalName}”: {eta}")
+
+def _cmd_undo(parts, cmd_str):
+    return undo_last_txn()
+
+def _cmd_help(parts, cmd_str):
+    st.info("Commands:\n- add AMOUNT\n- save AMOUNT [note]\n- spend AMOUNT [note]\n- back AMOUNT [note]\n- goal AMOUNT [\"NAME\"]\n- autosave PERCENT (e.g., 20 or 20%)\n- delete money account AMOUNT | delete money savings AMOUNT | delete money all\n- report [24h|week|month|year|5y|lifetime]\n- category \"NAME\" KEYWORD [KEYWORD...]\n- add|spend|save AMOUNT [note] every DAY|daily|weekly|monthly\n- recurring | recurring stop NUMBER\n- theme THEME_NAME  (e.g., theme Dark)\n- undo\n- help\n\nRun several money commands at once with ; or new lines, e.g. add 200; spend 12 lunch; save 50")
+
+def _cmd_unknown(parts, cmd_str):
+    log_path = Path("pages/budgeter_unknown_commands.txt")
+    with log_path.open("a", encoding="utf-8") as f:
+        f.write(f"{datetime.now().isoformat(timespec='seconds')}\t{cmd_str}\n")
+    pending = st.session_state.get("buddy_request")
+    if pending and not pending.done():
+        pending.cancel()
+    # Runs on a worker thread; buddy_panel() below picks up the answer.
+    st.session_state.buddy_request = BuddyRequest(BACKEND, cmd_str)
+
+# Commands that only touch the page itself; money/goal/autosave commands live in
+# budgeter.commands.REGISTRY and can be batched. A handler returns True when the
+# page has to rerun, which handle_command does once after the last statement.
+UI_COMMANDS = {"theme": _cmd_theme, "report": _cmd_report, "undo": _cmd_undo, "help": _cmd_help}
+
+@profiler.timed()
+def handle_command(cmd_str: str):
+    statements = split_script(cmd_str)
+    if not statements:
+        st.warning("Please enter a command.")
+        return
+    if any(is_engine_command(stmt) for stmt in statements):
         try:
-            return float(parts[i].rstrip("%"))
-        except Exception:
-            st.error("Amount must be a number.")
-            return None
-
-    if cmd in ("add", "deposit"):
-        amt = _to_amount(1)
-        if amt is None or amt <= 0: return
-        st.session_state.amountInAccount += amt
-        log_txn("add", amt)
-        pct = float(st.session_state.autoSavePercent or 0.0)
-        pct = max(0.0, min(pct, 100.0))
-        auto_move = round(amt * (pct / 100.0), 2)
-        if auto_move > 0:
-            auto_move = min(auto_move, st.session_state.amountInAccount)
-            st.session_state.amountInAccount -= auto_move
-            st.session_state.amountInSavings += auto_move
-            log_txn("auto_move_to_savings", auto_move)
-            st.info(f"Auto-saved {pct:.0f}% (${auto_move:,.2f}) from this deposit.")
-        save_persisted()
-        st.success(f"Added ${amt:,.2f}. Account: ${st.session_state.amountInAccount:,.2f}")
-
-    elif cmd in ("save", "move", "mv"):
-        amt = _to_amount(1)
-        if amt is None or amt <= 0: return
-        amt = min(amt, st.session_state.amountInAccount)
-        if amt <= 0:
-            st.warning("No available balance to move."); return
-        st.session_state.amountInAccount -= amt
-        st.session_state.amountInSavings += amt
-        note = " ".join(parts[2:]) if len(parts) > 2 else ""
-        log_txn("move_to_savings", amt, note=note)
-        save_persisted()
-        st.success(f"Saved ${amt:,.2f}.")
-
-    elif cmd in ("spend", "pay"):
-        amt = _to_amount(1)
-        if amt is None or amt <= 0: return
-        amt = min(amt, st.session_state.amountInAccount)
-        if amt <= 0:
-            st.warning("No available balance to spend."); return
-        st.session_state.amountInAccount -= amt
-        note = " ".join(parts[2:]) if len(parts) > 2 else ""
-        log_txn("spend", amt, note=note)
-        save_persisted()
-        st.success(f"Spent ${amt:,.2f}.")
-
-    elif cmd in ("back", "return", "withdraw"):
-        amt = _to_amount(1)
-        if amt is None or amt <= 0: return
-        amt = min(amt, st.session_state.amountInSavings)
-        if amt <= 0:
-            st.warning("No savings available to move back."); return
-        st.session_state.amountInAccount += amt
-        st.session_state.amountInSavings -= amt
-        note = " ".join(parts[2:]) if len(parts) > 2 else ""
-        log_txn("move_to_account", amt, note=note)
-        save_persisted()
-        st.success(f"Moved back ${amt:,.2f} to account.")
-
-    elif cmd == "goal":
-        amt = _to_amount(1)
-        if amt is None or amt < 0: return
-        name = " ".join(parts[2:]) if len(parts) > 2 else st.session_state.savingsGoalName or "My Goal"
-        st.session_state.savingsGoalAmount = float(amt)
-        st.session_state.savingsGoalName = name
-        save_goal()
-        st.success(f"Goal set: {name} — ${amt:,.2f}")
-
-    elif cmd == "autosave":
-        pct = _to_amount(1)
-        if pct is None or pct < 0: return
-        pct = max(0.0, min(pct, 100.0))
-        st.session_state.autoSavePercent = float(pct)
-        save_settings()
-        st.success(f"Auto-save set to {pct:.0f}% of each deposit.")
-
-    elif cmd == "theme":
-        if len(parts) < 2:
-            st.error("Usage: theme THEME_NAME")
-            return
-        want = " ".join(parts[1:])
-        preset = _match_preset(want)
-        if not preset:
-            st.error("Unknown theme. Available: " + ", ".join(PRESET_THEMES.keys()))
+            draft = run_script(cmd_str, new_draft())
+        except CommandError as e:
+            getattr(st, e.level)(str(e))
             return
-        sel = PRESET_THEMES[preset]
-        st.session_state.theme_bg = sel["bg"]
-        st.session_state.theme_text = sel["text"]
-        save_theme(sel["bg"], sel["text"])
-        apply_theme_css(sel["bg"], sel["text"])
-        st.success(f"Theme set to “{preset}”.")
+        apply_draft(draft)
+        return
+
+    rerun = False
+    for stmt in statements:
+        try:
+            parts = shlex.split(stmt)
+        except ValueError:
+            st.error(f"Couldn't parse `{stmt}`. Try quotes around names, e.g., goal 3000 \"New laptop\".")
+            continue
+        rerun = bool(UI_COMMANDS.get(parts[0].lower(), _cmd_unknown)(parts, stmt)) or rerun
+    if rerun:
         try: st.rerun()
         except Exception: st.experimental_rerun()
 
-    elif cmd in ("delete", "clear", "wipe") and len(parts) >= 2 and parts[1].lower() == "money":
-        if len(parts) >= 3 and parts[2].lower() in ("account", "acc", "a"):
-            if len(parts) < 4:
-                st.error("Usage: delete money account AMOUNT"); return
-            amt = _to_amount(3)
-            if amt is None or amt <= 0: return
-            amt = min(amt, st.session_state.amountInAccount)
-            st.session_state.amountInAccount -= amt
-            save_persisted()
-            st.success(f"Deleted ${amt:,.2f} from Account balance.")
-        elif len(parts) >= 3 and parts[2].lower() in ("savings", "sav", "s"):
-            if len(parts) < 4:
-                st.error("Usage: delete money savings AMOUNT"); return
-            amt = _to_amount(3)
-            if amt is None or amt <= 0: return
-            amt = min(amt, st.session_state.amountInSavings)
-            st.session_state.amountInSavings -= amt
-            save_persisted()
-            st.success(f"Deleted ${amt:,.2f} from Savings balance.")
-        elif len(parts) >= 3 and parts[2].lower() in ("all", "both"):
-            st.session_state.amountInAccount = 0.0
-            st.session_state.amountInSavings = 0.0
-            save_persisted()
-            st.success("Deleted all money from Account and Savings (history retained).")
-        else:
-            st.info("Usage:\n- delete money account AMOUNT\n- delete money savings AMOUNT\n- delete money all")
-
-    elif cmd == "report":
-        rng = parts[1].lower() if len(parts) > 1 else "month"
-        td = _range_from_token(rng)
-        since_dt = None if td is None else datetime.now() - td
-        txns = filter_txns(load_txns(), since_dt)
-        totals = totals_from_txns(txns)
-        st.write(f"**Report ({rng})**")
-        c1, c2, c3, c4 = st.columns(4)
-        c1.metric("Added", f"${totals['Added']:,.2f}")
-        c2.metric("Spent", f"${totals['Spent']:,.2f}")
-        c3.metric("Saved", f"${totals['Saved']:,.2f}")
-        c4.metric("Moved Back", f"${totals['Moved Back']:,.2f}")
-
-    elif cmd == "undo":
-        if undo_last_txn():
-            try: st.rerun()
-            except Exception: st.experimental_rerun()
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
 
-    elif cmd == "help":
-        st.info("Commands:\n- add AMOUNT\n- save AMOUNT [note]\n- spend AMOUNT [note]\n- back AMOUNT [note]\n- goal AMOUNT [\"NAME\"]\n- autosave PERCENT (e.g., 20 or 20%)\n- delete money account AMOUNT | delete money savings AMOUNT | delete money all\n- report [24h|week|month|year|5y|lifetime]\n- theme THEME_NAME  (e.g., theme Dark)\n- undo\n- help")
+def _drop_buddy_request(note: str = None):
+    # Button callback: runs before the rerun, so the panel is already gone when it draws.
+    req = st.session_state.pop("buddy_request", None)
+    if req is not None and not req.done():
+        req.cancel()
+    if note:
+        st.toast(note)
+
+def _buddy_panel_body():
+    req = st.session_state.get("buddy_request")
+    if st.session_state.get("buddy_polling") and (req is None or req.done()):
+        # run_every was fixed when the page last ran in full; rerun it to stop polling.
+        st.session_state.buddy_polling = False
+        try: st.rerun(scope="app")
+        except TypeError: st.rerun()
+    if req is None:
+        return
+    if not req.done():
+        c1, c2 = st.columns([0.7, 0.3], vertical_alignment="center")
+        c1.info(f"💬 Budget Buddy is thinking about “{req.command}”… ({req.elapsed():.0f}s)")
+        c2.button("Cancel", key="buddy_cancel", use_container_width=True, on_click=_drop_buddy_request, args=("Request cancelled.",))
+        return
+    if not getattr(req, "profiled", False) and profiler.enabled():
+        profiler.record("budget_buddy (backend)", req.duration or 0.0, page="budgeter")
+        req.profiled = True
+    advice, err = req.result()
+    if err is not None:
+        st.error(f"Could not reach Budget Buddy API: {err}")
     else:
-        log_path = Path("pages/budgeter_unknown_commands.txt")
-        with log_path.open("a", encoding="utf-8") as f:
-            f.write(f"{datetime.now().isoformat(timespec='seconds')}\t{cmd_str}\n")
-        try:
-            resp = requests.post(f"{BACKEND}/api/budget-buddy",
-                                 json={"user_id": "demo", "command": cmd_str}, timeout=15)
-            resp.raise_for_status()
-            data = resp.json()
-            st.info(f"Feedback: {data.get('advice', '(no advice)')}")
-        except Exception as e:
-            st.error(f"Could not reach Budget Buddy API: {e}")
+        st.info(f"Feedback: {advice}")
+    st.button("Dismiss", key="buddy_dismiss", on_click=_drop_buddy_request)
+
+def buddy_panel():
+    """Budget Buddy status; polls on its own so the rest of the page stays interactive."""
+    pending = st.session_state.get("buddy_request") is not None and not st.session_state.buddy_request.done()
+    if _fragment is None:
+        _buddy_panel_body()
+        return
+    st.session_state.buddy_polling = pending
+    _fragment(run_every=1 if pending else None)(_buddy_panel_body)()
 
 if "bootstrapped" not in st.session_state:
-    acc, sav = load_persisted()
+    with profiler.span("bootstrap_balances"):
+        acc, sav = bootstrap_balances(STORE)
     st.session_state.amountInAccount = acc
     st.session_state.amountInSavings = sav
     st.session_state.bootstrapped = True
+sync_recurring()
+
+def refresh_from_store():
+    """Take balances, goal, settings and theme from the store after an outside write."""
+    st.session_state.amountInAccount, st.session_state.amountInSavings = load_persisted()
+    st.session_state.savingsGoalName, st.session_state.savingsGoalAmount = load_goal()
+    st.session_state.autoSavePercent = load_settings()
+    st.session_state.userCategories = load_user_categories()
+    st.session_state.theme_bg, st.session_state.theme_text = load_theme()
+
+# Another tab, the backend or a scheduled transaction may have written since the
+# last rerun; polling is a few stat() calls and nothing is re-parsed if not.
+_generation = DATA.poll()
+if st.session_state.get("data_generation") != _generation:
+    if "data_generation" in st.session_state:
+        refresh_from_store()
+    st.session_state.data_generation = _generation
 
 if "settings_bootstrapped" not in st.session_state:
     st.session_state.autoSavePercent = load_settings()
+    st.session_state.userCategories = load_user_categories()
     st.session_state.settings_bootstrapped = True
 
 if "theme_bootstrapped" not in st.session_state:
@@ -515,6 +507,15 @@ with cmd_col:
             if run_cmd and cmd_input.strip():
                 handle_command(cmd_input.strip())
 
+        buddy_panel()
+
+        with st.expander("Batch Script"):
+            with st.form("script_form", clear_on_submit=True):
+                script_input = st.text_area("One command per line (or separated by ;)", height=140, placeholder="add 200\nspend 12 lunch\nsave 50")
+                run_script_btn = st.form_submit_button("Run Script", use_container_width=True)
+                if run_script_btn and script_input.strip():
+                    handle_command(script_input.strip())
+
         with st.expander("Command Help"):
             st.markdown(
                 """
@@ -527,10 +528,15 @@ with cmd_col:
 - `autosave PERCENT` (0–100, e.g., `autosave 20` or `autosave 20%`)
 - `delete money account AMOUNT` • `delete money savings AMOUNT` • `delete money all`
 - `report 24h|week|month|year|5y|lifetime`
+- `category "NAME" KEYWORD [KEYWORD...]` — teach the spending categorizer new words
+- `add 20 every friday` • `spend 9.99 monthly spotify` — schedule a recurring transaction
+- `recurring` • `recurring stop NUMBER` — list or stop scheduled transactions
 - `theme THEME_NAME` — choose one of:
   - Light, Soft Gray, Dark, Midnight, Ocean, Forest, Plum, Sepia, Solarized Light, Solarized Dark, High Contrast, Night Owl, Sand
 - `undo`
 - `help`
+
+Batch money, goal and autosave commands with `;` or new lines — e.g. `add 200; spend 12 lunch; save 50`. The whole batch is checked first and saved in one go.
                 """
             )
 
@@ -567,6 +573,8 @@ with main_col:
         st.caption(f"${st.session_state.amountInSavings:,.2f} / ${st.session_state.savingsGoalAmount:,.2f}")
         if pct_goal >= 100:
             st.success("🎉 Goal reached!")
+        else:
+            st.caption(describe_eta(goal_eta(st.session_state.amountInSavings, st.session_state.savingsGoalAmount, STORE.load_rate_state())))
     else:
         st.info("Set a savings goal to see your progress.")
 
@@ -577,55 +585,28 @@ with main_col:
             add_amt = st.number_input("Enter amount to add", min_value=0.0, step=1.0, key="add_amount")
             submit_add = st.form_submit_button("💲 Add Money", use_container_width=True)
             if submit_add and add_amt > 0:
-                add_amt = float(add_amt)
-                st.session_state.amountInAccount += add_amt
-                log_txn("add", add_amt)
-                pct = float(st.session_state.autoSavePercent or 0.0)
-                pct = max(0.0, min(pct, 100.0))
-                auto_move = round(add_amt * (pct / 100.0), 2)
-                if auto_move > 0:
-                    auto_move = min(auto_move, st.session_state.amountInAccount)
-                    st.session_state.amountInAccount -= auto_move
-                    st.session_state.amountInSavings += auto_move
-                    log_txn("auto_move_to_savings", auto_move)
-                    st.info(f"Auto-saved {pct:.0f}% (${auto_move:,.2f}) from this deposit.")
-                save_persisted()
-                st.success(f"Balance: ${st.session_state.amountInAccount:,.2f}")
+                run_draft(op_add, float(add_amt))
 
     with colSavings:
         with st.form("savings_form", clear_on_submit=True):
-            move_to_savings_amt = st.number_input("Amount to move to savings", min_value=0.0, max_value=float(st.session_state.amountInAccount), step=1.0, key="move_amount")
+            move_to_savings_amt = st.number_input("Amount to move to savings", min_value=0.0, max_value=max(float(st.session_state.amountInAccount), 0.0), step=1.0, key="move_amount")
             submit_move = st.form_submit_button("🏦 Move Money To Savings", use_container_width=True)
             if submit_move and move_to_savings_amt > 0:
-                move_to_savings_amt = float(move_to_savings_amt)
-                st.session_state.amountInAccount -= move_to_savings_amt
-                st.session_state.amountInSavings += move_to_savings_amt
-                log_txn("move_to_savings", move_to_savings_amt)
-                save_persisted()
-                st.success(f"Moved ${move_to_savings_amt:,.2f} to savings.")
+                run_draft(op_save, float(move_to_savings_amt))
 
     with colSpent:
         with st.form("spend_form", clear_on_submit=True):
-            spend_amt = st.number_input("Record spending", min_value=0.0, max_value=float(st.session_state.amountInAccount), step=1.0, key="spend_amount")
+            spend_amt = st.number_input("Record spending", min_value=0.0, max_value=max(float(st.session_state.amountInAccount), 0.0), step=1.0, key="spend_amount")
             submit_spend = st.form_submit_button("🧾 Record Spending", use_container_width=True)
             if submit_spend and spend_amt > 0:
-                spend_amt = float(spend_amt)
-                st.session_state.amountInAccount -= spend_amt
-                log_txn("spend", spend_amt)
-                save_persisted()
-                st.success(f"Spent ${spend_amt:,.2f}")
+                run_draft(op_spend, float(spend_amt))
 
     with colSaveToAccount:
         with st.form("back_to_account_form", clear_on_submit=True):
-            move_to_account_amt = st.number_input("Amount to move back to account", min_value=0.0, max_value=float(st.session_state.amountInSavings), step=1.0, key="move_to_account_amount")
+            move_to_account_amt = st.number_input("Amount to move back to account", min_value=0.0, max_value=max(float(st.session_state.amountInSavings), 0.0), step=1.0, key="move_to_account_amount")
             submit_move_back = st.form_submit_button("📉 Move Money To Account", use_container_width=True)
             if submit_move_back and move_to_account_amt > 0:
-                move_to_account_amt = float(move_to_account_amt)
-                st.session_state.amountInAccount += move_to_account_amt
-                st.session_state.amountInSavings -= move_to_account_amt
-                log_txn("move_to_account", move_to_account_amt)
-                save_persisted()
-                st.success(f"Moved ${move_to_account_amt:,.2f} back to your account.")
+                run_draft(op_back, float(move_to_account_amt))
 
     st.subheader("Balances")
     st.metric("Account", f"${st.session_state.amountInAccount:,.2f}")
@@ -660,6 +641,44 @@ with main_col:
             save_settings()
             st.success(f"Auto-save set to {st.session_state.autoSavePercent:.0f}% of each deposit.")
 
+    st.subheader("Import Bank Statement")
+    with st.expander("Import transactions from a CSV export"):
+        st.caption("Positive amounts (or credits) are recorded as deposits, negative amounts (or debits) as spending. Rows already in your history are skipped.")
+        csv_file = st.file_uploader("Bank statement CSV", type=["csv"], key="import_csv")
+        if csv_file is not None:
+            header = read_header(csv_file)
+            guessed = guess_mapping(header)
+            options = ["(none)"] + header
+            mapping = {}
+            mc1, mc2, mc3 = st.columns(3)
+            for col, field, label in [(mc1, "date", "Date column"), (mc2, "amount", "Amount column"), (mc3, "note", "Description column"),
+                                      (mc1, "debit", "Debit column"), (mc2, "credit", "Credit column"), (mc3, "type", "Type column")]:
+                default = guessed.get(field)
+                choice = col.selectbox(label, options, index=options.index(default) if default in options else 0, key=f"import_map_{field}")
+                mapping[field] = None if choice == "(none)" else choice
+            allow_overdraw = st.checkbox("Import even if my account goes below $0", key="import_overdraw")
+            if st.button("📥 Import Statement", use_container_width=True):
+                if not mapping["date"] or not (mapping["amount"] or mapping["debit"] or mapping["credit"]):
+                    st.error("Pick a date column and an amount (or debit/credit) column.")
+                else:
+                    bar = st.progress(0.0, text="Importing…")
+                    try:
+                        summary, (acc, sav) = import_csv(
+                            STORE, csv_file, mapping,
+                            account=st.session_state.amountInAccount, savings=st.session_state.amountInSavings,
+                            progress=lambda rows, frac: bar.progress(frac, text=f"Read {rows:,} rows…"),
+                            allow_overdraw=allow_overdraw,
+                        )
+                    except OverdrawError as e:
+                        bar.empty()
+                        st.warning(f"This statement spends more than you have: your account would end at ${e.account:,.2f}. "
+                                   "Nothing was imported. Add your opening balance first, or tick the box above to import anyway.")
+                    else:
+                        bar.progress(1.0, text=f"Read {summary.rows:,} rows.")
+                        st.session_state.amountInAccount, st.session_state.amountInSavings = acc, sav
+                        st.success(f"Imported {summary.imported:,} transactions (+${summary.added:,.2f} / -${summary.spent:,.2f}). "
+                                   f"Skipped {summary.duplicates:,} duplicates and {summary.skipped:,} unreadable rows.")
+
     st.subheader("Reports")
     range_choice = st.selectbox("Choose time range", ("Last 24 hours", "Last week", "Last month", "Last year", "Last 5 years", "Lifetime"), index=2)
 
@@ -679,18 +698,66 @@ with main_col:
         c2.metric("Spent", f"${totals['Spent']:,.2f}")
         c3.metric("Saved", f"${totals['Saved']:,.2f}")
         c4.metric("Moved Back", f"${totals['Moved Back']:,.2f}")
+        st.markdown("**Spending by category**")
+        category_breakdown_ui(sel_txns)
+        st.caption('Categories come from spending notes (e.g. "spend 8 coffee"). Teach new words with: category "Food & Drink" boba')
+
+    st.markdown("**Balance over time**")
+    with profiler.span("balance_series"):
+        series = balance_series(STORE).window(since.timestamp() if since else None)
+    if len(series["time"]) < 2:
+        st.caption("Not enough history in this range to draw a timeline.")
+    else:
+        st.line_chart(series, x="time", y=["Account", "Savings"], height=260)
+
+    with st.expander("Export transaction history"):
+        ec1, ec2 = st.columns(2)
+        export_from = ec1.date_input("From", value=None, key="export_from")
+        export_to = ec2.date_input("To (inclusive)", value=None, key="export_to")
+        export_types = st.multiselect("Types (empty = all)", list(TXN_EFFECTS) + ["adjust"], key="export_types")
+        export_fmt = st.radio("Format", list(FORMATS), horizontal=True, key="export_fmt")
+        if st.button("Prepare export", use_container_width=True):
+            since_iso = export_from.isoformat() if export_from else None
+            until_iso = (export_to + timedelta(days=1)).isoformat() if export_to else None
+            export = spool_export(export_chunks(STORE, export_fmt, since=since_iso, until=until_iso, types=export_types))
+            mime, ext = FORMATS[export_fmt]
+            # Only offered on this run: download_button reads the whole file, so
+            # keeping it around would re-read it on every rerun.
+            try:
+                with export.open() as f:
+                    st.download_button(f"⬇️ Download ({export.size / 1024:,.1f} KB)", data=f, file_name=f"budgeter_transactions_{datetime.now():%Y%m%d}.{ext}",
+                                       mime=mime, use_container_width=True)
+            finally:
+                export.close()
+            st.caption("The download link lasts until your next action on this page.")
 
     st.subheader("Money Composition")
     spent_total = sum(float(t.get("amount", 0.0)) for t in all_txns if t.get("type") == "spend")
     composition_pie_small(account_bal=float(st.session_state.amountInAccount), savings_bal=float(st.session_state.amountInSavings), spent_total=spent_total, title="Account vs Savings vs Spent")
 
     with st.expander("Advanced"):
+        if st.button("Check balances against transaction history", use_container_width=True):
+            report = check_consistency(STORE)
+            ledger_acc, ledger_sav = report["ledger"]
+            if report["ok"]:
+                st.success(f"Balances match the history (replayed {report['replayed']} records since the last checkpoint).")
+            else:
+                d_acc, d_sav = report["drift"]
+                st.warning(f"Drift detected — saved balances differ from history by Account ${d_acc:+,.2f}, Savings ${d_sav:+,.2f}. "
+                           f"History says Account ${ledger_acc:,.2f}, Savings ${ledger_sav:,.2f}.")
+                st.session_state.ledger_balances = (ledger_acc, ledger_sav)
+        lock = LOCK_STATS.snapshot()
+        st.caption(f"Storage locks this process: {lock['acquired']} taken, {lock['contention_rate']:.0%} contended, "
+                   f"avg wait {lock['avg_wait_ms']:.1f} ms (max {lock['max_wait_ms']:.1f} ms), avg hold {lock['avg_held_ms']:.2f} ms.")
+        if "ledger_balances" in st.session_state:
+            if st.button("Rebuild balances from history", use_container_width=True):
+                st.session_state.amountInAccount, st.session_state.amountInSavings = st.session_state.pop("ledger_balances")
+                save_persisted()
+                st.success("Balances rebuilt from transaction history.")
+
         if st.button("RESET ALL BALANCE RELATED DATA (Settings Saved)", use_container_width=True):
-            for f in [DATA_FILE, GOAL_FILE, SETTINGS_FILE, TRANSACTIONS_FILE]:
-                try:
-                    os.remove(f)
-                except FileNotFoundError:
-                    pass
+            STORE.wipe()
+            invalidate_series(STORE)
             st.session_state.amountInAccount = 0.0
             st.session_state.amountInSavings = 0.0
             save_persisted()
@@ -716,11 +783,8 @@ with main_col:
 
         if can_wipe:
             if st.button("🚨 PERMANENTLY DELETE ALL DATA", use_container_width=True):
-                for f in [DATA_FILE, GOAL_FILE, SETTINGS_FILE, TRANSACTIONS_FILE, THEME_FILE]:
-                    try:
-                        os.remove(f)
-                    except FileNotFoundError:
-                        pass
+                STORE.wipe(include_theme=True)
+                invalidate_series(STORE)
                 st.session_state.amountInAccount = 0.0
                 st.session_state.amountInSavings = 0.0
                 st.session_state.savingsGoalName = "My Goal"
@@ -736,3 +800,5 @@ with main_col:
                     st.experimental_rerun()
         else:
             st.info("Complete **all** confirmations to enable the delete button.")
+
+profiler.end()
@@ -1,16 +1,31 @@
 # app.py — Culinary Quest (v13: richer offline food illustrations + stable navigation)
 
 import streamlit as st
-from dataclasses import dataclass
-from typing import List, Dict, Any
+from typing import Dict
 from pathlib import Path
-import json, textwrap
+import html
 from streamlit.components.v1 import html as html_component
 import requests
+import sys
+
+# Pages can be launched on their own (streamlit run pages/...), so make the
+# repo root importable for shared modules.
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+import rerun_profiler as profiler
+from culinary.catalog import SORT_KEYS, Recipe, get_catalog
+from culinary import scenes
+from culinary.library import get_library
+from culinary.normalize import dedupe, request_key
+from culinary.pantry import pantry_index, pantry_mask
+from culinary.search import search_index
+from culinary.static_bundle import get_bundle
 
 BACKEND = "http://127.0.0.1:5000"
 
 st.set_page_config(page_title="Culinary Quest", layout="wide")
+profiler.begin("culinary_quest")
 
 # ---------- CSS ----------
 st.markdown(
@@ -36,289 +51,64 @@ st.markdown(
 )
 
 # ---------- Data ----------
-@dataclass
-class Recipe:
-    name: str
-    steps: List[str]
-    time_min: int
-
-BUILTIN: Dict[str, Recipe] = {
-    "Sandwich": Recipe("Sandwich", [
-        "Lay out two slices of bread.",
-        "Add fillings (cheese/meat/veg).",
-        "Add sauce or spread.",
-        "Close and press gently.",
-        "Cut and serve.",
-    ], 6),
-    "Oatmeal": Recipe("Oatmeal", [
-        "Bring milk or water to a simmer.",
-        "Stir in oats.",
-        "Cook 3–5 minutes, stirring occasionally.",
-        "Sweeten and add toppings.",
-        "Serve warm.",
-    ], 7),
-    "Omelete": Recipe("Omelete", [
-        "Whisk eggs with a pinch of salt.",
-        "Pour into a buttered pan on medium-low.",
-        "When almost set, add fillings.",
-        "Fold over and cook 30–60 sec.",
-        "Slide onto a plate and serve.",
-    ], 8),
-    "Grilled Cheese Sandwich": Recipe("Grilled Cheese Sandwich", [
-        "Butter the outside of two bread slices.",
-        "Place cheese between the unbuttered sides.",
-        "Heat pan on medium and add sandwich.",
-        "Cook 2–3 min each side until golden and melty.",
-        "Rest 1 minute, slice diagonally, serve.",
-    ], 8),
-    "Fruit Salad": Recipe("Fruit Salad", [
-        "Rinse and dry all fruit.",
-        "Chop fruit into bite-size pieces.",
-        "Add a squeeze of lemon and a teaspoon of honey.",
-        "Gently toss to coat evenly.",
-        "Chill 5 minutes and serve.",
-    ], 10),
-    "Cheese Quesadilla": Recipe("Cheese Quesadilla", [
-        "Place tortilla in a pan over medium heat.",
-        "Sprinkle cheese evenly over tortilla.",
-        "Fold tortilla in half.",
-        "Cook 2–3 min per side until cheese melts.",
-        "Cut into wedges and serve.",
-    ], 7),
-    "Pasta Marinara": Recipe("Pasta Marinara", [
-        "Boil salted water and cook pasta al dente.",
-        "Warm marinara in a pan; add a splash of pasta water.",
-        "Drain pasta and toss with sauce.",
-        "Finish with olive oil and basil.",
-        "Plate and sprinkle with parmesan.",
-    ], 18),
-}
-
-def _from_obj(obj: Dict[str, Any]) -> Dict[str, Recipe]:
-    out: Dict[str, Recipe] = {}
-    for k, v in obj.items():
-        try:
-            name = v.get("name", k)
-            steps = [str(s) for s in v.get("steps", [])]
-            if not steps:
-                continue
-            time_min = int(v.get("time_min", max(5, len(steps) * 2)))
-            out[name] = Recipe(name, steps, time_min)
-        except Exception:
-            continue
-    return out
-
-def load_user_recipes_file(path: Path) -> Dict[str, Recipe]:
-    try:
-        if not path.exists() or not path.is_file():
-            return {}
-        data = json.loads(path.read_text(encoding="utf-8"))
-        if isinstance(data, dict):
-            return _from_obj(data)
-        if isinstance(data, list):
-            obj = {r.get("name", f"Recipe {i+1}"): r for i, r in enumerate(data) if isinstance(r, dict)}
-            return _from_obj(obj)
-    except Exception:
-        pass
-    return {}
+# Parsed once per process and re-read only when a recipe file changes.
+CATALOG = get_catalog()
+# Recipes Pocket Chef made before, in any session; also part of the catalog.
+AI_LIBRARY = get_library()
 
+@profiler.timed()
 def get_all_recipes() -> Dict[str, Recipe]:
-    recipes: Dict[str, Recipe] = dict(BUILTIN)
-    for p in [
-        Path("recipes.json"),
-        Path("data/recipes.json"),
-        Path("assets/recipes.json"),
-        Path("original_recipes.json"),
-        Path("originals.json"),
-    ]:
-        recipes.update(load_user_recipes_file(p))
-    d = Path("recipes")
-    if d.exists():
-        for jf in sorted(d.glob("*.json")):
-            recipes.update(load_user_recipes_file(jf))
-    return recipes
+    """Every recipe on disk; shared across sessions, so don't modify it."""
+    return CATALOG.recipes()
+
+def find_recipe(key: str):
+    """The session's AI recipe or a catalog recipe by name (None if unknown)."""
+    ai = st.session_state.get("ai_recipe")
+    if ai and ai["name"] == key:
+        return Recipe(ai["name"], ai["steps"], ai["time_min"])
+    return CATALOG.get(key)
 
 # ---------- Offline SVG step illustrations ----------
 def svg_html(svg: str, height: int = 320):
     html_component(svg, height=height, scrolling=False)
 
-def wrap_lines(text: str, width: int = 44) -> List[str]:
-    return textwrap.wrap(text, width=width)[:3]
-
-def kind_from_text(text: str) -> str:
-    t = text.lower()
-    if any(k in t for k in ["chop", "slice", "cut", "dice"]): return "chop"
-    if any(k in t for k in ["boil", "simmer", "water", "al dente"]): return "boil"
-    if any(k in t for k in ["pan", "toast", "sear", "fry", "griddle", "butter", "golden"]): return "pan"
-    if any(k in t for k in ["mix", "toss", "combine", "bowl", "stir"]): return "mix"
-    if any(k in t for k in ["serve", "plate", "cut"]): return "serve"
-    return "prep"
-
-def scene(recipe: str, text: str) -> str:
-    """Return a detailed SVG <g> that includes FOOD + tools based on recipe + step text."""
-    r = recipe.lower()
-    k = kind_from_text(text)
-
-    # shared shapes
-    plate = "<ellipse cx='500' cy='220' rx='200' ry='26' fill='#e2e8f0'/>"
-    steam = (
-        "<g opacity='.8' fill='none' stroke='#94a3b8' stroke-width='3'>"
-        "<path d='M420 110 q20 -20 0 -40'/>"
-        "<path d='M455 110 q20 -20 0 -40'/>"
-        "<path d='M490 110 q20 -20 0 -40'/>"
-        "</g>"
-    )
+@profiler.timed()
+def step_svg(recipe: str, step_idx: int, total: int, text: str) -> str:
+    return scenes.step_svg(recipe, step_idx, total, text)
 
-    if "sandwich" in r:
-        bread_bottom = "<rect x='390' y='170' width='220' height='40' rx='10' fill='#fef3c7' stroke='#f59e0b'/>"
-        bread_top    = "<rect x='390' y='140' width='220' height='38' rx='10' fill='#fde68a' stroke='#f59e0b'/>"
-        cheese       = "<rect x='410' y='160' width='180' height='16' rx='4' fill='#facc15'/>"
-        lettuce      = "<path d='M410 182 q20 -12 40 0 t40 0 t40 0 t40 0' fill='#22c55e'/>"
-        tomato1      = "<circle cx='445' cy='172' r='8' fill='#ef4444'/>"
-        tomato2      = "<circle cx='505' cy='172' r='8' fill='#ef4444'/>"
-        sauce        = "<path d='M430 150 q30 10 60 0 q30 -10 60 0' fill='#f43f5e' opacity='.7'/>"
-
-        if "add fillings" in r or "fillings" in text.lower():
-            return plate + bread_bottom + cheese + lettuce + tomato1 + tomato2
-        if "sauce" in text.lower() or "spread" in text.lower():
-            return plate + bread_bottom + sauce
-        if "close" in text.lower() or "press" in text.lower():
-            arrow = "<polygon points='610,150 640,165 610,180' fill='#334155'/>"
-            return plate + bread_bottom + cheese + lettuce + tomato1 + tomato2 + arrow + bread_top
-        if "cut" in text.lower() or "serve" in text.lower():
-            tri1 = "<polygon points='470,160 610,160 540,220' fill='#fde68a' stroke='#f59e0b'/>"
-            tri2 = "<polygon points='470,160 400,220 540,220' fill='#f59e0b' opacity='.35'/>"
-            return plate + tri1 + tri2
-        # lay out bread
-        return plate + bread_top + bread_bottom
-
-    if "quesadilla" in r:
-        tortilla   = "<circle cx='500' cy='180' r='90' fill='#fde68a' stroke='#eab308'/>"
-        cheese     = "<path d='M500 100 l70 80 l-140 0 z' fill='#facc15' opacity='.9'/>"
-        pan        = "<rect x='360' y='200' width='280' height='34' rx='18' fill='#475569'/><rect x='620' y='208' width='80' height='10' rx='5' fill='#475569'/>"
-        if "fold" in text.lower():
-            fold = "<path d='M500 90 q90 90 0 180 q-90 -90 0 -180' fill='#fef08a' opacity='.9'/>"
-            return pan + tortilla + cheese + fold
-        if "cut" in text.lower() or "serve" in text.lower():
-            wedge = "<path d='M500 90 A90 90 0 0 1 590 180 L500 180 Z' fill='#facc15'/>"
-            return plate + tortilla + wedge
-        return pan + tortilla + cheese + steam
-
-    if "oat" in r:
-        bowl = "<ellipse cx='500' cy='210' rx='160' ry='24' fill='#cbd5e1'/><path d='M360 180 q140 80 280 0 v30 q-140 80 -280 0 z' fill='#e2e8f0'/>"
-        oats = "<ellipse cx='500' cy='175' rx='140' ry='26' fill='#fde68a' stroke='#f59e0b'/>"
-        berries = "<circle cx='460' cy='170' r='8' fill='#ef4444'/><circle cx='515' cy='178' r='7' fill='#a855f7'/><circle cx='550' cy='170' r='6' fill='#ef4444'/>"
-        spoon = "<rect x='580' y='120' width='14' height='70' rx='7' fill='#9ca3af'/><circle cx='587' cy='118' r='12' fill='#9ca3af'/>"
-        pot = "<rect x='420' y='140' width='160' height='60' rx='8' fill='#64748b'/><rect x='450' y='120' width='100' height='18' rx='8' fill='#64748b'/>"
-        if "simmer" in text.lower():
-            return pot + steam
-        if "stir" in text.lower():
-            return bowl + oats + spoon
-        if "sweeten" in text.lower() or "toppings" in text.lower():
-            honey = "<path d='M400 120 q30 20 60 0 q30 -20 60 0' stroke='#f59e0b' stroke-width='6' fill='none'/>"
-            return bowl + oats + berries + honey
-        return bowl + oats + berries
-
-    if "omelet" in r or "omelete" in r or "omelette" in r:
-        pan = "<rect x='360' y='200' width='280' height='36' rx='18' fill='#475569'/><rect x='620' y='208' width='80' height='10' rx='5' fill='#475569'/>"
-        eggs = "<ellipse cx='460' cy='150' rx='26' ry='20' fill='#fef3c7' stroke='#f59e0b'/><ellipse cx='510' cy='150' rx='26' ry='20' fill='#fef3c7' stroke='#f59e0b'/>"
-        whisk = "<rect x='560' y='120' width='8' height='70' rx='4' fill='#9ca3af'/><path d='M564 120 q-18 12 -18 40 q0 28 18 40 q18 -12 18 -40 q0 -28 -18 -40' fill='none' stroke='#9ca3af' stroke-width='4'/>"
-        fold = "<path d='M420 180 q80 -60 160 0 q-80 60 -160 0' fill='#fde68a' stroke='#f59e0b'/>"
-        fill = "<circle cx='500' cy='170' r='8' fill='#10b981'/><rect x='520' y='166' width='26' height='10' rx='5' fill='#facc15'/>"
-        if "whisk" in text.lower():
-            return eggs + whisk + plate
-        if "add fillings" in text.lower() or "fillings" in text.lower():
-            return pan + fold + fill
-        if "fold" in text.lower():
-            return pan + fold + steam
-        if "slide" in text.lower() or "serve" in text.lower():
-            half = "<path d='M440 170 q60 -40 120 0 q-60 40 -120 0' fill='#fde68a' stroke='#f59e0b'/>"
-            return plate + half + fill
-        return pan + fold
-
-    if "pasta" in r or "marinara" in r:
-        pot = "<rect x='400' y='140' width='200' height='70' rx='10' fill='#475569'/><rect x='430' y='120' width='140' height='20' rx='8' fill='#475569'/>"
-        noodles = "".join(f"<rect x='{420+i*16}' y='146' width='10' height='60' rx='5' fill='#fde68a'/>" for i in range(10))
-        sauce = "<rect x='430' y='150' width='140' height='20' rx='8' fill='#ef4444' opacity='.9'/>"
-        ladle = "<rect x='580' y='120' width='10' height='60' rx='5' fill='#9ca3af'/><circle cx='585' cy='185' r='12' fill='#9ca3af'/>"
-        if "boil" in text.lower() or "al dente" in text.lower():
-            return pot + noodles + steam
-        if "toss" in text.lower() or "sauce" in text.lower() or "marinara" in text.lower():
-            return pot + noodles + sauce + ladle
-        if "finish" in text.lower():
-            basil = "<path d='M470 150 q10 -10 20 0 q-10 10 -20 0' fill='#22c55e'/>"
-            return pot + noodles + sauce + basil
-        if "plate" in text.lower() or "serve" in text.lower():
-            nest = "<circle cx='500' cy='180' r='70' fill='#fde68a' opacity='.9'/><path d='M440 180 q60 30 120 0' stroke='#f59e0b' stroke-width='6' fill='none'/>"
-            return plate + nest + "<circle cx='500' cy='180' r='18' fill='#ef4444'/>"
-        return pot + noodles
-
-    if "fruit" in r:
-        board = "<rect x='370' y='150' width='260' height='70' rx='12' fill='#fcd34d' stroke='#f59e0b'/>"
-        kiwi  = "<circle cx='410' cy='185' r='16' fill='#22c55e'/><circle cx='410' cy='185' r='6' fill='#065f46'/>"
-        berry = "<circle cx='450' cy='178' r='10' fill='#ef4444'/>"
-        banana= "<ellipse cx='520' cy='188' rx='26' ry='12' fill='#fde68a' stroke='#f59e0b'/>"
-        bowl  = "<ellipse cx='500' cy='230' rx='170' ry='22' fill='#cbd5e1'/><path d='M330 200 q170 80 340 0 v30 q-170 80 -340 0 z' fill='#e2e8f0'/>"
-        if "chop" in text.lower() or "slice" in text.lower():
-            knife = "<rect x='575' y='160' width='12' height='60' rx='6' fill='#94a3b8'/><rect x='560' y='180' width='30' height='12' rx='6' fill='#374151'/>"
-            return board + kiwi + berry + banana + knife
-        if "toss" in text.lower() or "mix" in text.lower():
-            spoon = "<rect x='590' y='160' width='12' height='60' rx='6' fill='#94a3b8'/><circle cx='596' cy='156' r='10' fill='#94a3b8'/>"
-            fruit = "<circle cx='480' cy='205' r='10' fill='#ef4444'/><circle cx='520' cy='210' r='10' fill='#22c55e'/>"
-            return bowl + fruit + spoon
-        return board + kiwi + berry + banana
-
-    # generic prep/mix/pan scenes
-    if k == "chop":
-        board = "<rect x='380' y='150' width='240' height='70' rx='12' fill='#fcd34d' stroke='#f59e0b'/>"
-        knife = "<rect x='585' y='160' width='12' height='60' rx='6' fill='#94a3b8'/><rect x='568' y='178' width='32' height='12' rx='6' fill='#374151'/>"
-        veg1  = "<rect x='410' y='175' width='16' height='16' rx='4' fill='#22c55e'/>"
-        veg2  = "<rect x='440' y='175' width='16' height='16' rx='4' fill='#ef4444'/>"
-        return board + veg1 + veg2 + knife
-    if k == "pan":
-        pan = "<rect x='360' y='200' width='280' height='36' rx='18' fill='#475569'/><rect x='620' y='208' width='80' height='10' rx='5' fill='#475569'/>"
-        food= "<rect x='450' y='188' width='100' height='10' rx='5' fill='#facc15'/>"
-        return pan + food + steam
-    if k == "boil":
-        pot = "<rect x='400' y='140' width='200' height='70' rx='10' fill='#475569'/><rect x='430' y='120' width='140' height='20' rx='8' fill='#475569'/>"
-        bubbles = "".join(f"<circle cx='{440+i*24}' cy='168' r='5' fill='#e2e8f0'/>" for i in range(8))
-        return pot + bubbles + steam
-    if k == "mix":
-        bowl = "<ellipse cx='500' cy='210' rx='160' ry='24' fill='#cbd5e1'/><path d='M360 180 q140 80 280 0 v30 q-140 80 -280 0 z' fill='#e2e8f0'/>"
-        spoon= "<rect x='580' y='120' width='14' height='70' rx='7' fill='#9ca3af'/><circle cx='587' cy='118' r='12' fill='#9ca3af'/>"
-        dots = "<circle cx='480' cy='180' r='6' fill='#f59e0b'/><circle cx='520' cy='186' r='6' fill='#ef4444'/>"
-        return bowl + dots + spoon
-    # prep
-    plate = "<ellipse cx='500' cy='220' rx='200' ry='26' fill='#e2e8f0'/>"
-    knife = "<rect x='590' y='160' width='12' height='60' rx='6' fill='#94a3b8'/><rect x='572' y='178' width='32' height='12' rx='6' fill='#374151'/>"
-    return plate + knife
+def _static_serving() -> bool:
+    try:
+        return bool(st.get_option("server.enableStaticServing"))
+    except Exception:
+        return False
 
-def step_svg(recipe: str, step_idx: int, total: int, text: str) -> str:
-    lines = wrap_lines(text, 44)
-    lines_svg = "".join(
-        f"<text x='500' y='{250 + i*24}' text-anchor='middle' font-family='Inter, system-ui' font-size='18' fill='#0f172a'>{line}</text>"
-        for i, line in enumerate(lines)
-    )
-    safe_title = recipe.replace("&", "&amp;")
-    return f"""
-    <div style='display:flex;justify-content:center'>
-    <svg viewBox='0 0 1000 360' xmlns='http://www.w3.org/2000/svg' role='img' aria-label='{safe_title} step'>
-      <defs>
-        <linearGradient id='bg' x1='0' y1='0' x2='1' y2='1'>
-          <stop offset='0%' stop-color='#f8fafc'/>
-          <stop offset='100%' stop-color='#eef2ff'/>
-        </linearGradient>
-        <filter id='d' x='-10%' y='-10%' width='120%' height='120%'>
-          <feDropShadow dx='0' dy='2' stdDeviation='10' flood-color='#000' flood-opacity='0.12'/>
-        </filter>
-      </defs>
-      <rect x='16' y='16' width='968' height='308' rx='20' fill='url(#bg)' filter='url(#d)'/>
-      <text x='40' y='58' font-family='Inter, system-ui' font-size='18' fill='#334155'>Step {step_idx} of {total} — {safe_title}</text>
-      {scene(recipe, text)}
-      {lines_svg}
-    </svg>
-    </div>
+def _static_serves_svg() -> bool:
+    """True if app/static answers .svg with an image type.
+
+    Servers with an extension allowlist send anything else as text/plain
+    with nosniff, which an <img> won't render; if the allowlist can't be
+    found, assume the worst and draw inline.
     """
+    if not _static_serving():
+        return False
+    try:
+        from streamlit.web.server import app_static_file_handler
+    except Exception:
+        return False
+    allowed = getattr(app_static_file_handler, "SAFE_APP_STATIC_FILE_EXTENSIONS", ())
+    return ".svg" in allowed
+
+STEP_BUNDLE = get_bundle() if _static_serves_svg() else None
+
+def show_step(recipe: str, step_idx: int, total: int, text: str):
+    """A prebuilt card from static/steps when there is one, else the inline SVG."""
+    url = STEP_BUNDLE.url(recipe, step_idx, total, text) if STEP_BUNDLE else None
+    if url:
+        alt = html.escape(f"{recipe} step {step_idx}")
+        st.markdown(f"<div style='display:flex;justify-content:center'>"
+                    f"<img src='{url}' alt='{alt}' style='width:100%'/></div>", unsafe_allow_html=True)
+    else:
+        svg_html(step_svg(recipe, step_idx, total, text), height=340)
 
 # ---------- State ----------
 if "screen" not in st.session_state:      st.session_state.screen = "home"
@@ -328,6 +118,9 @@ if "ingredients" not in st.session_state: st.session_state.ingredients = []
 
 # ---------- Navigation ----------
 def load_recipe(key: str):
+    r = find_recipe(key)
+    if r is not None:
+        scenes.prepare(r.name, r.steps, r.kinds)
     st.session_state.recipe_key = key
     st.session_state.step_idx = 0
     st.session_state.screen = "recipe"
@@ -335,8 +128,7 @@ def load_recipe(key: str):
 def go_home():  st.session_state.screen = "home"
 
 def next_step():
-    recipes = _all_recipes_with_ai()
-    r = recipes[st.session_state.recipe_key]
+    r = find_recipe(st.session_state.recipe_key)
     st.session_state.step_idx = min(st.session_state.step_idx + 1, len(r.steps) - 1)
 
 def prev_step():
@@ -379,6 +171,33 @@ def _parse_dish_name(recipe_text: str) -> str:
 
     return "Unnamed Recipe"
 
+PANTRY_MATCHES = 5
+
+@profiler.timed()
+def pantry_matches(items):
+    """Catalog recipes ranked against the pantry list, computed locally."""
+    return pantry_index(CATALOG).rank(pantry_mask(items), limit=PANTRY_MATCHES)
+
+def pantry_matches_ui(scope: str, items):
+    matches = pantry_matches(items)
+    if not matches:
+        return
+    st.markdown("#### Cook from your pantry")
+    for m in matches:
+        c1, c2 = st.columns([0.72, 0.28], vertical_alignment="center")
+        with c1:
+            notes = [f"{use} for {need}" for need, use in m.substitutions]
+            if m.missing:
+                notes.append("missing " + ", ".join(m.missing))
+            note = "; ".join(notes) or "you have everything"
+            st.markdown(f"**{m.name}**  \n<small>{m.have}/{m.need} ingredients · {note}</small>",
+                        unsafe_allow_html=True)
+        with c2:
+            if st.button("Start ▶", key=f"pantry_{scope}_{slug(m.name)}", use_container_width=True):
+                load_recipe(m.name)
+                st.rerun()
+
+@profiler.timed()
 def command_panel_ui(scope: str):
     _normalize_ingredients_state()
 
@@ -395,6 +214,8 @@ def command_panel_ui(scope: str):
             placeholder="e.g., olive oil",
         )
 
+        fresh = st.checkbox("Ask Pocket Chef for a new recipe even if one is saved", key=f"fresh_{scope}")
+
         colA, colB = st.columns(2)
         add_btn = colA.form_submit_button("Add to List", use_container_width=True)
         api_btn = colB.form_submit_button("🔎 Get Recipe", use_container_width=True)
@@ -408,16 +229,9 @@ def command_panel_ui(scope: str):
         if single and single.strip():
             names.append(single.strip())
 
-        # ---- De-dup helper
+        # ---- De-dup helper: "Tomatoes", "tomato" and "2 tomatoes" are one item; the first one typed is kept
         def _dedup_merge(existing: list[str], new_items: list[str]) -> list[str]:
-            seen = {n.lower() for n in existing}
-            added = []
-            for n in new_items:
-                k = n.lower()
-                if k not in seen:
-                    seen.add(k)
-                    added.append(n)
-            return existing + added
+            return dedupe(list(existing) + list(new_items))
 
         # A) Add to local list
         if add_btn:
@@ -435,17 +249,41 @@ def command_panel_ui(scope: str):
             if not to_send:
                 st.warning("Add at least one ingredient before calling the API.")
             else:
+                # Local matches show up right away, while the backend is still thinking.
+                ready = [m.name for m in pantry_matches(to_send) if not m.missing_mask]
+                if ready:
+                    st.info("Already in your cookbook: " + ", ".join(ready)
+                            + " (see “Cook from your pantry” below).")
+
+                # A recipe made from these ingredients before skips the model call.
+                key = request_key(to_send)
+                saved, swaps = (AI_LIBRARY.find(key), []) if not fresh else (None, [])
+                if saved is None and not fresh:
+                    saved, swaps = AI_LIBRARY.find_similar(key) or (None, [])
+                if saved is not None:
+                    note = f"From your recipe library: {saved.name}"
+                    if swaps:
+                        note += " (" + ", ".join(f"{use} for {need}" for need, use in swaps) + ")"
+                    st.toast(note)
+                    CATALOG.refresh(force=True)
+                    load_recipe(saved.name)
+                    st.rerun()
                 try:
-                    r = requests.post(
-                        f"{BACKEND}/api/pocket-chef",
-                        json={"user_id": "demo", "ingredients": to_send},
-                        timeout=20
-                    )
+                    with profiler.span("pocket_chef (backend)"):
+                        r = requests.post(
+                            f"{BACKEND}/api/pocket-chef",
+                            json={"user_id": "demo", "ingredients": to_send, "fresh": fresh},
+                            timeout=20
+                        )
                     r.raise_for_status()
                     data = r.json()  # { recipe: "...", xp_gained: ..., ... }
 
                     # Show the raw recipe text
                     st.success("Recipe from backend:")
+                    swaps = data.get("substitutions") or []
+                    if swaps:
+                        st.caption("Saved recipe, with swaps: " + ", ".join(
+                            f"{s['use']} for {s['needed']}" for s in swaps))
                     st.code(data.get("recipe", ""), language="markdown")
 
                     # Optional: jump into your step viewer using returned text
@@ -456,17 +294,27 @@ def command_panel_ui(scope: str):
                         steps = [recipe_text]
 
                     if steps:
-                        dish_name = _parse_dish_name(recipe_text)
-                        all_names = set(get_all_recipes().keys())
-                        final_name = dish_name
-                        i = 2
-                        while final_name in all_names:
-                            final_name = f"{dish_name} (AI {i})"
-                            i += 1
+                        # The backend may serve an answer it already gave (never when fresh is
+                        # ticked); keep one copy of it.
+                        saved = AI_LIBRARY.find(key, steps)
+                        if saved is not None:
+                            final_name = saved.name
+                        else:
+                            dish_name = _parse_dish_name(recipe_text)
+                            all_names = CATALOG.refresh(force=True).names()
+                            final_name = dish_name
+                            i = 2
+                            while final_name in all_names:
+                                final_name = f"{dish_name} (AI {i})"
+                                i += 1
+                            try:
+                                AI_LIBRARY.add(final_name, steps, 20, key)
+                                CATALOG.refresh(force=True)
+                            except OSError as e:
+                                st.warning(f"Couldn't save the recipe to the library: {e}")
 
                         st.session_state["ai_recipe"] = {"name": final_name, "steps": steps, "time_min": 20}
-                        st.session_state.recipe_key = final_name
-                        st.session_state.screen = "recipe"
+                        load_recipe(final_name)
                         st.rerun()
                 except Exception as e:
                     st.error(f"API error: {e}")
@@ -495,20 +343,47 @@ def command_panel_ui(scope: str):
         if st.button("Clear List", key=f"clear_{scope}", type="secondary"):
             st.session_state.ingredients = []
             st.info("Ingredients cleared.")
+
+        pantry_matches_ui(scope, st.session_state.ingredients)
     else:
         st.caption("No ingredients yet. Add some above.")
 
-def _all_recipes_with_ai() -> Dict[str, Recipe]:
-    recipes = get_all_recipes()
-    if "ai_recipe" in st.session_state:
-        ai = st.session_state["ai_recipe"]
-        recipes[ai["name"]] = Recipe(ai["name"], ai["steps"], ai["time_min"])
-    return recipes
-
 # ---------- Home ----------
 def slug(s: str) -> str:
     return "".join(ch.lower() if ch.isalnum() else "_" for ch in s)
 
+PAGE_SIZE = 12  # cards per page; only these are sent to the browser
+BEST_MATCH = "Best match"
+
+def _set_query(text: str):
+    st.session_state.recipe_query = text
+
+def _turn_page(delta: int):
+    st.session_state.recipe_page = st.session_state.get("recipe_page", 0) + delta
+
+def recipe_card(r: Recipe, key: str):
+    ai = " · ✨ AI" if key in AI_LIBRARY.names else ""
+    st.markdown(
+        f"<div class='card'><h4>{r.name}</h4>"
+        f"<span class='badge'>{len(r.steps)} steps · ~{r.time_min} min{ai}</span></div>",
+        unsafe_allow_html=True,
+    )
+    if st.button(f"Start {r.name} ▶", key=f"start_{slug(key)}", use_container_width=True):
+        load_recipe(key)
+        st.rerun()
+
+def pager(page: int, pages: int, where: str):
+    c1, c2, c3 = st.columns([0.25, 0.5, 0.25], vertical_alignment="center")
+    with c1:
+        st.button("◀ Prev", key=f"page_prev_{where}", disabled=page == 0,
+                  on_click=_turn_page, args=(-1,), use_container_width=True)
+    with c2:
+        st.markdown(f"<p class='subtitle'>Page {page + 1} of {pages}</p>", unsafe_allow_html=True)
+    with c3:
+        st.button("Next ▶", key=f"page_next_{where}", disabled=page >= pages - 1,
+                  on_click=_turn_page, args=(1,), use_container_width=True)
+
+@profiler.timed()
 def home_screen():
     st.markdown("<div style='height:6px'></div>", unsafe_allow_html=True)
     st.markdown("<h2 class='title'>Culinary Quest</h2>", unsafe_allow_html=True)
@@ -523,34 +398,66 @@ def home_screen():
     st.divider()
 
     recipes = get_all_recipes()
-    cols = st.columns(3, gap="small")
+    AI_LIBRARY.refresh()
+    c1, c2 = st.columns([0.68, 0.32], vertical_alignment="bottom")
+    with c1:
+        query = st.text_input("Search recipes", key="recipe_query",
+                              placeholder="Try a dish or an ingredient, e.g. cheese or pasta basil")
+    searching = bool(query.strip())
+    with c2:
+        orders = ([BEST_MATCH] if searching else []) + list(SORT_KEYS)
+        if st.session_state.get("recipe_sort") not in orders:
+            st.session_state.recipe_sort = orders[0]
+        sort = st.selectbox("Sort by", orders, key="recipe_sort")
+
+    if searching:
+        with profiler.span("recipe_search"):
+            index = search_index(CATALOG)
+            # Every match, so paging and the other orders see the whole result.
+            hits = [n for n, _ in index.search(query, limit=None)]
+            suggestions = [s for s in index.suggest(query) if s.lower() != query.strip().lower()]
+        if suggestions:
+            scols = st.columns(min(len(suggestions), 4), gap="small")
+            for i, sug in enumerate(suggestions[:8]):
+                scols[i % len(scols)].button(sug, key=f"sug_{i}_{slug(sug)}",
+                                             on_click=_set_query, args=(sug,))
+        keys = [k for k in hits if k in recipes]
+        if not keys:
+            st.info(f"No recipes match “{query.strip()}”.")
+            return
+        st.caption(f"{len(keys):,} match{'es' if len(keys) != 1 else ''}")
+        if sort != BEST_MATCH:
+            keys.sort(key=CATALOG.sort_key(sort, recipes))
+    else:
+        keys = CATALOG.ordered(sort)
+
+    # A new query or ordering starts again from the first page.
+    view = (query.strip().lower(), sort, CATALOG.version)
+    if st.session_state.get("recipe_view") != view:
+        st.session_state.recipe_view = view
+        st.session_state.recipe_page = 0
+    pages = max(1, -(-len(keys) // PAGE_SIZE))
+    page = min(max(st.session_state.get("recipe_page", 0), 0), pages - 1)
+    st.session_state.recipe_page = page
 
-    for i, key in enumerate(list(recipes.keys())):
-        r = recipes[key]
+    cols = st.columns(3, gap="small")
+    for i, key in enumerate(keys[page * PAGE_SIZE:(page + 1) * PAGE_SIZE]):
         with cols[i % 3]:
-            st.markdown("<div class='card'>", unsafe_allow_html=True)
-            st.markdown(f"<h4>{r.name}</h4>", unsafe_allow_html=True)
-            st.markdown(f"<span class='badge'>{len(r.steps)} steps · ~{r.time_min} min</span>", unsafe_allow_html=True)
-            st.markdown("</div>", unsafe_allow_html=True)
+            recipe_card(recipes[key], key)
 
-            if st.button(f"Start {r.name} ▶", key=f"start_{slug(key)}", use_container_width=True):
-                load_recipe(key)
-                st.rerun()
+    if pages > 1:
+        pager(page, pages, "bottom")
 
 # ---------- Recipe ----------
+@profiler.timed()
 def recipe_screen():
-    recipes = get_all_recipes()
-    if "ai_recipe" in st.session_state:
-        ai = st.session_state["ai_recipe"]
-        recipes[ai["name"]] = Recipe(ai["name"], ai["steps"], ai["time_min"])
-
     key = st.session_state.recipe_key
-    if not key or key not in recipes:
+    r = find_recipe(key) if key else None
+    if r is None:
         st.warning("No recipe selected yet.")
         go_home()
         st.rerun()
         return
-    r = recipes[key]
 
     with st.container():
         st.markdown("<div class='sticky-top'></div>", unsafe_allow_html=True)
@@ -568,7 +475,7 @@ def recipe_screen():
     st.divider()
 
     idx = st.session_state.step_idx
-    svg_html(step_svg(r.name, idx + 1, len(r.steps), r.steps[idx]), height=340)
+    show_step(r.name, idx + 1, len(r.steps), r.steps[idx])
     st.markdown(f"<div class='steptext'>{r.steps[idx]}</div>", unsafe_allow_html=True)
 
     c1, _, c3 = st.columns([1, 1, 1])
@@ -585,4 +492,6 @@ def recipe_screen():
 if st.session_state.screen == "home":
     home_screen()
 else:
-    recipe_screen()
\ No newline at end of file
+    recipe_screen()
+
+profiler.end()
@@ -0,0 +1,274 @@
+"""Opt-in per-rerun timing for the Streamlit pages.
+
+Turn it on with ``?profile=1`` in the page URL (or ``THRIVEHUB_PROFILE=1``).
+Hot functions are wrapped with ``@timed`` or ``with span(...)``; while no run
+is active on the current thread those cost one thread-local lookup. A page
+calls ``begin(page)`` at the top and ``end()`` at the bottom: every rerun's
+breakdown is shown in a collapsible debug panel and folded into rolling
+per-span stats that are flushed to ``.profile/rerun_stats.json``.
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
+
+ENV_FLAG = "THRIVEHUB_PROFILE"
+STATS_FILE = Path(os.getenv("THRIVEHUB_PROFILE_FILE", ".profile/rerun_stats.json"))
+WINDOW = 200          # samples kept per span for percentiles
+HISTORY = 20          # reruns kept per session for the panel
+
+_local = threading.local()
+
+
+class Run:
+    """Spans recorded during one script run of one page."""
+
+    def __init__(self, page: str):
+        self.page = page
+        self.started = self.last = time.perf_counter()
+        self.wall = time.time()
+        self.spans = []  # (name, depth, ms) in completion order
+        self.depth = 0
+        self.total_ms = None
+        self.interrupted = False
+
+    def add(self, name: str, ms: float, depth: int = None):
+        self.spans.append((name, self.depth if depth is None else depth, ms))
+        self.last = time.perf_counter()
+
+    def close(self, interrupted: bool = False):
+        if self.total_ms is None:
+            # An interrupted run is only known to have lasted until its last span.
+            end = self.last if interrupted else time.perf_counter()
+            self.total_ms = (end - self.started) * 1000
+            self.interrupted = interrupted
+        return self
+
+    def breakdown(self):
+        """Rows of {span, depth, calls, ms, share} in first-seen order, plus unaccounted time."""
+        rows = {}
+        for name, depth, ms in self.spans:
+            row = rows.setdefault(name, {"span": name, "depth": depth, "calls": 0, "ms": 0.0})
+            row["calls"] += 1
+            row["ms"] += ms
+            row["depth"] = min(row["depth"], depth)
+        total = self.total_ms or 0.0
+        out = list(rows.values())
+        top = sum(r["ms"] for r in out if r["depth"] == 0)
+        out.append({"span": "(other)", "depth": 0, "calls": 1, "ms": max(total - top, 0.0)})
+        for r in out:
+            r["share"] = r["ms"] / total if total else 0.0
+        return out
+
+
+class RollingStats:
+    """Per page, per span: call count, total, max and a window of recent samples."""
+
+    def __init__(self, path: Path = STATS_FILE):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            try:
+                self._data = json.loads(self.path.read_text(encoding="utf-8"))
+            except Exception:
+                self._data = {}
+        return self._data
+
+    def add(self, page: str, name: str, ms: float):
+        with self._lock:
+            s = self._load().setdefault(page, {}).setdefault(
+                name, {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "recent": []})
+            s["count"] += 1
+            s["total_ms"] += ms
+            s["max_ms"] = max(s["max_ms"], ms)
+            s["recent"].append(round(ms, 3))
+            del s["recent"][:-WINDOW]
+
+    def add_run(self, run: Run):
+        for row in run.breakdown():
+            if row["span"] != "(other)":
+                self.add(run.page, row["span"], row["ms"])
+        self.add(run.page, "(rerun total)", run.total_ms or 0.0)
+
+    def summary(self, page: str):
+        with self._lock:
+            spans = dict(self._load().get(page, {}))
+        rows = []
+        for name, s in spans.items():
+            recent = sorted(s["recent"])
+            pick = lambda q: recent[min(int(q * len(recent)), len(recent) - 1)] if recent else 0.0
+            rows.append({"span": name, "count": s["count"], "mean_ms": s["total_ms"] / max(s["count"], 1),
+                         "p50_ms": pick(0.5), "p95_ms": pick(0.95), "max_ms": s["max_ms"]})
+        return sorted(rows, key=lambda r: -r["mean_ms"])
+
+    def flush(self):
+        """Write the stats atomically; concurrent processes simply last-write-win."""
+        with self._lock:
+            if self._data is None:
+                return
+            payload = json.dumps(self._data)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(payload, encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def reset(self, page: str = None):
+        with self._lock:
+            data = self._load()
+            if page is None:
+                data.clear()
+            else:
+                data.pop(page, None)
+        self.flush()
+
+
+STATS = RollingStats()
+
+
+# ---------- Instrumentation ----------
+def current_run():
+    return getattr(_local, "run", None)
+
+
+@contextmanager
+def span(name: str):
+    run = getattr(_local, "run", None)
+    if run is None:
+        yield
+        return
+    depth = run.depth
+    run.depth += 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        run.depth = depth
+        run.add(name, (time.perf_counter() - start) * 1000, depth)
+
+
+def timed(name: str = None):
+    """Decorator form of ``span``; the span defaults to the function name."""
+    def deco(fn):
+        label = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if getattr(_local, "run", None) is None:
+                return fn(*args, **kwargs)
+            with span(label):
+                return fn(*args, **kwargs)
+        return wrapper
+    return deco
+
+
+def record(name: str, seconds: float, page: str = None):
+    """Add a duration measured elsewhere (e.g. on a worker thread).
+
+    Goes into the active run if there is one, otherwise straight into the
+    rolling stats for ``page``; callers outside a run check ``enabled()`` first.
+    """
+    run = current_run()
+    if run is not None:
+        run.add(name, seconds * 1000)
+    elif page:
+        STATS.add(page, name, seconds * 1000)
+        STATS.flush()
+
+
+def start_run(page: str, enabled: bool = True):
+    """Begin a run on this thread (or clear a stale one when disabled)."""
+    _local.run = Run(page) if enabled else None
+    return _local.run
+
+
+def finish_run(interrupted: bool = False):
+    run = current_run()
+    _local.run = None
+    if run is None:
+        return None
+    run.close(interrupted)
+    STATS.add_run(run)
+    return run
+
+
+# ---------- Streamlit glue ----------
+def enabled() -> bool:
+    """Whether profiling was asked for via the environment or the page URL."""
+    import streamlit as st
+
+    if os.getenv(ENV_FLAG, "").lower() in ("1", "true", "yes", "on"):
+        return True
+    try:
+        value = st.query_params.get("profile", "")
+    except Exception:
+        value = (st.experimental_get_query_params().get("profile") or [""])[0]
+    return str(value).lower() in ("1", "true", "yes", "on")
+
+
+def begin(page: str):
+    """Call at the top of a page script."""
+    import streamlit as st
+
+    # A run cut short by st.rerun()/st.stop() never reached end(); close it now.
+    stale = st.session_state.pop("_profile_active", None)
+    if stale is not None and stale.total_ms is None:
+        stale.close(interrupted=True)
+        STATS.add_run(stale)
+        _remember(st, stale)
+    run = start_run(page, enabled())
+    if run is not None:
+        st.session_state["_profile_active"] = run
+    return run
+
+
+def _remember(st, run: Run):
+    hist = st.session_state.setdefault("_profile_runs", [])
+    hist.append(run)
+    del hist[:-HISTORY]
+
+
+def end():
+    """Call at the bottom of a page script; renders the debug panel when profiling."""
+    import streamlit as st
+
+    run = finish_run()
+    if run is None:
+        return
+    st.session_state.pop("_profile_active", None)
+    _remember(st, run)
+    try:
+        STATS.flush()
+    except OSError:
+        pass
+    render_panel(st, run)
+
+
+def render_panel(st, run: Run):
+    with st.expander(f"⏱ Profiler — last rerun {run.total_ms:,.1f} ms", expanded=False):
+        st.caption("Time per span for this rerun (nested spans are indented and included in their parent).")
+        st.dataframe(
+            [{"span": " " * r["depth"] + r["span"], "calls": r["calls"], "ms": round(r["ms"], 2),
+              "share": f"{r['share']:.0%}"} for r in run.breakdown()],
+            hide_index=True, use_container_width=True,
+        )
+        hist = st.session_state.get("_profile_runs", [])
+        if len(hist) > 1:
+            st.markdown("**Recent reruns**")
+            st.dataframe(
+                [{"at": time.strftime("%H:%M:%S", time.localtime(r.wall)), "ms": round(r.total_ms or 0.0, 1),
+                  "spans": len(r.spans), "interrupted": r.interrupted} for r in reversed(hist)],
+                hide_index=True, use_container_width=True,
+            )
+        st.markdown(f"**Rolling stats** (last {WINDOW} samples per span, saved to `{STATS.path}`)")
+        st.dataframe(
+            [{k: (round(v, 2) if isinstance(v, float) else v) for k, v in row.items()} for row in STATS.summary(run.page)],
+            hide_index=True, use_container_width=True,
+        )
+        if st.button("Reset rolling stats", key="_profile_reset"):
+            STATS.reset(run.page)